@@ -1,41 +1,52 @@
 import envs
-from defined_agents import get_random_agent
+from defined_agents import get_path_agent, get_random_agent
 from logger import Logger
+from seeding import set_seed
+from tournament_stats import run_sequential_comparison, run_tournament
 
+import argparse
 import os
 
+import numpy as np
 import rlcard
-from rlcard.utils import set_seed, tournament
-import torch
 
 
-nr_games = 2000
-seed_id = 14
+def load_agent(path: str, args):
+    agent = get_path_agent(path)
+    if args.inference == 'fp32':
+        return agent
 
+    from quantization import evaluation_agent
 
-def get_nfsp_evaluatable_agents():
+    env = rlcard.make('zole', {'seed': args.seed_id})
+    agent, agreement = evaluation_agent(agent, args.inference, env, args.agreement_games, args.min_action_agreement)
+    print(f'Loaded {path} with {args.inference} inference, action agreement {agreement:.4f}')
+    return agent
+
+
+def get_nfsp_evaluatable_agents(args):
     evaluatable_agents = []
     nfsp_files = os.listdir('experiments/trained/nfsp/')
     nfsp_files.sort()
 
     for file in nfsp_files:
-        evaluatable_agents.append(torch.load(f'experiments/trained/nfsp/{file}'))
+        evaluatable_agents.append(load_agent(f'experiments/trained/nfsp/{file}', args))
 
     return evaluatable_agents
 
 
-def get_dqn_evaluatable_agents():
+def get_dqn_evaluatable_agents(args):
     evaluatable_agents = []
     dqn_files = os.listdir('experiments/trained/dqn/')
     dqn_files.sort()
 
     for file in dqn_files:
-        evaluatable_agents.append(torch.load(f'experiments/trained/dqn/{file}'))
+        evaluatable_agents.append(load_agent(f'experiments/trained/dqn/{file}', args))
 
     return evaluatable_agents
 
 
-def get_dmc_evaluatable_agents():
+def get_dmc_evaluatable_agents(args):
     evaluatable_agents = []
     dmc_files = [
         '2_9600.pth',
@@ -138,23 +149,30 @@ def get_dmc_evaluatable_agents():
     ]
 
     for file in dmc_files:
-        evaluatable_agents.append(torch.load(f'experiments/trained/dmc/{file}'))
+        evaluatable_agents.append(load_agent(f'experiments/trained/dmc/{file}', args))
 
     return evaluatable_agents
 
 
-def get_env(): 
-    set_seed(seed_id)
+def get_env(args):
+    set_seed(args.seed_id)
     return rlcard.make(
         'zole',
         {
-            'seed': seed_id,
-            'display_performance_interval': nr_games
+            'seed': args.seed_id,
+            'display_performance_interval': args.nr_games
         }
     )
 
 
-def evaluate():
+evaluatable_agent_getters = {
+    'nfsp': get_nfsp_evaluatable_agents,
+    'dqn': get_dqn_evaluatable_agents,
+    'dmc': get_dmc_evaluatable_agents,
+}
+
+
+def evaluate(args):
     opponents = [
         'vs_dmc',
         'vs_dqn',
@@ -162,9 +180,7 @@ def evaluate():
         'vs_dmc_t',
     ]
 
-    # evaluatable_agents = get_dmc_evaluatable_agents()
-    # evaluatable_agents = get_dqn_evaluatable_agents()
-    evaluatable_agents = get_nfsp_evaluatable_agents()
+    evaluatable_agents = evaluatable_agent_getters[args.evaluated](args)
 
     baselines = [
         # ['random', 'random']
@@ -175,12 +191,12 @@ def evaluate():
     ]
 
     for index, baseline in enumerate(baselines):
-        agent_0 = torch.load(baseline[0])
-        agent_1 = torch.load(baseline[1])
-        # with Logger(f'performance/trained/nfsp/vs_random') as logger:
-        with Logger(f'performance/trained/nfsp/{opponents[index]}') as logger:
+        agent_0 = load_agent(baseline[0], args)
+        agent_1 = load_agent(baseline[1], args)
+        # with Logger(f'performance/trained/{args.evaluated}/vs_random') as logger:
+        with Logger(f'performance/trained/{args.evaluated}/{opponents[index]}') as logger:
             for agent_index, agent in enumerate(evaluatable_agents):
-                env = get_env()
+                env = get_env(args)
                 env.set_agents([
                     # get_random_agent(env),
                     # get_random_agent(env),
@@ -189,8 +205,19 @@ def evaluate():
                     agent
                 ])
 
-                rewards = tournament(env, nr_games)
-                print(f'Finished {index} {agent_index}')
+                if args.sequential:
+                    results, decision, interval = run_sequential_comparison(
+                        env, 2, args.nr_games, batch_size=args.batch_size, alpha=args.alpha,
+                        tie_margin=args.tie_margin,
+                    )
+                    summary = results.summary(np.random.RandomState(args.seed_id))
+                    print(f'Finished {index} {agent_index}: {decision} after {results.num_games} games, '
+                          f'[{interval[0]:+.3f}, {interval[1]:+.3f}]')
+                else:
+                    _, summary = run_tournament(env, args.nr_games, target_ci_width=args.target_ci_width, seed=args.seed_id)
+                    decision = None
+                    print(f'Finished {index} {agent_index}')
+                rewards = summary['mean']
 
                 large_wins = [
                     env.zolePerformanceTracker.get_large_percent_wins(0),
@@ -215,7 +242,96 @@ def evaluate():
                     small_wins,
                     as_large,
                     rewards,
+                    score_se=summary['se'],
+                    score_ci=summary['ci'],
+                    games=summary['num_games'],
+                    decision=decision,
                 )
 
 
-evaluate()
+def start(args):
+    evaluate(args)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--evaluated',
+        type=str,
+        default='nfsp',
+        choices=list(evaluatable_agent_getters),
+        help='The trained checkpoints in experiments/trained/ evaluated against every baseline pair',
+    )
+
+    parser.add_argument(
+        '--nr_games',
+        type=int,
+        default=2000,
+        help='Games of every comparison, the maximal number of games with --sequential',
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+    parser.add_argument(
+        '--target_ci_width',
+        type=float,
+        default=None,
+        help='Stop a comparison once the confidence intervals of all seats are narrower than this',
+    )
+
+    parser.add_argument(
+        '--sequential',
+        action='store_true',
+        help='Stop a comparison as soon as an anytime-valid confidence sequence of the mean payoff of the evaluated '
+             'agent decides it better or worse than the baseline pair, or tied within --tie_margin',
+    )
+
+    parser.add_argument(
+        '--alpha',
+        type=float,
+        default=0.05,
+    )
+
+    parser.add_argument(
+        '--tie_margin',
+        type=float,
+        default=0.1,
+    )
+
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        '--inference',
+        type=str,
+        default='fp32',
+        choices=['fp32', 'numpy', 'int8'],
+        help='numpy: fused NumPy forward pass, int8: dynamic quantization, checked against fp32 on --agreement_games '
+             'games',
+    )
+
+    parser.add_argument(
+        '--agreement_games',
+        type=int,
+        default=50,
+    )
+
+    parser.add_argument(
+        '--min_action_agreement',
+        type=float,
+        default=0.98,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Evaluate trained checkpoints against baseline agents')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
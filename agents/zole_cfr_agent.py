@@ -0,0 +1,34 @@
+import numpy as np
+
+from agents.zole_heuristic_agent import ZoleHeuristicAgent
+from bidding_cfr import hand_bucket
+from envs.zole import DefaultZoleStateExtractor as Layout
+
+
+class ZoleCFRBiddingAgent(ZoleHeuristicAgent):
+    """ ZoleHeuristicAgent taking the table with the take probabilities of a CFR bidding strategy, see bidding_cfr.py
+
+        Hand buckets the strategy has no deals for fall back to the take rules of ZoleHeuristicAgent. Bury and trick
+        play are those of ZoleHeuristicAgent.
+    """
+
+    def __init__(self, num_actions, strategy: np.ndarray, take_threshold: float = 6.0, bidding_table=None, seed: int or None = None):
+        """ Initialize the CFR bidding agent
+
+        Args:
+            num_actions (int): the size of the output action space
+            strategy (np.ndarray): (3, NUM_BUCKETS) take probability of every bidding seat and hand bucket
+            take_threshold (float): the minimal hand value to take the table in unknown buckets
+            bidding_table (BiddingTable): precomputed bury decisions
+            seed (int): seed of the sampling of mixed take decisions
+        """
+        super().__init__(num_actions, take_threshold=take_threshold, bidding_table=bidding_table)
+        self.strategy = strategy
+        self.np_random = np.random.RandomState(seed)
+
+    def _should_take(self, hand: list[int], obs, current_player_id: int) -> bool:
+        dealer_id = Layout.player_index(obs, Layout.dealer_rep_offset)
+        take_prob = self.strategy[(current_player_id - dealer_id - 1) % 3, hand_bucket(hand)]
+        if np.isnan(take_prob):
+            return super()._should_take(hand, obs, current_player_id)
+        return self.np_random.random_sample() < take_prob
@@ -0,0 +1,85 @@
+import numpy as np
+import torch
+from torch import nn
+
+from rlcard.agents.dmc_agent.model import DMCAgent, DMCModel
+
+
+class ZoleDMCNet(nn.Module):
+    """ DMC value network with a state trunk and one output per action
+
+        rlcard's DMCNet scores an action from the concatenated state and one-hot action, so a decision costs one pass
+        per legal action. Here the state goes through the network once and the head returns the values of all
+        actions, `forward` keeps the (obs, actions) signature used by the DMC learner.
+    """
+
+    def __init__(self, state_shape, num_actions, mlp_layers=[512, 512, 512, 512, 512]):
+        super().__init__()
+        layer_dims = [int(np.prod(state_shape))] + mlp_layers
+        fc = []
+        for i in range(len(layer_dims) - 1):
+            fc.append(nn.Linear(layer_dims[i], layer_dims[i + 1]))
+            fc.append(nn.ReLU())
+        fc.append(nn.Linear(layer_dims[-1], num_actions))
+        self.fc_layers = nn.Sequential(*fc)
+
+    def forward(self, obs, actions):
+        """ Return the values of the one-hot actions
+        """
+        values = self.forward_all(obs)
+        return (values * torch.flatten(actions, 1)).sum(dim=1)
+
+    def forward_all(self, obs):
+        """ Return the values of all actions, (batch, num_actions)
+        """
+        return self.fc_layers(torch.flatten(obs, 1))
+
+
+class ZoleDMCAgent(DMCAgent):
+    """ DMCAgent evaluating all legal actions in a single forward pass of ZoleDMCNet
+    """
+
+    def __init__(
+        self,
+        state_shape,
+        action_shape,
+        mlp_layers=[512, 512, 512, 512, 512],
+        exp_epsilon=0.01,
+        device="0",
+    ):
+        self.use_raw = False
+        self.device = 'cuda:' + device if device != "cpu" else "cpu"
+        self.net = ZoleDMCNet(state_shape, action_shape[0], mlp_layers).to(self.device)
+        self.exp_epsilon = exp_epsilon
+        self.action_shape = action_shape
+
+    def predict(self, state):
+        obs = torch.from_numpy(state['obs'].astype(np.float32)).to(self.device)
+        action_keys = np.fromiter(state['legal_actions'].keys(), dtype=np.int64)
+        with torch.no_grad():
+            values = self.net.forward_all(obs.unsqueeze(0))[0]
+        return action_keys, values.cpu().numpy()[action_keys]
+
+
+class ZoleDMCModel(DMCModel):
+    """ DMCModel of ZoleDMCAgents, a drop-in replacement for DMCTrainer.model_func
+    """
+
+    def __init__(
+        self,
+        state_shape,
+        action_shape,
+        mlp_layers=[512, 512, 512, 512, 512],
+        exp_epsilon=0.01,
+        device=0
+    ):
+        self.agents = []
+        for player_id in range(len(state_shape)):
+            agent = ZoleDMCAgent(
+                state_shape[player_id],
+                action_shape[player_id],
+                mlp_layers,
+                exp_epsilon,
+                device,
+            )
+            self.agents.append(agent)
@@ -0,0 +1,187 @@
+import numpy as np
+
+from envs.zole import DefaultZoleStateExtractor as Layout
+from games.zole.solver import CARD_SUITS, beats
+from games.zole.utils.action_event import ActionEvent, BuryCardAction
+from games.zole.utils.zole_card import ZoleCard
+
+
+_card_points = ZoleCard.card_points
+_queen_ids = range(22, 26)
+_plain_ace_ids = (3, 7, 11)
+
+
+class ZoleHeuristicAgent(object):
+    """ A rule-based agent for Zole. It takes the table on a threshold over its trumps, queens and aces,
+        buries short-suit cards and plays tricks greedily. It is deterministic and does not need torch.
+
+        With a BiddingTable (see bidding_table.py) the take and bury decisions are looked up in the table instead,
+        falling back to the rules for hands the table has no entry for.
+    """
+
+    def __init__(self, num_actions, take_threshold: float = 6.0, bidding_table=None):
+        """ Initialize the heuristic agent
+
+        Args:
+            num_actions (int): the size of the output action space
+            take_threshold (float): the minimal hand value to take the table, see `hand_value`
+            bidding_table (BiddingTable): precomputed take and bury decisions
+        """
+        self.use_raw = False
+        self.num_actions = num_actions
+        self.take_threshold = take_threshold
+        self.bidding_table = bidding_table
+
+    def step(self, state):
+        """ Same as eval_step, the heuristic agent does not explore
+        """
+        return self.eval_step(state)[0]
+
+    def eval_step(self, state):
+        """ Predict the action given the current state
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): the action id
+            info (dict): empty
+        """
+        legal_actions = state['raw_legal_actions']
+        obs = state['obs']
+        current_player_id = Layout.player_index(obs, Layout.current_player_rep_offset)
+        hand_offset = Layout.hands_rep_offset + current_player_id * 26
+        hand = np.flatnonzero(obs[hand_offset:hand_offset + 26]).tolist()
+
+        if ActionEvent.take_table_action_id in legal_actions:
+            if self._should_take(hand, obs, current_player_id):
+                return ActionEvent.take_table_action_id, {}
+            return ActionEvent.pass_table_action_id, {}
+
+        if legal_actions[0] < ActionEvent.first_play_card_action_id:
+            card_ids = [action_id - ActionEvent.first_bury_card_action_id for action_id in legal_actions]
+            card_id = self._choose_bury_card(card_ids, hand, state)
+            return ActionEvent.first_bury_card_action_id + card_id, {}
+
+        card_ids = [action_id - ActionEvent.first_play_card_action_id for action_id in legal_actions]
+        card_id = choose_trick_card(card_ids, obs, current_player_id)
+        return ActionEvent.first_play_card_action_id + card_id, {}
+
+    def _should_take(self, hand: list[int], obs, current_player_id: int) -> bool:
+        if self.bidding_table is not None:
+            dealer_id = Layout.player_index(obs, Layout.dealer_rep_offset)
+            should_take = self.bidding_table.should_take(hand, (current_player_id - dealer_id - 1) % 3)
+            if should_take is not None:
+                return should_take
+        return self.hand_value(hand) >= self.take_threshold
+
+    def _choose_bury_card(self, card_ids: list[int], hand: list[int], state) -> int:
+        if self.bidding_table is not None:
+            full_hand = list(hand)
+            if len(hand) < 10:  # second bury, the first buried card is the last action
+                _, action = state['action_record'][-1]
+                if isinstance(action, BuryCardAction):
+                    full_hand.append(action.card.card_id)
+            if len(full_hand) == 10:
+                pair = self.bidding_table.get_bury_pair(full_hand)
+                if pair is not None:
+                    for card_id in pair:
+                        if card_id in card_ids:
+                            return card_id
+        return choose_bury_card(card_ids, hand)
+
+    @staticmethod
+    def hand_value(hand: list[int]) -> float:
+        """ Number of trumps plus half a point for every queen and plain ace
+        """
+        trumps = sum(1 for card_id in hand if card_id >= 12)
+        queens = sum(1 for card_id in hand if card_id in _queen_ids)
+        aces = sum(1 for card_id in hand if card_id in _plain_ace_ids)
+        return trumps + 0.5 * queens + 0.5 * aces
+
+
+def choose_bury_card(card_ids: list[int], hand: list[int]) -> int:
+    """ Bury points from short plain suits, keep aces and trumps
+    """
+    suit_lengths = [0, 0, 0, 0]
+    for card_id in hand:
+        suit_lengths[CARD_SUITS[card_id]] += 1
+
+    def bury_score(card_id):
+        if card_id >= 12:
+            return -100 - card_id
+        score = _card_points[card_id] + 6 * (4 - suit_lengths[CARD_SUITS[card_id]])
+        if card_id in _plain_ace_ids:
+            score -= 15
+        return score
+
+    return max(card_ids, key=bury_score)
+
+
+def choose_trick_card(card_ids: list[int], obs, current_player_id: int) -> int:
+    """ Greedy trick play: cash sure winners, win tricks as cheaply as possible, smear points on a winning partner
+        and otherwise throw the cheapest card
+    """
+    trick_indices = np.flatnonzero(obs[Layout.trick_rep_offset:Layout.trick_rep_offset + 3 * 26]).tolist()
+    trick = [divmod(index, 26) for index in trick_indices]  # (player_id, card_id)
+    if len(trick) == 3:  # the previous trick is still shown when leading
+        trick = []
+    hidden = np.flatnonzero(obs[Layout.hidden_cards_rep_offset:Layout.hidden_cards_rep_offset + 26]).tolist()
+    large_player_id = Layout.player_index(obs, Layout.large_player_rep_offset)
+    is_large = current_player_id == large_player_id
+
+    if not trick:
+        return _choose_lead_card(card_ids, hidden, is_large)
+
+    # order the trick from the leader, who played len(trick) seats before the current player
+    leader_id = (current_player_id - len(trick)) % 3
+    trick.sort(key=lambda move: (move[0] - leader_id) % 3)
+    winner_id, winning_card_id = trick[0]
+    for player_id, card_id in trick[1:]:
+        if beats(card_id, winning_card_id):
+            winner_id, winning_card_id = player_id, card_id
+
+    trick_points = sum(_card_points[card_id] for _, card_id in trick)
+    is_last = len(trick) == 2
+    partner_is_winning = not is_large and winner_id != large_player_id
+    winning_cards = [card_id for card_id in card_ids if beats(card_id, winning_card_id)]
+
+    if partner_is_winning:
+        if is_last or not any(beats(card_id, winning_card_id) for card_id in hidden):
+            return max(card_ids, key=lambda card_id: (_card_points[card_id], -card_id))
+        return _cheapest(card_ids)
+
+    if winning_cards:
+        if is_last:
+            return _cheapest(winning_cards)
+        sure_winners = [card_id for card_id in winning_cards if _is_sure_winner(card_id, hidden)]
+        if sure_winners:
+            return _cheapest(sure_winners)
+        if trick_points >= 10:
+            return _cheapest(winning_cards)
+
+    return _cheapest(card_ids)
+
+
+def _choose_lead_card(card_ids: list[int], hidden: list[int], is_large: bool) -> int:
+    trumps = [card_id for card_id in card_ids if card_id >= 12]
+    if is_large and trumps and any(card_id >= 12 for card_id in hidden):
+        return max(trumps)
+    sure_winners = [card_id for card_id in card_ids if _is_sure_winner(card_id, hidden)]
+    if sure_winners:
+        return max(sure_winners, key=lambda card_id: _card_points[card_id])
+    plain_aces = [card_id for card_id in card_ids if card_id in _plain_ace_ids]
+    if plain_aces and not is_large:
+        return plain_aces[0]
+    return _cheapest(card_ids)
+
+
+def _is_sure_winner(card_id: int, hidden: list[int]) -> bool:
+    """ No unseen card can beat card_id, ignoring that unseen cards may be buried
+    """
+    return not any(beats(hidden_card_id, card_id) for hidden_card_id in hidden)
+
+
+def _cheapest(card_ids: list[int]) -> int:
+    return min(card_ids, key=lambda card_id: (_card_points[card_id], card_id))
+
@@ -0,0 +1,143 @@
+import numpy as np
+
+
+class ZoleNumpyAgent(object):
+    """ Inference-only agent running an exported DMC, DQN or NFSP network with NumPy, see zole_export.py
+
+        The artifact is a .npz with the kind of network, its activation and the weights and biases of every linear
+        layer, with the input BatchNorm of DQN/NFSP networks folded into the first layer:
+            kind: 'dmc' scores (obs, one-hot action) pairs, 'dmc_batched' (ZoleDMCNet) and 'dqn' output the values of
+                all actions, 'nfsp' outputs policy logits
+            activation: 'relu' or 'tanh', applied after every layer but the last
+            weights_{i}: (in, out) float32, biases_{i}: (out,) float32
+    """
+
+    def __init__(self, kind: str, activation: str, weights: list, biases: list, num_actions: int, seed: int or None = None):
+        """ Initialize the NumPy agent
+
+        Args:
+            kind (str): 'dmc', 'dmc_batched', 'dqn' or 'nfsp'
+            activation (str): 'relu' or 'tanh'
+            weights (list): (in, out) weight matrices of the linear layers
+            biases (list): biases of the linear layers
+            num_actions (int): the size of the output action space
+            seed (int): seed of the action sampling of the NFSP average policy
+        """
+        if kind not in ('dmc', 'dmc_batched', 'dqn', 'nfsp'):
+            raise Exception(f'ZoleNumpyAgent: unknown network kind {kind}')
+        self.use_raw = False
+        self.kind = kind
+        self.activation = np.tanh if activation == 'tanh' else _relu
+        self.weights = [np.ascontiguousarray(weight, dtype=np.float32) for weight in weights]
+        self.biases = [np.asarray(bias, dtype=np.float32) for bias in biases]
+        self.num_actions = num_actions
+        self.np_random = np.random.RandomState(seed)
+        if kind == 'dmc':
+            # the first layer of (obs, one-hot action) splits into an obs matmul and a row lookup per action
+            state_size = self.weights[0].shape[0] - num_actions
+            self.obs_weights = np.ascontiguousarray(self.weights[0][:state_size])
+            self.action_weights = self.weights[0][state_size:] + self.biases[0]
+
+    @staticmethod
+    def from_npz(path: str, seed: int or None = None) -> 'ZoleNumpyAgent':
+        with np.load(path) as artifact:
+            num_layers = int(artifact['num_layers'])
+            return ZoleNumpyAgent(
+                kind=str(artifact['kind']),
+                activation=str(artifact['activation']),
+                weights=[artifact[f'weights_{index}'] for index in range(num_layers)],
+                biases=[artifact[f'biases_{index}'] for index in range(num_layers)],
+                num_actions=int(artifact['num_actions']),
+                seed=seed,
+            )
+
+    def save_npz(self, path: str):
+        arrays = {
+            'kind': np.array(self.kind),
+            'activation': np.array('tanh' if self.activation is np.tanh else 'relu'),
+            'num_layers': np.array(len(self.weights)),
+            'num_actions': np.array(self.num_actions),
+        }
+        for index, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weights_{index}'] = weight
+            arrays[f'biases_{index}'] = bias
+        np.savez(path, **arrays)
+
+    def step(self, state):
+        """ Same as eval_step, the exported networks do not explore
+        """
+        return self.eval_step(state)[0]
+
+    def eval_step(self, state):
+        """ Predict the action given the current state
+
+        Args:
+            state (dict): A dictionary that represents the current state
+
+        Returns:
+            action (int): the action id
+            info (dict): the 'values' of the legal actions, or their 'probs' for an NFSP policy
+        """
+        legal_actions = np.fromiter(state['legal_actions'].keys(), dtype=np.int64)
+        outputs = self.predict(state['obs'], legal_actions)
+        if self.kind == 'nfsp':
+            probs = np.exp(outputs - outputs.max())
+            probs /= probs.sum()
+            index = self.np_random.choice(len(legal_actions), p=probs)
+            info = {'probs': {int(action): float(prob) for action, prob in zip(legal_actions, probs)}}
+        else:
+            index = int(np.argmax(outputs))
+            info = {'values': {int(action): float(value) for action, value in zip(legal_actions, outputs)}}
+        return int(legal_actions[index]), info
+
+    def eval_steps(self, states: list) -> list[int]:
+        """ Actions of eval_step for a batch of states, predicted with one forward pass
+        """
+        legal_actions = [np.fromiter(state['legal_actions'].keys(), dtype=np.int64) for state in states]
+        obs = np.stack([state['obs'] for state in states]).astype(np.float32)
+        if self.kind == 'dmc':
+            # one row per legal action of every state, split back into the states
+            counts = [len(actions) for actions in legal_actions]
+            hidden = self.action_weights[np.concatenate(legal_actions)] + np.repeat(obs @ self.obs_weights, counts, axis=0)
+            values = self._forward(self.activation(hidden), first_layer=1)[:, 0]
+            outputs = np.split(values, np.cumsum(counts)[:-1])
+        else:
+            logits = self._forward(obs, first_layer=0)
+            outputs = [row[actions] for row, actions in zip(logits, legal_actions)]
+        actions = []
+        for output, legal in zip(outputs, legal_actions):
+            if self.kind == 'nfsp':
+                probs = np.exp(output - output.max())
+                index = self.np_random.choice(len(legal), p=probs / probs.sum())
+            else:
+                index = int(np.argmax(output))
+            actions.append(int(legal[index]))
+        return actions
+
+    def freeze(self) -> 'ZoleNumpyAgent':
+        """ Make the weights read-only, so a frozen policy can be shared by several seats and games
+        """
+        for array in self.weights + self.biases + ([self.obs_weights, self.action_weights] if self.kind == 'dmc' else []):
+            array.flags.writeable = False
+        return self
+
+    def predict(self, obs, legal_actions: np.ndarray) -> np.ndarray:
+        """ Return the network output of every legal action, values for DMC/DQN and logits for NFSP
+        """
+        obs = np.asarray(obs, dtype=np.float32)
+        if self.kind == 'dmc':
+            hidden = self.action_weights[legal_actions] + obs @ self.obs_weights
+            return self._forward(self.activation(hidden), first_layer=1)[:, 0]
+        return self._forward(obs, first_layer=0)[legal_actions]
+
+    def _forward(self, x: np.ndarray, first_layer: int) -> np.ndarray:
+        last_layer = len(self.weights) - 1
+        for index in range(first_layer, last_layer + 1):
+            x = x @ self.weights[index] + self.biases[index]
+            if index < last_layer:
+                x = self.activation(x)
+        return x
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
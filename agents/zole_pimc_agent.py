@@ -0,0 +1,259 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agents.zole_heuristic_agent import ZoleHeuristicAgent
+from envs.zole import DefaultZoleStateExtractor as Layout
+from games.zole.solver import ZoleSolver, CARD_SUITS, greedy_playout, legal_cards, mask_cards, to_mask
+from games.zole.utils.action_event import ActionEvent, PlayCardAction
+from games.zole.utils.canonical import canonical_permutation, invert_permutation, permute_card, permute_suit_mask
+
+
+class ZolePIMCAgent(object):
+    """ Perfect-information Monte Carlo agent for the trick play of Zole
+
+        At every play card decision it samples deals of the unseen cards that are consistent with its observation
+        (card counts and the suits an opponent failed to follow) and scores every legal card on each deal, with the
+        double-dummy solver when few cards are left and with greedy rollouts before that. The card with the best
+        average large player points is played. Bidding and burying are delegated to `bidding_agent`.
+    """
+
+    def __init__(
+        self,
+        num_actions,
+        num_samples: int = 20,
+        solver_max_cards: int = 5,
+        num_workers: int = 1,
+        cache_size: int = 10000,
+        bidding_agent=None,
+        seed: int or None = None,
+    ):
+        """ Initialize the PIMC agent
+
+        Args:
+            num_actions (int): the size of the output action space
+            num_samples (int): the number of sampled deals per decision
+            solver_max_cards (int): the solver is used when the hand holds at most this many cards
+            num_workers (int): samples are spread over a process pool when larger than 1
+            cache_size (int): the number of information sets whose card values are kept
+            bidding_agent: agent for the pass, take and bury decisions, a ZoleHeuristicAgent by default
+            seed (int): seed of the deal sampler
+        """
+        self.use_raw = False
+        self.num_actions = num_actions
+        self.num_samples = num_samples
+        self.solver_max_cards = solver_max_cards
+        self.num_workers = num_workers
+        self.cache_size = cache_size
+        self.bidding_agent = bidding_agent or ZoleHeuristicAgent(num_actions=num_actions)
+        self.np_random = np.random.RandomState(seed)
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_hits: int = 0
+        self._executor: ProcessPoolExecutor or None = None
+
+    def step(self, state):
+        """ Same as eval_step, sampling already randomizes the play
+        """
+        return self.eval_step(state)[0]
+
+    def eval_step(self, state):
+        """ Predict the action given the current state
+
+        Args:
+            state (dict): A dictionary that represents the current state, including the action_record
+
+        Returns:
+            action (int): the action id
+            info (dict): the average large player points of every legal card as 'values'
+        """
+        legal_actions = state['raw_legal_actions']
+        if legal_actions[0] < ActionEvent.first_play_card_action_id:
+            return self.bidding_agent.eval_step(state)
+
+        values = self.card_values(state)
+        large_player_id = Layout.player_index(state['obs'], Layout.large_player_rep_offset)
+        current_player_id = Layout.player_index(state['obs'], Layout.current_player_rep_offset)
+        choose = max if current_player_id == large_player_id else min
+        card_id = choose(values, key=values.get)
+
+        info = {'values': {ActionEvent.first_play_card_action_id + card_id: value for card_id, value in values.items()}}
+        return ActionEvent.first_play_card_action_id + card_id, info
+
+    def card_values(self, state) -> dict:
+        """ Return the average large player points from the current trick on for every legal card
+        """
+        information_set, permutation = InformationSet.from_state(state).canonical()
+        inverse = invert_permutation(permutation)
+        key = information_set.key()
+        values = self.cache.get(key)
+        if values is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return {permute_card(card_id, inverse): value for card_id, value in values.items()}
+
+        samples = [information_set.sample_hands(self.np_random) for _ in range(self.num_samples)]
+        use_solver = information_set.hand_size <= self.solver_max_cards
+        position = (information_set.trick, information_set.leader, information_set.large_player_id, use_solver)
+        if self.num_workers > 1 and len(samples) > 1:
+            chunks = [samples[index::self.num_workers] for index in range(self.num_workers)]
+            chunks = [chunk for chunk in chunks if chunk]
+            totals = list(self._get_executor().map(_evaluate_samples, chunks, [position] * len(chunks)))
+        else:
+            totals = [_evaluate_samples(samples, position)]
+
+        values = {card_id: sum(total[card_id] for total in totals) / len(samples) for card_id in totals[0]}
+        self.cache[key] = values
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return {permute_card(card_id, inverse): value for card_id, value in values.items()}
+
+    def close(self):
+        """ Shut down the worker processes, a later decision starts new ones
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_executor', None) is not None:
+            self._executor.shutdown(wait=False)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        return self._executor
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+
+class InformationSet(object):
+    """ What the current player knows during trick play: its hand, the unseen cards, the current trick, the hand
+        sizes of the opponents and the suits they are known to be void in
+    """
+
+    def __init__(self, player_id, large_player_id, hand, unseen, trick, leader, hand_sizes, voids):
+        self.player_id: int = player_id
+        self.large_player_id: int = large_player_id
+        self.hand: int = hand  # card mask
+        self.unseen: int = unseen  # card mask of opponent hands and, for small players, the buried cards
+        self.trick: tuple = trick  # card ids of the current trick in play order
+        self.leader: int = leader
+        self.hand_sizes: list = hand_sizes  # number of cards per player id
+        self.voids: list = voids  # per player id, mask of the suits the player failed to follow
+
+    @property
+    def hand_size(self) -> int:
+        return self.hand_sizes[self.player_id]
+
+    @staticmethod
+    def from_state(state) -> 'InformationSet':
+        obs = state['obs']
+        player_id = Layout.player_index(obs, Layout.current_player_rep_offset)
+        large_player_id = Layout.player_index(obs, Layout.large_player_rep_offset)
+        hand_offset = Layout.hands_rep_offset + player_id * 26
+        hand = to_mask(np.flatnonzero(obs[hand_offset:hand_offset + 26]))
+        unseen = to_mask(np.flatnonzero(obs[Layout.hidden_cards_rep_offset:Layout.hidden_cards_rep_offset + 26]))
+
+        plays = [(player, action.card.card_id) for player, action in state['action_record'] if isinstance(action, PlayCardAction)]
+        voids = [0, 0, 0]
+        for index, (player, card_id) in enumerate(plays):
+            led_card_id = plays[index - index % 3][1]
+            if CARD_SUITS[card_id] != CARD_SUITS[led_card_id]:
+                voids[player] |= 1 << CARD_SUITS[led_card_id]
+
+        trick_plays = plays[len(plays) - len(plays) % 3:]
+        trick = tuple(card_id for _, card_id in trick_plays)
+        leader = trick_plays[0][0] if trick_plays else player_id
+        hand_size = bin(hand).count('1')
+        trick_players = {player for player, _ in trick_plays}
+        hand_sizes = [hand_size - (1 if player in trick_players else 0) for player in range(3)]
+        return InformationSet(player_id, large_player_id, hand, unseen, trick, leader, hand_sizes, voids)
+
+    def canonical(self) -> tuple:
+        """ Return the information set with its plain suits in canonical order and the permutation used, so that
+            information sets equal up to the plain suits share one cache entry
+        """
+        void_cards = [[card_id for card_id in range(12) if voids & (1 << (card_id // 4))] for voids in self.voids]
+        permutation = canonical_permutation(
+            mask_cards(self.hand), mask_cards(self.unseen), *void_cards, *([card_id] for card_id in self.trick)
+        )
+        information_set = InformationSet(
+            self.player_id,
+            self.large_player_id,
+            to_mask(permute_card(card_id, permutation) for card_id in mask_cards(self.hand)),
+            to_mask(permute_card(card_id, permutation) for card_id in mask_cards(self.unseen)),
+            tuple(permute_card(card_id, permutation) for card_id in self.trick),
+            self.leader,
+            self.hand_sizes,
+            [permute_suit_mask(voids, permutation) for voids in self.voids],
+        )
+        return information_set, permutation
+
+    def key(self) -> tuple:
+        return self.player_id, self.large_player_id, self.hand, self.unseen, self.trick, self.leader, tuple(self.voids)
+
+    def sample_hands(self, np_random: np.random.RandomState, max_attempts: int = 20) -> tuple:
+        """ Deal the unseen cards to the opponents, respecting hand sizes and known voids when possible. Unseen
+            cards left over are the buried cards.
+        """
+        opponents = [(self.player_id + 1) % 3, (self.player_id + 2) % 3]
+        unseen_cards = mask_cards(self.unseen)
+        for attempt in range(max_attempts + 1):
+            respect_voids = attempt < max_attempts
+            hands = [0, 0, 0]
+            hands[self.player_id] = self.hand
+            free = {opponent: self.hand_sizes[opponent] for opponent in opponents}
+            for card_id in np_random.permutation(unseen_cards):
+                suit = 1 << CARD_SUITS[card_id]
+                eligible = [
+                    opponent for opponent in opponents
+                    if free[opponent] > 0 and not (respect_voids and self.voids[opponent] & suit)
+                ]
+                if not eligible:
+                    continue  # buried
+                opponent = eligible[np_random.randint(len(eligible))]
+                hands[opponent] |= 1 << int(card_id)
+                free[opponent] -= 1
+            if all(count == 0 for count in free.values()):
+                return tuple(hands)
+        raise Exception(f'InformationSet: cannot deal {unseen_cards} to hand sizes {self.hand_sizes}')
+
+
+def _evaluate_samples(samples: list, position: tuple) -> dict:
+    """ Sum the large player points of every legal card over the sampled hands
+    """
+    trick, leader, large_player_id, use_solver = position
+    totals = {}
+    for hands in samples:
+        if use_solver:
+            values = _get_solver().solve_moves(hands, trick, leader, large_player_id)
+        else:
+            values = {
+                card_id: greedy_playout(hands, trick, leader, large_player_id, card_id)
+                for card_id in legal_cards(hands, trick, leader)
+            }
+        for card_id, value in values.items():
+            totals[card_id] = totals.get(card_id, 0) + value
+    return totals
+
+
+_solver: ZoleSolver or None = None
+
+
+def _get_solver() -> ZoleSolver:
+    # one solver per process so that the transposition table is reused across decisions
+    global _solver
+    if _solver is None:
+        _solver = ZoleSolver(max_table_size=1000000)
+    return _solver
+
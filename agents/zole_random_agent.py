@@ -0,0 +1,27 @@
+import numpy as np
+
+
+class ZoleRandomAgent(object):
+    """ Same as rlcard's RandomAgent, which can only be imported with the whole rlcard.agents package and torch.
+        Actions are drawn from the global NumPy random state like RandomAgent, so seeded games are unchanged.
+    """
+
+    def __init__(self, num_actions):
+        """ Initialize the random agent
+
+        Args:
+            num_actions (int): the size of the output action space
+        """
+        self.use_raw = False
+        self.num_actions = num_actions
+
+    @staticmethod
+    def step(state):
+        return np.random.choice(list(state['legal_actions'].keys()))
+
+    def eval_step(self, state):
+        """ Same as step, with uniform 'probs' over the raw legal actions
+        """
+        prob = 1 / len(state['legal_actions'])
+        info = {'probs': {raw_action: prob for raw_action in state['raw_legal_actions']}}
+        return self.step(state), info
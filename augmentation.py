@@ -0,0 +1,102 @@
+""" Symmetry augmentation of training transitions
+
+    A Zole deal is unchanged by permuting the plain suits (see games/zole/utils/canonical.py) and by rotating the
+    seats, since the bidding and play order only depend on the dealer. Every transform is a column permutation of
+    the DefaultZoleStateExtractor observation together with a permutation of the card action ids, so a batch is
+    transformed with a single gather and legal actions stay legal.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from envs.zole import DefaultZoleStateExtractor as Layout
+from games.zole.utils.canonical import ACTION_PERMUTATIONS, CARD_PERMUTATIONS, PLAIN_SUIT_PERMUTATIONS
+
+
+# transform index = suit permutation index * 3 + seat rotation, 0 is the identity
+NUM_TRANSFORMS = len(PLAIN_SUIT_PERMUTATIONS) * 3
+OBS_SIZE = Layout().get_state_shape_size()
+
+
+def _transform_columns(permutation_index: int, rotation: int) -> np.ndarray:
+    """ Return the source column of every column of a transformed observation
+    """
+    destinations = np.arange(OBS_SIZE)
+    for seat_offset in (Layout.hands_rep_offset, Layout.trick_rep_offset):
+        for seat in range(3):
+            for card_id in range(26):
+                column = seat_offset + seat * 26 + card_id
+                destinations[column] = seat_offset + (seat + rotation) % 3 * 26 + CARD_PERMUTATIONS[permutation_index, card_id]
+    for card_id in range(26):
+        destinations[Layout.hidden_cards_rep_offset + card_id] = Layout.hidden_cards_rep_offset + CARD_PERMUTATIONS[permutation_index, card_id]
+    for seat_offset in (Layout.dealer_rep_offset, Layout.large_player_rep_offset, Layout.current_player_rep_offset):
+        for seat in range(3):
+            destinations[seat_offset + seat] = seat_offset + (seat + rotation) % 3
+    sources = np.empty_like(destinations)
+    sources[destinations] = np.arange(OBS_SIZE)
+    return sources
+
+
+TRANSFORM_COLUMNS = np.stack([
+    _transform_columns(transform_index // 3, transform_index % 3) for transform_index in range(NUM_TRANSFORMS)
+])
+TRANSFORM_ACTIONS = ACTION_PERMUTATIONS[np.arange(NUM_TRANSFORMS) // 3]
+
+
+def transform_observations(obs: np.ndarray, transform_indices: np.ndarray) -> np.ndarray:
+    """ Apply a (N,) batch of transforms to a (N, 192) batch of observations
+    """
+    return obs[np.arange(obs.shape[0])[:, None], TRANSFORM_COLUMNS[transform_indices]]
+
+
+def transform_actions(action_ids: np.ndarray, transform_indices: np.ndarray) -> np.ndarray:
+    return TRANSFORM_ACTIONS[transform_indices, action_ids]
+
+
+def sample_transforms(np_random: np.random.RandomState, num_transitions: int, num_augmentations: int) -> np.ndarray:
+    """ Return (num_transitions, num_augmentations) distinct non-identity transform indices per transition
+    """
+    if not 0 <= num_augmentations < NUM_TRANSFORMS:
+        raise Exception(f'augmentation: num_augmentations must be in [0, {NUM_TRANSFORMS - 1}], got {num_augmentations}')
+    order = np.argsort(np_random.rand(num_transitions, NUM_TRANSFORMS - 1), axis=1)
+    return order[:, :num_augmentations] + 1
+
+
+def augment_transitions(transitions: list, np_random: np.random.RandomState, num_augmentations: int) -> list:
+    """ Return num_augmentations transformed copies of every (state, action, reward, next_state, done) transition
+
+        The copies hold the obs and legal actions of the states, which is what the agents learn from.
+    """
+    if not transitions or num_augmentations == 0:
+        return []
+    transform_indices = sample_transforms(np_random, len(transitions), num_augmentations).reshape(-1)
+    sources = np.repeat(np.arange(len(transitions)), num_augmentations)
+
+    obs = np.stack([transition[0]['obs'] for transition in transitions])[sources]
+    next_obs = np.stack([transition[3]['obs'] for transition in transitions])[sources]
+    action_ids = np.array([transition[1] for transition in transitions])[sources]
+    obs = transform_observations(obs, transform_indices)
+    next_obs = transform_observations(next_obs, transform_indices)
+    action_ids = transform_actions(action_ids, transform_indices)
+
+    augmented = []
+    for index, (source, transform_index) in enumerate(zip(sources, transform_indices)):
+        state, _, reward, next_state, done = transitions[source]
+        augmented.append((
+            _transform_state(state, obs[index], TRANSFORM_ACTIONS[transform_index]),
+            int(action_ids[index]),
+            reward,
+            _transform_state(next_state, next_obs[index], TRANSFORM_ACTIONS[transform_index]),
+            done,
+        ))
+    return augmented
+
+
+def _transform_state(state: dict, obs: np.ndarray, action_map: np.ndarray) -> dict:
+    raw_legal_actions = [int(action_map[action_id]) for action_id in state['legal_actions']]
+    return {
+        'obs': obs,
+        'legal_actions': OrderedDict((action_id, None) for action_id in raw_legal_actions),
+        'raw_legal_actions': raw_legal_actions,
+        'raw_obs': obs,
+    }
@@ -0,0 +1,239 @@
+""" Counterfactual regret minimization for the take/pass decisions of Zole
+
+    The bidding is a small subgame once the play of a taken table is valued: the seats decide in order, a seat is
+    only asked after all earlier seats passed, so an information set is the abstracted 8-card hand and the bidding
+    seat. Hands are abstracted to buckets of suit-symmetric features (trumps, queens and jacks, plain aces and plain
+    voids), which are the same for every suit permutation of the canonical hand.
+
+    Chance is a fixed sample of deals, each with the payoff of every seat taking the table: buried and played out
+    with the rules of ZoleHeuristicAgent, which ZoleCFRBiddingAgent plays with, or with the greedy playout of
+    ZoleSolver as in bidding_table.py. CFR+ then runs full-width over all deals at once, regrets and strategies are
+    (3, NUM_BUCKETS) NumPy tables updated with bincount. The bury choice is left to ZoleHeuristicAgent and its
+    BiddingTable.
+"""
+from agents.zole_heuristic_agent import choose_bury_card, choose_trick_card
+from bidding_table import greedy_take_payoff
+from envs.zole import DefaultZoleStateExtractor as Layout, points_to_score
+from games.zole.round import NUM_TRICKS
+from games.zole.solver import CARD_POINTS, legal_cards, to_mask, trick_winner_index
+
+import os
+
+import numpy as np
+
+
+NUM_BUCKETS = 9 * 9 * 4 * 4
+_queen_jack_ids = range(18, 26)
+_plain_ace_ids = (3, 7, 11)
+_card_bits = np.arange(26)
+
+
+def hand_bucket(hand) -> int:
+    """ Bucket of an 8-card hand from its trumps, queens and jacks, plain aces and void plain suits
+    """
+    trumps = queens_jacks = aces = 0
+    suits = [False, False, False]
+    for card_id in hand:
+        if card_id >= 12:
+            trumps += 1
+            queens_jacks += card_id in _queen_jack_ids
+        else:
+            suits[card_id // 4] = True
+            aces += card_id in _plain_ace_ids
+    voids = 3 - sum(suits)
+    return ((trumps * 9 + queens_jacks) * 4 + aces) * 4 + voids
+
+
+def heuristic_take_payoff(hands, table, taker: int) -> float:
+    """ Payoff of taker when it takes the table and every seat buries and plays tricks with ZoleHeuristicAgent
+    """
+    taker_hand = hands[taker] + table
+    buried = []
+    for _ in range(2):
+        card_id = choose_bury_card(taker_hand, taker_hand)
+        taker_hand.remove(card_id)
+        buried.append(card_id)
+    masks = [to_mask(taker_hand if player == taker else hands[player]) for player in range(3)]
+    buried_mask = to_mask(buried)
+
+    # the parts of the observation choose_trick_card reads
+    obs = np.zeros(Layout.is_bidding_rep_offset + 1, dtype=np.int8)
+    obs[Layout.large_player_rep_offset + taker] = 1
+    trick_rep = obs[Layout.trick_rep_offset:Layout.hidden_cards_rep_offset].reshape(3, 26)
+    hidden_rep = obs[Layout.hidden_cards_rep_offset:Layout.dealer_rep_offset]
+
+    points = CARD_POINTS[buried[0]] + CARD_POINTS[buried[1]]
+    tricks = 0
+    trick, leader = (), 0
+    while masks[leader] or trick:
+        player = (leader + len(trick)) % 3
+        trick_rep[:] = 0
+        for index, card_id in enumerate(trick):
+            trick_rep[(leader + index) % 3, card_id] = 1
+        hidden_mask = masks[(player + 1) % 3] | masks[(player + 2) % 3] | (buried_mask if player != taker else 0)
+        hidden_rep[:] = (hidden_mask >> _card_bits) & 1
+        card_id = choose_trick_card(legal_cards(tuple(masks), trick, leader), obs, player)
+        masks[player] ^= 1 << card_id
+        trick += (card_id,)
+        if len(trick) == 3:
+            winner = (leader + trick_winner_index(trick)) % 3
+            if winner == taker:
+                points += CARD_POINTS[trick[0]] + CARD_POINTS[trick[1]] + CARD_POINTS[trick[2]]
+                tricks += 1
+            trick, leader = (), winner
+    return points_to_score(points, 120 - points, 0, large_tricks=tricks, small_tricks=NUM_TRICKS - tricks)[0]
+
+
+def sample_deal_values(np_random: np.random.RandomState, num_deals: int, playout: str = 'heuristic') -> tuple:
+    """ Deal num_deals random hands to the bidding seats, player ids equal bidding seats as in bidding_table.py.
+        playout is 'heuristic' (heuristic_take_payoff) or 'greedy' (bidding_table.greedy_take_payoff).
+
+    Returns:
+        buckets (np.ndarray): (num_deals, 3) hand bucket of every seat
+        take_values (np.ndarray): (num_deals, 3) payoff of every seat when it takes the table
+    """
+    buckets = np.zeros((num_deals, 3), dtype=np.int16)
+    take_values = np.zeros((num_deals, 3), dtype=np.float32)
+    for deal in range(num_deals):
+        cards = np_random.permutation(26).tolist()
+        hands = [cards[0:8], cards[8:16], cards[16:24]]
+        table = cards[24:]
+        for seat in range(3):
+            buckets[deal, seat] = hand_bucket(hands[seat])
+            if playout == 'heuristic':
+                take_values[deal, seat] = heuristic_take_payoff(hands, table, seat)
+            else:
+                take_values[deal, seat] = greedy_take_payoff(hands, table, seat)[seat]
+    return buckets, take_values
+
+
+class BiddingCFR(object):
+    deals_file = 'deals.npz'  # cached buckets and take values of the sampled deals
+    strategy_file = 'strategy.npz'  # regrets, average strategy sums and the average take probability
+
+    def __init__(self, buckets: np.ndarray, take_values: np.ndarray):
+        """ Initialize the CFR+ trainer over sampled deals
+
+        Args:
+            buckets (np.ndarray): (num_deals, 3) hand bucket of every seat
+            take_values (np.ndarray): (num_deals, 3) payoff of every seat when it takes the table
+        """
+        self.buckets = buckets.astype(np.int64)
+        self.take_values = take_values.astype(np.float64)
+        self.regrets = np.zeros((3, 2, NUM_BUCKETS))  # pass, take
+        self.take_sum = np.zeros((3, NUM_BUCKETS))
+        self.weight_sum = 0.0
+        self.iterations = 0
+        # deals per bucket and seat, buckets without deals have no strategy
+        self.bucket_counts = np.stack([np.bincount(self.buckets[:, seat], minlength=NUM_BUCKETS) for seat in range(3)])
+
+    def current_strategy(self) -> np.ndarray:
+        """ Take probability of every seat and bucket by regret matching, 0.5 without positive regret
+        """
+        positive = np.maximum(self.regrets, 0)
+        total = positive.sum(axis=1)
+        return np.divide(positive[:, 1], total, out=np.full_like(total, 0.5), where=total > 0)
+
+    def average_strategy(self) -> np.ndarray:
+        """ Average take probability of every seat and bucket, nan for buckets without deals
+        """
+        if self.weight_sum == 0:
+            strategy = np.full((3, NUM_BUCKETS), 0.5)
+        else:
+            strategy = self.take_sum / self.weight_sum
+        return np.where(self.bucket_counts > 0, strategy, np.nan)
+
+    def seat_values(self, strategy: np.ndarray) -> tuple:
+        """ Expected payoff of every seat on every deal when the seats bid with the take probabilities of strategy
+
+        Returns:
+            take_probs (np.ndarray): (num_deals, 3) take probability of every seat at its decision
+            pass_values (np.ndarray): (num_deals, 3) payoff of every seat after it passes
+            values (np.ndarray): (num_deals, 3) payoff of every seat from the start of the bidding
+        """
+        take_probs = np.stack([strategy[seat, self.buckets[:, seat]] for seat in range(3)], axis=1)
+        # continuation[:, seat, k]: payoff of seat once the bidding reaches seat k, nothing happens after 3 passes
+        num_deals = len(self.buckets)
+        continuation = np.zeros((num_deals, 3, 4))
+        for k in range(2, -1, -1):
+            for seat in range(3):
+                payoff = self.take_values[:, k] if seat == k else -self.take_values[:, k] / 2
+                continuation[:, seat, k] = take_probs[:, k] * payoff + (1 - take_probs[:, k]) * continuation[:, seat, k + 1]
+        pass_values = np.stack([continuation[:, seat, seat + 1] for seat in range(3)], axis=1)
+        values = continuation[:, :, 0]
+        return take_probs, pass_values, values
+
+    def iterate(self, num_iterations: int):
+        """ Run CFR+ iterations, simultaneous updates of all seats and linear averaging
+        """
+        num_deals = len(self.buckets)
+        for _ in range(num_iterations):
+            self.iterations += 1
+            strategy = self.current_strategy()
+            take_probs, pass_values, _ = self.seat_values(strategy)
+            # the opponents' reach of a seat is the probability that all earlier seats passed
+            reach = np.cumprod(np.hstack([np.ones((num_deals, 1)), 1 - take_probs[:, :2]]), axis=1)
+            node_values = take_probs * self.take_values + (1 - take_probs) * pass_values
+            for seat in range(3):
+                seat_buckets = self.buckets[:, seat]
+                for action, action_values in enumerate((pass_values[:, seat], self.take_values[:, seat])):
+                    regret = np.bincount(seat_buckets, weights=reach[:, seat] * (action_values - node_values[:, seat]), minlength=NUM_BUCKETS)
+                    self.regrets[seat, action] = np.maximum(self.regrets[seat, action] + regret / num_deals, 0)
+            self.take_sum += self.iterations * strategy
+            self.weight_sum += self.iterations
+
+    def save(self, path: str):
+        """ Save the trainer state and the average strategy to path/strategy.npz
+        """
+        os.makedirs(path, exist_ok=True)
+        file = os.path.join(path, self.strategy_file)
+        np.savez(
+            file + '.tmp.npz',
+            regrets=self.regrets,
+            take_sum=self.take_sum,
+            weight_sum=self.weight_sum,
+            iterations=self.iterations,
+            average_take=self.average_strategy().astype(np.float32),
+        )
+        os.replace(file + '.tmp.npz', file)
+
+    def restore(self, path: str) -> bool:
+        """ Continue from path/strategy.npz when it exists
+        """
+        file = os.path.join(path, self.strategy_file)
+        if not os.path.exists(file):
+            return False
+        with np.load(file) as state:
+            self.regrets = state['regrets']
+            self.take_sum = state['take_sum']
+            self.weight_sum = float(state['weight_sum'])
+            self.iterations = int(state['iterations'])
+        return True
+
+    @staticmethod
+    def load_deals(path: str, playout: str) -> tuple:
+        """ Return the cached (buckets, take_values) of path/deals.npz, empty arrays when there is none
+        """
+        file = os.path.join(path, BiddingCFR.deals_file)
+        if not os.path.exists(file):
+            return np.zeros((0, 3), dtype=np.int16), np.zeros((0, 3), dtype=np.float32)
+        with np.load(file) as deals:
+            if str(deals['playout']) != playout:
+                raise Exception(f'BiddingCFR: deals in {path} are valued with the {deals["playout"]} playout, not {playout}')
+            return deals['buckets'], deals['take_values']
+
+    @staticmethod
+    def save_deals(path: str, buckets: np.ndarray, take_values: np.ndarray, playout: str):
+        os.makedirs(path, exist_ok=True)
+        file = os.path.join(path, BiddingCFR.deals_file)
+        np.savez(file + '.tmp.npz', buckets=buckets, take_values=take_values, playout=playout)
+        os.replace(file + '.tmp.npz', file)
+
+
+def load_strategy(path: str) -> np.ndarray:
+    """ Return the (3, NUM_BUCKETS) average take probability of path, a strategy.npz file or its directory
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, BiddingCFR.strategy_file)
+    with np.load(path) as state:
+        return state['average_take']
@@ -0,0 +1,252 @@
+""" Precomputed bidding decisions for Zole
+
+    The table holds, for every canonical 8-card hand and bidding seat, the estimated payoff of passing and of
+    taking the table, and for every canonical 10-card hand the best pair of cards to bury. The arrays have one row
+    per canonical hand: the sorted combinatorial ranks of all canonical hands are enumerated once from their suit
+    shapes, and a hand's row is the position of its rank found by binary search. A query is a search and one read
+    of memory-mapped arrays, the table never has to be loaded as a whole.
+
+    Values are estimated by simulation over random deals of the unseen cards: the other seats bid with the
+    ZoleHeuristicAgent hand value threshold and all tricks are played with the greedy playout of ZoleSolver.
+"""
+from agents.zole_heuristic_agent import ZoleHeuristicAgent, choose_bury_card
+from envs.zole import points_to_score
+from games.zole.solver import CARD_POINTS, greedy_playout_tricks, to_mask
+from games.zole.utils.canonical import canonical_hand, invert_permutation, permute_card
+
+import os
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+
+TAKE_HAND_SIZE = 8
+BURY_HAND_SIZE = 10
+_binomial = [[comb(n, k) for k in range(BURY_HAND_SIZE + 1)] for n in range(27)]
+
+
+def hand_rank(sorted_card_ids) -> int:
+    """ Combinatorial rank of a sorted hand among all hands of the same size
+    """
+    return sum(_binomial[card_id][index + 1] for index, card_id in enumerate(sorted_card_ids))
+
+
+@lru_cache(maxsize=None)
+def canonical_ranks(hand_size: int) -> np.ndarray:
+    """ Sorted combinatorial ranks of all canonical hands of hand_size cards, the plain suits of a canonical hand
+        have non-increasing rank masks (see games/zole/utils/canonical.py)
+    """
+    binomial = np.array(_binomial, dtype=np.int64)
+    plain_ranks = {}
+    for mask_0 in range(16):
+        for mask_1 in range(mask_0 + 1):
+            for mask_2 in range(mask_1 + 1):
+                plain_cards = [suit * 4 + bit for suit, mask in enumerate((mask_0, mask_1, mask_2)) for bit in range(4) if mask >> bit & 1]
+                if len(plain_cards) <= hand_size:
+                    plain_ranks.setdefault(len(plain_cards), []).append(hand_rank(plain_cards))
+    ranks = []
+    for num_plain, ranks_of_plain in plain_ranks.items():
+        num_trumps = hand_size - num_plain
+        if num_trumps > 14:
+            continue
+        # trumps follow the plain cards in a sorted hand, so their terms start at position num_plain
+        trump_hands = list(combinations(range(12, 26), num_trumps))
+        trumps = np.array(trump_hands, dtype=np.int64).reshape(len(trump_hands), num_trumps)
+        trump_ranks = binomial[trumps, np.arange(num_plain + 1, hand_size + 1)].sum(axis=1)
+        ranks.append((np.array(ranks_of_plain, dtype=np.int64)[:, None] + trump_ranks).ravel())
+    return np.sort(np.concatenate(ranks))
+
+
+def num_canonical_hands(hand_size: int) -> int:
+    return len(canonical_ranks(hand_size))
+
+
+def canonical_hand_index(canonical_cards) -> int:
+    """ Row of a sorted canonical hand in the table arrays
+    """
+    ranks = canonical_ranks(len(canonical_cards))
+    rank = hand_rank(canonical_cards)
+    index = int(np.searchsorted(ranks, rank))
+    if index == len(ranks) or ranks[index] != rank:
+        raise Exception(f'BiddingTable: not a canonical hand {list(canonical_cards)}')
+    return index
+
+
+def bidding_seat(player_id: int, dealer_id: int) -> int:
+    """ Position in the bidding order, 0 is the first player after the dealer
+    """
+    return (player_id - dealer_id - 1) % 3
+
+
+class BiddingTable(object):
+    # rows are canonical 8-card hands, or 10-card hands for bury_pairs, see canonical_hand_index
+    values_file = 'values.npy'  # (hands, 3, 2) float16, pass and take payoff per seat, nan when unknown
+    counts_file = 'counts.npy'  # (hands, 3) uint16, number of simulated deals behind the values
+    bury_pairs_file = 'bury_pairs.npy'  # (hands,) int16, first * 26 + second canonical card id, -1 when unknown
+
+    def __init__(self, path: str, mode: str = 'r'):
+        """ Open a table directory
+
+        Args:
+            path (str): The table directory
+            mode (str): 'r' to query, 'r+' to update
+        """
+        self.path = path
+        self.values = np.load(os.path.join(path, self.values_file), mmap_mode=mode)
+        self.counts = np.load(os.path.join(path, self.counts_file), mmap_mode=mode)
+        self.bury_pairs = np.load(os.path.join(path, self.bury_pairs_file), mmap_mode=mode)
+        if len(self.values) != num_canonical_hands(TAKE_HAND_SIZE) or len(self.bury_pairs) != num_canonical_hands(BURY_HAND_SIZE):
+            raise Exception(f'BiddingTable: {path} is not indexed by canonical hands, rebuild it with zole_bidding_table.py')
+
+    @staticmethod
+    def create(path: str) -> 'BiddingTable':
+        """ Create an empty table directory, or open it for update when it already exists
+        """
+        if not os.path.exists(os.path.join(path, BiddingTable.values_file)):
+            os.makedirs(path, exist_ok=True)
+            open_memmap = np.lib.format.open_memmap
+            num_take_hands = num_canonical_hands(TAKE_HAND_SIZE)
+            values = open_memmap(os.path.join(path, BiddingTable.values_file), 'w+', np.float16, (num_take_hands, 3, 2))
+            values[:] = np.nan
+            counts = open_memmap(os.path.join(path, BiddingTable.counts_file), 'w+', np.uint16, (num_take_hands, 3))
+            counts[:] = 0
+            bury_pairs = open_memmap(os.path.join(path, BiddingTable.bury_pairs_file), 'w+', np.int16, (num_canonical_hands(BURY_HAND_SIZE),))
+            bury_pairs[:] = -1
+            for array in (values, counts, bury_pairs):
+                array.flush()
+        return BiddingTable(path, mode='r+')
+
+    def get_values(self, hand, seat: int) -> tuple or None:
+        """ Return the (pass, take) payoff estimates of an 8-card hand at a bidding seat, None when unknown
+        """
+        canonical_cards, _ = canonical_hand(hand)
+        pass_value, take_value = self.values[canonical_hand_index(canonical_cards), seat]
+        if np.isnan(take_value):
+            return None
+        return float(pass_value), float(take_value)
+
+    def should_take(self, hand, seat: int) -> bool or None:
+        values = self.get_values(hand, seat)
+        if values is None:
+            return None
+        return values[1] > values[0]
+
+    def get_bury_pair(self, hand) -> tuple or None:
+        """ Return the two card ids a 10-card hand should bury, None when unknown
+        """
+        canonical_cards, permutation = canonical_hand(hand)
+        code = int(self.bury_pairs[canonical_hand_index(canonical_cards)])
+        if code < 0:
+            return None
+        inverse = invert_permutation(permutation)
+        return permute_card(code // 26, inverse), permute_card(code % 26, inverse)
+
+    def add_values(self, canonical_cards, seat: int, pass_value: float, take_value: float, count: int):
+        """ Merge new estimates of a canonical hand into the running means
+        """
+        index = canonical_hand_index(canonical_cards)
+        previous_count = int(self.counts[index, seat])
+        if previous_count:
+            previous = self.values[index, seat].astype(np.float64)
+            merged = (previous * previous_count + np.array([pass_value, take_value]) * count) / (previous_count + count)
+            pass_value, take_value = merged
+        self.values[index, seat] = (pass_value, take_value)
+        self.counts[index, seat] = min(previous_count + count, np.iinfo(np.uint16).max)
+
+    def set_bury_pair(self, canonical_cards, pair: tuple):
+        self.bury_pairs[canonical_hand_index(canonical_cards)] = pair[0] * 26 + pair[1]
+
+    def flush(self):
+        for array in (self.values, self.counts, self.bury_pairs):
+            array.flush()
+
+
+def simulate_bidding(hand, seat: int, np_random: np.random.RandomState, num_samples: int, take_threshold: float = 6.0,
+                     max_resamples: int = 20) -> tuple:
+    """ Estimate the payoff of passing and of taking with an 8-card hand at a bidding seat
+
+        Deals in which an earlier seat would have taken under the heuristic threshold are resampled, since the
+        decision is only reached after the earlier seats passed. A sample is dropped when none of its
+        max_resamples deals reaches the seat.
+
+    Returns:
+        (tuple): mean payoff of passing, mean payoff of taking, nan when no sample reached the seat, and the number
+            of samples behind the means
+    """
+    hand = list(hand)
+    unseen = [card_id for card_id in range(26) if card_id not in hand]
+    pass_total = 0.0
+    take_total = 0.0
+    count = 0
+    for _ in range(num_samples):
+        for _ in range(max_resamples):
+            hands, table = _deal(hand, seat, unseen, np_random)
+            if not any(_would_take(hands[earlier], take_threshold) for earlier in range(seat)):
+                break
+        else:
+            continue
+        count += 1
+        take_total += greedy_take_payoff(hands, table, seat)[seat]
+        for later in range(seat + 1, 3):
+            if _would_take(hands[later], take_threshold):
+                pass_total += greedy_take_payoff(hands, table, later)[seat]
+                break
+    if count == 0:
+        return np.nan, np.nan, 0
+    return pass_total / count, take_total / count, count
+
+
+def best_bury_pair(hand, np_random: np.random.RandomState, num_samples: int) -> tuple:
+    """ Estimate the pair of cards of a 10-card hand whose burial gives the taker the best mean payoff
+    """
+    hand = sorted(hand)
+    unseen = [card_id for card_id in range(26) if card_id not in hand]
+    pairs = list(combinations(hand, 2))
+    totals = np.zeros(len(pairs))
+    for _ in range(num_samples):
+        seat = np_random.randint(3)
+        cards = np_random.permutation(unseen).tolist()
+        hands = [0, 0, 0]
+        hands[(seat + 1) % 3] = to_mask(cards[:8])
+        hands[(seat + 2) % 3] = to_mask(cards[8:])
+        for index, pair in enumerate(pairs):
+            hands[seat] = to_mask(card_id for card_id in hand if card_id not in pair)
+            points, large_tricks, small_tricks = greedy_playout_tricks(tuple(hands), (), 0, seat)
+            points += CARD_POINTS[pair[0]] + CARD_POINTS[pair[1]]
+            large_score, _ = points_to_score(points, 120 - points, 0, large_tricks=large_tricks, small_tricks=small_tricks)
+            totals[index] += large_score + points / 1000
+    return pairs[int(np.argmax(totals))]
+
+
+def _deal(hand, seat: int, unseen, np_random: np.random.RandomState) -> tuple:
+    # the dealer sits at seat 2, so player ids equal bidding seats and player 0 leads the first trick
+    cards = np_random.permutation(unseen).tolist()
+    hands = [None, None, None]
+    hands[seat] = hand
+    others = [other for other in range(3) if other != seat]
+    hands[others[0]] = cards[:8]
+    hands[others[1]] = cards[8:16]
+    return hands, cards[16:]
+
+
+def _would_take(hand, take_threshold: float) -> bool:
+    return ZoleHeuristicAgent.hand_value(hand) >= take_threshold
+
+
+def greedy_take_payoff(hands, table, taker: int) -> list:
+    """ Payoffs of all seats when taker picks up the table, buries with the heuristic and tricks are played greedily
+    """
+    taker_hand = hands[taker] + table
+    buried_points = 0
+    for _ in range(2):
+        card_id = choose_bury_card(taker_hand, taker_hand)
+        taker_hand.remove(card_id)
+        buried_points += CARD_POINTS[card_id]
+    masks = tuple(to_mask(taker_hand if player == taker else hands[player]) for player in range(3))
+    points, large_tricks, small_tricks = greedy_playout_tricks(masks, (), 0, taker)
+    points += buried_points
+    large_score, small_score = points_to_score(points, 120 - points, 0, large_tricks=large_tricks, small_tricks=small_tricks)
+    return [large_score if player == taker else small_score for player in range(3)]
+
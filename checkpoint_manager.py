@@ -0,0 +1,207 @@
+""" Checkpoints of DQN/NFSP training with a retention policy and background saving
+
+    Only network and optimizer state dicts and the step counters are saved, replay and reservoir buffers are not.
+    The state is copied on the training thread and serialized on a background thread, files are written atomically
+    and old checkpoints are removed keeping the last `keep_last` and every `keep_every`-th checkpoint.
+"""
+import os
+import queue
+import re
+import threading
+
+import torch
+from rlcard.agents import DQNAgent, NFSPAgent
+
+
+_checkpoint_file_pattern = re.compile(r'checkpoint_(\d+)\.pt$')
+
+
+def agent_state(agent) -> dict:
+    """ Return the learnable state of a DQN or NFSP agent
+    """
+    if isinstance(agent, DQNAgent):
+        return {
+            'qnet': agent.q_estimator.qnet.state_dict(),
+            'optimizer': agent.q_estimator.optimizer.state_dict(),
+            'target_qnet': agent.target_estimator.qnet.state_dict(),
+            'total_t': agent.total_t,
+            'train_t': agent.train_t,
+        }
+    if isinstance(agent, NFSPAgent):
+        return {
+            'policy_network': agent.policy_network.state_dict(),
+            'policy_network_optimizer': agent.policy_network_optimizer.state_dict(),
+            'rl_agent': agent_state(agent._rl_agent),
+            'total_t': agent.total_t,
+            'train_t': agent.train_t,
+        }
+    raise Exception(f'CheckpointManager: unsupported agent type {type(agent).__name__}')
+
+
+def load_agent_state(agent, state: dict):
+    """ Restore the learnable state of a DQN or NFSP agent. The replay memory starts empty, a DQN agent records the
+        step it resumed at in resumed_t and `feed` refills its memory before training resumes.
+    """
+    if isinstance(agent, DQNAgent):
+        agent.q_estimator.qnet.load_state_dict(state['qnet'])
+        agent.q_estimator.optimizer.load_state_dict(state['optimizer'])
+        agent.target_estimator.qnet.load_state_dict(state['target_qnet'])
+        agent.resumed_t = state['total_t']
+    elif isinstance(agent, NFSPAgent):
+        agent.policy_network.load_state_dict(state['policy_network'])
+        agent.policy_network_optimizer.load_state_dict(state['policy_network_optimizer'])
+        load_agent_state(agent._rl_agent, state['rl_agent'])
+    else:
+        raise Exception(f'CheckpointManager: unsupported agent type {type(agent).__name__}')
+    agent.total_t = state['total_t']
+    agent.train_t = state['train_t']
+
+
+def feed(agent, ts):
+    """ Feed a transition to a DQN or NFSP agent. Until the replay memory of a restored DQN agent, or of the RL agent
+        of a restored NFSP agent, holds replay_memory_init_size transitions again, transitions are only stored there,
+        without counting steps or training.
+    """
+    rl_agent = agent._rl_agent if isinstance(agent, NFSPAgent) else agent
+    resumed = getattr(rl_agent, 'resumed_t', None) is not None
+    if resumed and len(rl_agent.memory.memory) < rl_agent.replay_memory_init_size:
+        state, action, reward, next_state, done = tuple(ts)
+        rl_agent.feed_memory(state['obs'], action, reward, next_state['obs'], list(next_state['legal_actions']), done)
+        return
+    agent.feed(ts)
+
+
+def find_checkpoint(path: str) -> str:
+    """ Return the checkpoint file at path, or the latest checkpoint when path is a checkpoint directory
+    """
+    if os.path.isdir(path):
+        indices = _checkpoint_indices(path)
+        if not indices:
+            raise Exception(f'CheckpointManager: no checkpoint in {path}')
+        return os.path.join(path, _checkpoint_file(indices[-1]))
+    return path
+
+
+def _checkpoint_file(index: int) -> str:
+    return f'checkpoint_{index:06d}.pt'
+
+
+def _checkpoint_indices(directory: str) -> list[int]:
+    indices = []
+    for file in os.listdir(directory):
+        match = _checkpoint_file_pattern.match(file)
+        if match:
+            indices.append(int(match.group(1)))
+    return sorted(indices)
+
+
+def _detached_copy(value):
+    # training keeps updating the tensors while the background thread serializes the copy
+    if isinstance(value, torch.Tensor):
+        return value.detach().to('cpu', copy=True)
+    if isinstance(value, dict):
+        return {key: _detached_copy(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_detached_copy(item) for item in value)
+    return value
+
+
+class CheckpointManager(object):
+
+    def __init__(self, directory: str, keep_last: int = 3, keep_every: int = 10, background: bool = True):
+        """ Initialize the checkpoint manager
+
+        Args:
+            directory (str): The directory of the checkpoint files
+            keep_last (int): The number of most recent checkpoints kept
+            keep_every (int): Every checkpoint whose index is a multiple of keep_every is kept, 0 keeps none
+            background (bool): Serialize on a background thread
+        """
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        os.makedirs(directory, exist_ok=True)
+        indices = _checkpoint_indices(directory)
+        self.next_index = indices[-1] + 1 if indices else 0
+
+        self._queue: queue.Queue or None = None
+        self._thread: threading.Thread or None = None
+        self._error: BaseException or None = None  # of the background thread, raised by the next save or close
+        if background:
+            self._queue = queue.Queue(maxsize=1)
+            self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+            self._thread.start()
+
+    def checkpoint_path(self, index: int) -> str:
+        return os.path.join(self.directory, _checkpoint_file(index))
+
+    def save(self, agents: list, episode: int, **extra):
+        """ Copy the state of the agents and write it, on the background thread when enabled. Waits while the
+            previous checkpoint is still being written, and raises the error of a failed background write.
+        """
+        self._raise_error()
+        checkpoint = _detached_copy({
+            'episode': episode,
+            'agents': [agent_state(agent) for agent in agents],
+            **extra,
+        })
+        index = self.next_index
+        self.next_index += 1
+        if self._queue is None:
+            self._write(index, checkpoint)
+        else:
+            self._queue.put((index, checkpoint))
+
+    def wait(self):
+        """ Block until the pending checkpoint is written
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._queue is not None:
+            self.wait()
+            self._queue.put(None)
+            self._thread.join()
+            self._queue = None
+        self._raise_error()
+
+    @staticmethod
+    def load(path: str) -> dict:
+        return torch.load(path, map_location='cpu')
+
+    @staticmethod
+    def restore(agents: list, checkpoint: dict):
+        for agent, state in zip(agents, checkpoint['agents']):
+            load_agent_state(agent, state)
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise Exception(f'CheckpointManager: writing a checkpoint in {self.directory} failed') from error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _write(self, index: int, checkpoint: dict):
+        path = self.checkpoint_path(index)
+        torch.save(checkpoint, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self._apply_retention()
+
+    def _apply_retention(self):
+        indices = _checkpoint_indices(self.directory)
+        kept = set(indices[-self.keep_last:]) if self.keep_last > 0 else set()
+        for index in indices:
+            if index in kept or (self.keep_every > 0 and index % self.keep_every == 0):
+                continue
+            os.remove(self.checkpoint_path(index))
@@ -1,12 +1,27 @@
-import torch
-
-from rlcard.agents.dmc_agent.model import DMCAgent
-from rlcard.agents.random_agent import RandomAgent
 from agents.zole_human_agent import HumanAgent
+from agents.zole_cfr_agent import ZoleCFRBiddingAgent
+from agents.zole_heuristic_agent import ZoleHeuristicAgent
+from agents.zole_numpy_agent import ZoleNumpyAgent
+from agents.zole_pimc_agent import ZolePIMCAgent
+from agents.zole_random_agent import ZoleRandomAgent
+from bidding_cfr import load_strategy
+from bidding_table import BiddingTable
 
 
-def get_dmc_agent(env, index=0, xpid='dmc') -> DMCAgent:
-    checkpoint_states = torch.load('experiments/dmc_result/' + xpid + '/model.tar', map_location='cpu')
+# torch and rlcard.agents are imported where needed, so that NumPy agents start without them
+
+
+def get_dmc_agent(env, index=0, xpid='dmc') -> 'DMCAgent':
+    return get_dmc_checkpoint_agent(env, 'experiments/dmc_result/' + xpid + '/model.tar', index)
+
+
+def get_dmc_checkpoint_agent(env, path: str, index: int = 0) -> 'DMCAgent':
+    """ Load the torch agent at player position index of a DMC trainer checkpoint (model.tar)
+    """
+    import torch
+    from rlcard.agents.dmc_agent.model import DMCAgent
+
+    checkpoint_states = torch.load(path, map_location='cpu')
 
     state_dict = checkpoint_states['model_state_dict'][index]
 
@@ -21,13 +36,65 @@ def get_dmc_agent(env, index=0, xpid='dmc') -> DMCAgent:
     return agent
 
 
-def get_path_agent(path: str):
-    return torch.load(path)
+def get_batched_dmc_agent(env, index=0, xpid='dmc') -> 'ZoleDMCAgent':
+    """ Load an agent trained with dmc_training.py --batched_actions
+    """
+    import torch
+    from agents.zole_dmc_agent import ZoleDMCAgent
+
+    checkpoint_states = torch.load('experiments/dmc_result/' + xpid + '/model.tar', map_location='cpu')
+
+    agent = ZoleDMCAgent(
+        state_shape=env.state_shape[index],
+        action_shape=[env.num_actions],
+        device='cpu'
+    )
+
+    agent.load_state_dict(checkpoint_states['model_state_dict'][index])
+
+    return agent
+
+
+def get_path_agent(path: str, index: int = 0):
+    """ Load an exported .npz artifact as a ZoleNumpyAgent, or a pickled agent with torch. Checkpoints of
+        rl_training.py (.pt) and DMC (model.tar) hold state dicts, they are exported to a ZoleNumpyAgent of the agent
+        at player position index.
+    """
+    if path.endswith('.npz'):
+        return ZoleNumpyAgent.from_npz(path)
+    if path.endswith(('.pt', '.tar')):
+        from zole_export import export_path
+        return export_path(path, index)
+
+    import torch
+    return torch.load(path, weights_only=False)
 
 
-def get_random_agent(env) -> RandomAgent:
-    return RandomAgent(num_actions=env.num_actions)
+def get_random_agent(env) -> ZoleRandomAgent:
+    return ZoleRandomAgent(num_actions=env.num_actions)
 
 
 def get_human_agent(env) -> HumanAgent:
     return HumanAgent(num_actions=env.num_actions)
+
+
+def get_heuristic_agent(env, take_threshold: float = 6.0, bidding_table_path: str or None = None) -> ZoleHeuristicAgent:
+    bidding_table = BiddingTable(bidding_table_path) if bidding_table_path else None
+    return ZoleHeuristicAgent(num_actions=env.num_actions, take_threshold=take_threshold, bidding_table=bidding_table)
+
+
+def get_cfr_bidding_agent(env, strategy_path: str = 'experiments/bidding_cfr', bidding_table_path: str or None = None) -> ZoleCFRBiddingAgent:
+    bidding_table = BiddingTable(bidding_table_path) if bidding_table_path else None
+    return ZoleCFRBiddingAgent(num_actions=env.num_actions, strategy=load_strategy(strategy_path), bidding_table=bidding_table)
+
+
+def get_pimc_agent(env, num_samples: int = 20, num_workers: int = 1) -> ZolePIMCAgent:
+    return ZolePIMCAgent(num_actions=env.num_actions, num_samples=num_samples, num_workers=num_workers)
+
+
+def close_agents(agents):
+    """ Shut down the worker processes of the PIMC agents among agents
+    """
+    for agent in agents:
+        if isinstance(agent, ZolePIMCAgent):
+            agent.close()
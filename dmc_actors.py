@@ -0,0 +1,169 @@
+""" CPU deployment of the rlcard DMC actors
+
+    rlcard's DMCTrainer starts every actor with `env.seed(i)` and default torch threading, so on CPU-only machines
+    actors oversubscribe the cores and all runs share the same actor seeds. Within `actor_loop` the trainer starts its
+    actors with `act`, which seeds every actor from the run seed, limits its torch threads, optionally pins it to one
+    core and counts its frames in shared memory for `ActorMonitor`.
+"""
+import os
+import threading
+import timeit
+import traceback
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+import torch
+from rlcard.agents.dmc_agent import trainer as dmc_trainer
+from rlcard.agents.dmc_agent.utils import log
+
+from seeding import set_seed
+
+
+def actor_seed(seed: int, actor_id: int) -> int:
+    """ Independent seed of an actor derived from the run seed
+    """
+    return int(np.random.SeedSequence([seed, actor_id]).generate_state(1)[0])
+
+
+def actor_cpus(num_actors: int) -> list[int or None]:
+    """ Core of every actor, the first available core is left to the learner when there are enough cores
+    """
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    if not cpus:
+        return [None] * num_actors
+    if len(cpus) > 1:
+        cpus = cpus[1:] + cpus[:1]
+    return [cpus[actor_id % len(cpus)] for actor_id in range(num_actors)]
+
+
+@contextmanager
+def actor_loop(trainer, seed: int, num_threads: int = 1, pin_cpus: bool = False):
+    """ Make trainer.start() start its actors with `act` inside the with block, DMCTrainer.start looks up the actor
+        target in the rlcard trainer module, which gets its own `act` back on exit
+
+    Yields:
+        (ActorMonitor): The shared frame counters of the actors
+    """
+    monitor = ActorMonitor(trainer.num_actors * len(trainer.device_iterator))
+    cpus = actor_cpus(monitor.num_actors) if pin_cpus else [None] * monitor.num_actors
+    rlcard_act = dmc_trainer.act
+    dmc_trainer.act = partial(
+        act,
+        seed=seed,
+        num_threads=num_threads,
+        cpus=cpus,
+        frame_counts=monitor.frame_counts,
+        num_actors_per_device=trainer.num_actors,
+        device_ids=list(trainer.device_iterator),
+    )
+    try:
+        yield monitor
+    finally:
+        dmc_trainer.act = rlcard_act
+
+
+class ActorMonitor(object):
+    """ Frame counters shared with the actor processes and a thread logging the frames/sec of every actor
+    """
+
+    def __init__(self, num_actors: int):
+        self.num_actors = num_actors
+        self.frame_counts = torch.multiprocessing.get_context('spawn').RawArray('q', num_actors)
+        self._thread: threading.Thread or None = None
+        self._stop = threading.Event()
+
+    def frames(self) -> list[int]:
+        return list(self.frame_counts)
+
+    def start(self, report_interval: float):
+        self._thread = threading.Thread(target=self._report, args=(report_interval,), name='actor-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _report(self, report_interval: float):
+        timer = timeit.default_timer
+        last_frames, last_time = self.frames(), timer()
+        while not self._stop.wait(report_interval):
+            frames, now = self.frames(), timer()
+            fps = [(current - last) / (now - last_time) for current, last in zip(frames, last_frames)]
+            log.info(
+                'Actor fps: %s, total %.1f',
+                ' '.join(f'{actor_id}:{actor_fps:.1f}' for actor_id, actor_fps in enumerate(fps)),
+                sum(fps),
+            )
+            last_frames, last_time = frames, now
+
+
+def act(
+    i,
+    device,
+    T,
+    free_queue,
+    full_queue,
+    model,
+    buffers,
+    env,
+    seed: int,
+    num_threads: int,
+    cpus: list,
+    frame_counts,
+    num_actors_per_device: int,
+    device_ids: list,
+):
+    """ Actor process loop, same buffers and queues as rlcard.agents.dmc_agent.utils.act
+    """
+    actor_id = device_ids.index(device) * num_actors_per_device + i
+    try:
+        torch.set_num_threads(num_threads)
+        if cpus[actor_id] is not None:
+            os.sched_setaffinity(0, {cpus[actor_id]})
+        env.seed(actor_seed(seed, actor_id))
+        set_seed(actor_seed(seed, actor_id))
+        env.set_agents(model.get_agents())
+        log.info('Device %s Actor %i started on cpu %s with %i threads.', str(device), actor_id, cpus[actor_id], num_threads)
+
+        done_buf = [[] for _ in range(env.num_players)]
+        episode_return_buf = [[] for _ in range(env.num_players)]
+        target_buf = [[] for _ in range(env.num_players)]
+        state_buf = [[] for _ in range(env.num_players)]
+        action_buf = [[] for _ in range(env.num_players)]
+
+        while True:
+            trajectories, payoffs = env.run(is_training=True)
+            for p in range(env.num_players):
+                num_steps = len(trajectories[p][:-1]) // 2
+                if num_steps > 0:
+                    done_buf[p].extend([False] * (num_steps - 1) + [True])
+                    episode_return_buf[p].extend([0.0] * (num_steps - 1) + [float(payoffs[p])])
+                    target_buf[p].extend([float(payoffs[p])] * num_steps)
+                    for index in range(0, len(trajectories[p]) - 2, 2):
+                        state_buf[p].append(trajectories[p][index]['obs'])
+                        action_buf[p].append(env.get_action_feature(trajectories[p][index + 1]))
+                    frame_counts[actor_id] += num_steps
+
+                while len(target_buf[p]) > T:
+                    index = free_queue[p].get()
+                    if index is None:
+                        break
+                    buffers[p]['done'][index][:] = torch.tensor(done_buf[p][:T])
+                    buffers[p]['episode_return'][index][:] = torch.tensor(episode_return_buf[p][:T])
+                    buffers[p]['target'][index][:] = torch.tensor(target_buf[p][:T])
+                    for key, buf in (('state', state_buf[p]), ('action', action_buf[p])):
+                        buffer = buffers[p][key][index]
+                        buffer[:] = torch.from_numpy(np.stack(buf[:T])).reshape(buffer.shape)
+                    full_queue[p].put(index)
+                    done_buf[p] = done_buf[p][T:]
+                    episode_return_buf[p] = episode_return_buf[p][T:]
+                    target_buf[p] = target_buf[p][T:]
+                    state_buf[p] = state_buf[p][T:]
+                    action_buf[p] = action_buf[p][T:]
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        log.error('Exception in worker process %i', actor_id)
+        traceback.print_exc()
+        raise e
@@ -1,9 +1,14 @@
 from envs.zole import ZoleEnv
 
 import argparse
+import os
 
+import torch
 from rlcard.agents.dmc_agent import DMCTrainer
-from rlcard.utils import set_seed
+
+from agents.zole_dmc_agent import ZoleDMCModel
+from dmc_actors import actor_loop
+from seeding import set_seed
 
 
 def train(args):
@@ -11,8 +16,10 @@ def train(args):
         'allow_step_back': False,
         'seed': args.seed,
         'large_win_incentive': args.large_win_incentive,
+        'trajectory_views': True,
     }
     set_seed(args.seed)
+    torch.set_num_threads(args.learner_torch_threads)
 
     env = ZoleEnv(config)
 
@@ -20,14 +27,30 @@ def train(args):
         env=env,
         save_interval=args.save_interval,
         load_model=True,
-        xpid=args.xpid
+        xpid=args.xpid,
+        num_actors=args.num_actors,
+        num_threads=args.num_learner_threads,
     )
 
-    trainer.start()
+    if args.batched_actions:
+        def model_func(device):
+            return ZoleDMCModel(
+                env.state_shape,
+                trainer.action_shape,
+                exp_epsilon=trainer.exp_epsilon,
+                device=str(device),
+            )
+        trainer.model_func = model_func
 
+    with actor_loop(trainer, args.seed, num_threads=args.actor_torch_threads, pin_cpus=args.pin_actors) as monitor:
+        monitor.start(args.report_interval)
+        try:
+            trainer.start()
+        finally:
+            monitor.stop()
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser('DMC example in RLCard')
+
+def add_arguments(parser: argparse.ArgumentParser):
 
     parser.add_argument(
         '--seed',
@@ -53,6 +76,58 @@ if __name__ == '__main__':
         default=0,
     )
 
+    parser.add_argument(
+        '--batched_actions',
+        action='store_true',
+        help='Train ZoleDMCAgents, which value all legal actions in one forward pass. Not checkpoint compatible with '
+             'the default agents',
+    )
+
+    parser.add_argument(
+        '--num_actors',
+        type=int,
+        default=max(1, os.cpu_count() - 1),
+        help='Number of actor processes, by default one per core with one core left to the learner',
+    )
+
+    parser.add_argument(
+        '--actor_torch_threads',
+        type=int,
+        default=1,
+        help='torch intra-op threads of every actor process',
+    )
+
+    parser.add_argument(
+        '--num_learner_threads',
+        type=int,
+        default=1,
+        help='Learner threads per player position',
+    )
+
+    parser.add_argument(
+        '--learner_torch_threads',
+        type=int,
+        default=1,
+        help='torch intra-op threads of the learner process',
+    )
+
+    parser.add_argument(
+        '--pin_actors',
+        action='store_true',
+        help='Pin every actor process to one core',
+    )
+
+    parser.add_argument(
+        '--report_interval',
+        type=float,
+        default=60,
+        help='Seconds between the frames/sec reports of the actors',
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('DMC example in RLCard')
+    add_arguments(parser)
     args = parser.parse_args()
 
     train(args)
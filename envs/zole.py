@@ -9,13 +9,19 @@ from rlcard.envs import Env
 
 from games.zole import Game
 from games.zole.game import ZoleGame
-from games.zole.round import ZoleRound
+from games.zole.round import NUM_TRICKS, ZoleRound
 from games.zole.utils.action_event import ActionEvent
+from profiler import NullProfiler, ProfiledAgent
 
 
 class ZoleEnv(Env):
     """ Zole Environment
+
+        With the 'trajectory_views' config the observations of an episode are written to the rows of one contiguous
+        (T, 192) int8 array, `episode_observations`, and the 'obs' of every state is a view into it
     """
+    # the first state, 2 passes, take, 2 buried cards, 8 tricks and the final state of every player
+    max_episode_observations = 1 + 5 + 3 * NUM_TRICKS + 3
 
     def __init__(self, config):
         self.name = 'zole'
@@ -28,10 +34,35 @@ class ZoleEnv(Env):
         self.state_shape = [[1, state_shape_size] for _ in range(self.num_players)]
         self.action_shape = [None for _ in range(self.num_players)]
         self.large_win_incentive: int = config.get('large_win_incentive', 0)
+        self.trajectory_views: bool = config.get('trajectory_views', False)
+        self.observations: np.ndarray or None = None
+        self.num_observations: int = 0
+        self.profiler = config.get('profiler') or NullProfiler()
+        if self.profiler.enabled:
+            self.profiler.instrument(self.game, 'step', 'game_step')
+            self.profiler.instrument(self.game.judger, 'get_legal_actions')
+            self.profiler.instrument(self.zoleStateExtractor, 'extract_state')
+
+    def set_agents(self, agents):
+        """ Set the agents that will interact with the environment, agents are timed when profiling is enabled
+        """
+        if self.profiler.enabled:
+            agents = [ProfiledAgent(agent, self.profiler, index) for index, agent in enumerate(agents)]
+        super().set_agents(agents)
 
     def reset(self):
         self.zolePerformanceTracker.track_round(self.game.round)
-        return super().reset()    
+        if self.trajectory_views:
+            # a new array per episode, the states of earlier trajectories keep their views
+            self.observations = np.zeros((self.max_episode_observations, self.state_shape[0][1]), dtype=np.int8)
+            self.num_observations = 0
+        return super().reset()
+
+    @property
+    def episode_observations(self) -> np.ndarray:
+        """ The (T, 192) observations of the current episode in extraction order, with 'trajectory_views'
+        """
+        return self.observations[:self.num_observations]
 
     def get_payoffs(self):
         """ Get the payoffs of players.
@@ -58,8 +89,12 @@ class ZoleEnv(Env):
         Returns:
             (numpy.array): The extracted state
         """
-        extracted_state = self.zoleStateExtractor.extract_state(game=self.game)
-        extracted_state['action_record'] = self.action_recorder
+        obs = None
+        if self.observations is not None and self.num_observations < len(self.observations):
+            obs = self.observations[self.num_observations]
+            self.num_observations += 1
+        extracted_state = self.zoleStateExtractor.extract_state(game=self.game, obs=obs)
+        extracted_state['action_record'] = self.action_recorder  # the same list for the whole episode
         return extracted_state
 
     def _decode_action(self, action_id):
@@ -105,10 +140,12 @@ class DefaultZolePayoffDelegate(ZolePayoffDelegate):
         large_player_id = game.round.large_player_id
         if large_player_id is not None:
             won_trick_points = game.round.won_trick_points
-            [large_player_score, small_player_score] = _points_to_score(
+            [large_player_score, small_player_score] = points_to_score(
                 won_trick_points[0],
                 won_trick_points[1],
-                large_win_incentive
+                large_win_incentive,
+                large_tricks=game.round.won_trick_counts[0],
+                small_tricks=game.round.won_trick_counts[1],
             )
             payoffs = []
             for player_id in range(3):
@@ -147,6 +184,15 @@ class ZoleStateExtractor(object):  # interface
 
 
 class DefaultZoleStateExtractor(ZoleStateExtractor):
+    # offsets of the representations in obs, see get_state_shape_size
+    hands_rep_offset = 0
+    trick_rep_offset = 3 * 26
+    hidden_cards_rep_offset = 6 * 26
+    dealer_rep_offset = 7 * 26
+    large_player_rep_offset = 7 * 26 + 3
+    current_player_rep_offset = 7 * 26 + 6
+    is_bidding_rep_offset = 7 * 26 + 9
+
     def get_state_shape_size(self) -> int:
         state_shape_size = 0
         state_shape_size += 3 * 26  # hands_rep_size
@@ -158,11 +204,19 @@ class DefaultZoleStateExtractor(ZoleStateExtractor):
         state_shape_size += 1  # is_bidding_rep_size
         return state_shape_size
 
-    def extract_state(self, game: ZoleGame):
+    @staticmethod
+    def player_index(obs, offset: int) -> int or None:
+        """ Player id of the one-hot player representation at offset, None when it is all zeros
+        """
+        indices = np.flatnonzero(obs[offset:offset + 3])
+        return int(indices[0]) if len(indices) else None
+
+    def extract_state(self, game: ZoleGame, obs: np.ndarray or None = None):
         """ Extract useful information from state for RL.
 
         Args:
             game (ZoleGame): The game
+            obs (numpy.array): Zeroed array the observation is written to, a new int array when None
 
         Returns:
             (numpy.array): The extracted state
@@ -172,50 +226,45 @@ class DefaultZoleStateExtractor(ZoleStateExtractor):
         raw_legal_actions = list(legal_actions.keys())
         current_player_id = game.round.get_current_player().player_id
         large_player_id = game.round.large_player_id
+        if obs is None:
+            obs = np.zeros(self.get_state_shape_size(), dtype=int)
 
         # construct hands_rep of hands of players
-        hands_rep = [np.zeros(26, dtype=int) for _ in range(3)]
+        hands_rep = obs[self.hands_rep_offset:self.trick_rep_offset].reshape(3, 26)
         if not game.is_over():
             for card in game.round.players[current_player_id].hand:
-                hands_rep[current_player_id][card.card_id] = 1
+                hands_rep[current_player_id, card.card_id] = 1
 
         # construct trick_pile_rep
-        trick_pile_rep = [np.zeros(26, dtype=int) for _ in range(3)]
-        if game.round.is_bidding_over() and not game.is_over():
+        trick_pile_rep = obs[self.trick_rep_offset:self.hidden_cards_rep_offset].reshape(3, 26)
+        if not game.is_over():  # no trick moves before the bidding is over
             trick_moves = game.round.get_trick_moves()
             for move in trick_moves:
                 player = move.player
                 card = move.card
-                trick_pile_rep[player.player_id][card.card_id] = 1
+                trick_pile_rep[player.player_id, card.card_id] = 1
 
-        hidden_cards_rep = self._construct_hidden_cards_rep(game, current_player_id, large_player_id)
+        self._construct_hidden_cards_rep(
+            game,
+            current_player_id,
+            large_player_id,
+            obs[self.hidden_cards_rep_offset:self.dealer_rep_offset],
+        )
 
         # construct large_player_rep
-        large_player_rep = np.zeros(3, dtype=int)
+        large_player_rep = obs[self.large_player_rep_offset:self.current_player_rep_offset]
         if large_player_id is not None:
             large_player_rep[large_player_id] = 1
 
         # construct dealer_rep
-        dealer_rep = np.zeros(3, dtype=int)
-        dealer_rep[game.round.tray.dealer_id] = 1
+        obs[self.dealer_rep_offset + game.round.tray.dealer_id] = 1
 
         # construct current_player_rep
-        current_player_rep = np.zeros(3, dtype=int)
-        current_player_rep[current_player_id] = 1
+        obs[self.current_player_rep_offset + current_player_id] = 1
 
         # construct is_bidding_rep
-        is_bidding_rep = np.array([1] if game.round.is_bidding_over() else [0])
-
-        rep = []
-        rep += hands_rep
-        rep += trick_pile_rep
-        rep.append(hidden_cards_rep)
-        rep.append(dealer_rep)
-        rep.append(large_player_rep)
-        rep.append(current_player_rep)
-        rep.append(is_bidding_rep)
-
-        obs = np.concatenate(rep)
+        obs[self.is_bidding_rep_offset] = 1 if game.round.is_bidding_over() else 0
+
         extracted_state['obs'] = obs
         extracted_state['legal_actions'] = legal_actions
         extracted_state['raw_legal_actions'] = raw_legal_actions
@@ -226,8 +275,9 @@ class DefaultZoleStateExtractor(ZoleStateExtractor):
         return extracted_state
 
     @staticmethod
-    def _construct_hidden_cards_rep(game: ZoleGame, current_player_id: int, large_player_id: int) -> np.ndarray:
-        hidden_cards_rep = np.zeros(26, dtype=int)
+    def _construct_hidden_cards_rep(game: ZoleGame, current_player_id: int, large_player_id: int, hidden_cards_rep: np.ndarray or None = None) -> np.ndarray:
+        if hidden_cards_rep is None:
+            hidden_cards_rep = np.zeros(26, dtype=int)
         if game.is_over():
             return hidden_cards_rep
 
@@ -302,13 +352,20 @@ class DefaultZolePerformanceTracker(object):
         return f'{self.pick_up_table_counts[played_id] / self.round_counter:.3f}'
 
 
-def _points_to_score(large_player_points: int, small_player_points: int, large_win_incentive: int):
+def points_to_score(large_player_points: int, small_player_points: int, large_win_incentive: int,
+                     large_tricks: int or None = None, small_tricks: int or None = None):
+    """ Scores of the large player and of each small player. Winning or losing all tricks is decided by the trick
+        counts of the sides when given, the small side can win a trick worth no points. Without trick counts a side
+        with no points is scored as having won no tricks.
+    """
     if large_player_points + small_player_points != 120:
         raise ValueError
 
     points = large_player_points
 
-    if points == 120:
+    if large_tricks == 0:
+        return [-8, 4]
+    elif small_tricks == 0 or (small_tricks is None and points == 120):
         return [6 + large_win_incentive * 2, -3 - large_win_incentive]
     elif points >= 91:
         return [4 + large_win_incentive * 2, -2 - large_win_incentive]
@@ -316,7 +373,7 @@ def _points_to_score(large_player_points: int, small_player_points: int, large_w
         return [2 + large_win_incentive * 2, -1 - large_win_incentive]
     elif points > 31:
         return [-4, 2]
-    elif points > 1:
+    elif points > 1 or large_tricks is not None:
         return [-6, 3]
-    else:  # points == 0: Technically not correct, should check for won tricks
+    else:  # points == 0
         return [-8, 4]
@@ -12,12 +12,20 @@ class ZoleDealer:
     """ Initialize a ZoleDealer dealer class
     """
 
-    def __init__(self, np_random):
+    def __init__(self, np_random, deck: List[ZoleCard] or None = None):
         """ set shuffled_deck, set stock_pile
+
+        Args:
+            np_random: shuffles the deck
+            deck (List[ZoleCard]): cards in dealing order, dealt from the end, a shuffled deck when None
         """
         self.np_random = np_random
-        self.shuffled_deck: List[ZoleCard] = ZoleCard.get_deck()  # keep a copy of the shuffled cards at start of round
-        self.np_random.shuffle(self.shuffled_deck)
+        # keep a copy of the shuffled cards at start of round
+        if deck is None:
+            self.shuffled_deck: List[ZoleCard] = ZoleCard.get_deck()
+            self.np_random.shuffle(self.shuffled_deck)
+        else:
+            self.shuffled_deck: List[ZoleCard] = list(deck)
         self.stock_pile: List[ZoleCard] = self.shuffled_deck.copy()
 
     def deal_cards(self, player: ZolePlayer, num: int):
@@ -7,6 +7,7 @@ from typing import List
 from games.zole.judger import ZoleJudger
 from games.zole.round import ZoleRound
 from games.zole.utils.action_event import ActionEvent, CallActionEvent, PlayCardAction
+from games.zole.utils.zole_card import ZoleCard
 
 import numpy as np
 
@@ -24,13 +25,19 @@ class ZoleGame:
         self.actions: [ActionEvent] = []  # must reset in init_game
         self.round: ZoleRound or None = None  # must reset in init_game
         self.num_players: int = 3
+        self.board_id: int or None = None  # board of the next init_game, a random board when None
 
-    def init_game(self):
+    def init_game(self, board_id: int or None = None, deck: List[ZoleCard] or None = None):
         """ Initialize all characters in the game and start round 1
+
+        Args:
+            board_id (int): board of the round, its Tray sets the dealer. Defaults to self.board_id, then to a random
+                board 1, 2 or 3
+            deck (List[ZoleCard]): cards in dealing order, dealt from the end, a shuffled deck when None
         """
-        board_id = self.np_random.choice([1, 2, 3])
+        board_id = board_id or self.board_id or self.np_random.choice([1, 2, 3])
         self.actions: List[ActionEvent] = []
-        self.round = ZoleRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random)
+        self.round = ZoleRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random, deck=deck)
 
         self._deal_cards()
 
@@ -13,6 +13,9 @@ from games.zole.utils.tray import Tray
 from games.zole.utils.zole_card import ZoleCard
 
 
+NUM_TRICKS = 8
+
+
 class ZoleRound:
 
     @property
@@ -38,7 +41,7 @@ class ZoleRound:
         else:
             return 'choose table'
 
-    def __init__(self, num_players: int, board_id: int, np_random):
+    def __init__(self, num_players: int, board_id: int, np_random, deck: List[ZoleCard] or None = None):
         """ Initialize the round class
 
             The round class maintains the following instances:
@@ -48,17 +51,21 @@ class ZoleRound:
                 4) play_card_count: count of PlayCardMoves
                 5) move_sheet: history of the moves of the players (including the deal_hand_move)
                 6) won_trick_points: points already gained for each team during the round
+                   won_trick_counts: tricks already won by each team during the round
+                7) trick_moves: the PlayCardMoves of the current trick, the completed trick until the next card
+                8) trick_winning_card, trick_winner, trick_points: the running result of the current trick
 
         Args:
             num_players: int
             board_id: int
             np_random
+            deck: cards in dealing order, a shuffled deck when None
         """
         tray = Tray(board_id=board_id)
         dealer_id = tray.dealer_id
         self.tray = tray
         self.np_random = np_random
-        self.dealer: ZoleDealer = ZoleDealer(self.np_random)
+        self.dealer: ZoleDealer = ZoleDealer(self.np_random, deck=deck)
         self.players: List[ZolePlayer] = []
         self.table: ZoleTable = ZoleTable(np_random=self.np_random)
         for player_id in range(num_players):
@@ -67,35 +74,20 @@ class ZoleRound:
         self.play_card_count: int = 0
         self.contract_take_move: MakeTakeMove or None = None
         self.won_trick_points = [0, 0]  # count of won points by side
-        self.won_trick_cards = [[], []]  # count of won cards by side
+        self.won_trick_counts = [0, 0]  # count of won tricks by side
+        self.pass_count: int = 0
         self.move_sheet: List[ZoleMove] = []
         self.move_sheet.append(DealHandMove(dealer=self.players[dealer_id], shuffled_deck=self.dealer.shuffled_deck))
         self.buried_cards: List[ZoleCard] = []
+        self.trick_moves: List[PlayCardMove] = []
+        self.trick_winning_card: ZoleCard or None = None
+        self.trick_winner: ZolePlayer or None = None
+        self.trick_points: int = 0
 
     def is_bidding_over(self) -> bool:
-        """ Return whether the current bidding is over
+        """ Return whether the current bidding is over, all players passed or the large player buried two cards
         """
-        last_make_pass_moves: List[MakePassMove] = []
-        last_bury_card_moves: List[BuryCardMove] = []
-
-        for move in reversed(self.move_sheet):
-            if isinstance(move, PlayCardMove):
-                return True
-            elif isinstance(move, MakePassMove):
-                last_make_pass_moves.append(move)
-                if len(last_make_pass_moves) == 3:
-                    return True
-            elif isinstance(move, MakeTakeMove):
-                return False
-            elif isinstance(move, BuryCardMove):
-                last_bury_card_moves.append(move)
-                if len(last_bury_card_moves) == 2:
-                    return True
-            elif isinstance(move, DealHandMove):
-                return False
-            else:
-                raise NotImplementedError
-        return False
+        return self.pass_count == 3 or len(self.buried_cards) == 2
 
     def is_over(self) -> bool:
         """ Return whether the current game is over
@@ -106,11 +98,7 @@ class ZoleRound:
         if not self.contract_take_move:
             return True
 
-        for player in self.players:
-            if player.hand:
-                return False
-
-        return True
+        return self.play_card_count == 3 * NUM_TRICKS
 
     def get_current_player(self) -> ZolePlayer:
         return self.players[self.current_player_id]
@@ -122,24 +110,17 @@ class ZoleRound:
         return self.players[(self.dealer_id + 2) % 3]
 
     def get_trick_moves(self) -> List[PlayCardMove]:
-        trick_moves: List[PlayCardMove] = []
-        if self.is_bidding_over():
-            if self.play_card_count > 0:
-                trick_pile_count = self.play_card_count % 3
-                if trick_pile_count == 0:
-                    trick_pile_count = 3  # wch: note this
-                for move in self.move_sheet[-trick_pile_count:]:
-                    if isinstance(move, PlayCardMove):
-                        trick_moves.append(move)
-                if len(trick_moves) != trick_pile_count:
-                    raise Exception(f'get_trick_moves: count of trick_moves={[str(move.card) for move in trick_moves]} does not equal {trick_pile_count}')
-        return trick_moves
+        """ Return the PlayCardMoves of the current trick in play order, the completed trick until the next card is
+            played and an empty list before the first card
+        """
+        return self.trick_moves
 
     def make_call(self, action: CallActionEvent):
         # when current_player takes CallActionEvent step, the move is recorded and executed
         current_player = self.players[self.current_player_id]
         if isinstance(action, PassTableAction):
             self.move_sheet.append(MakePassMove(current_player))
+            self.pass_count += 1
         elif isinstance(action, TakeTableAction):
             take_table_move = MakeTakeMove(current_player, action)
             current_player = self.players[self.current_player_id]
@@ -154,7 +135,6 @@ class ZoleRound:
 
             current_player.remove_card_from_hand(card=buried_card)
             self.won_trick_points[0] += buried_card.card_to_points()
-            self.won_trick_cards[0].append(buried_card)
             self.move_sheet.append(bury_card_move)
             self.buried_cards.append(buried_card)
 
@@ -169,36 +149,32 @@ class ZoleRound:
     def play_card(self, action: PlayCardAction):
         # when current_player takes PlayCardAction step, the move is recorded and executed
         current_player = self.players[self.current_player_id]
-        self.move_sheet.append(PlayCardMove(current_player, action))
+        play_card_move = PlayCardMove(current_player, action)
+        self.move_sheet.append(play_card_move)
 
         card = action.card
         current_player.remove_card_from_hand(card=card)
         self.play_card_count += 1
 
-        trick_moves = self.get_trick_moves()
-
-        if len(trick_moves) == 3:
-            winning_card = trick_moves[0].card
-            trick_winner = trick_moves[0].player
-            trick_points = winning_card.card_to_points()
-            trick_cards = [winning_card]
-            for move in trick_moves[1:]:
-                trick_card = move.card
-                trick_cards.append(trick_card)
-                trick_player = move.player
-                trick_points += trick_card.card_to_points()
-                if winning_card.is_same_suit_or_trump(trick_card.card_id):
-                    if trick_card.card_id > winning_card.card_id:
-                        winning_card = trick_card
-                        trick_winner = trick_player
-
-            self.current_player_id = trick_winner.player_id
-            if self.current_player_id == self.contract_take_move.player.player_id:
-                self.won_trick_cards[0].extend(trick_cards)
-                self.won_trick_points[0] += trick_points
-            else:
-                self.won_trick_cards[1].extend(trick_cards)
-                self.won_trick_points[1] += trick_points
+        if self.play_card_count % 3 == 1:
+            # a new list, the completed trick is left to whoever still holds it
+            self.trick_moves = [play_card_move]
+            self.trick_winning_card = card
+            self.trick_winner = current_player
+            self.trick_points = card.card_to_points()
+        else:
+            self.trick_moves.append(play_card_move)
+            self.trick_points += card.card_to_points()
+            winning_card = self.trick_winning_card
+            if winning_card.is_same_suit_or_trump(card.card_id) and card.card_id > winning_card.card_id:
+                self.trick_winning_card = card
+                self.trick_winner = current_player
+
+        if len(self.trick_moves) == 3:
+            self.current_player_id = self.trick_winner.player_id
+            side = 0 if self.current_player_id == self.contract_take_move.player.player_id else 1
+            self.won_trick_counts[side] += 1
+            self.won_trick_points[side] += self.trick_points
         else:
             self.current_player_id = (self.current_player_id + 1) % 3
 
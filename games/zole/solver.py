@@ -0,0 +1,289 @@
+"""
+    File name: zole/solver.py
+
+    Perfect-information (double-dummy) solver for the trick play of a Zole round.
+"""
+
+from typing import Dict, Tuple
+
+from games.zole.round import ZoleRound
+from games.zole.utils.zole_card import ZoleCard
+
+
+# suit index of every card id: 0 hearts, 1 spades, 2 clubs, 3 trumps; card ids within a suit are ordered by strength
+CARD_SUITS = [card_id // 4 if card_id < 12 else 3 for card_id in range(26)]
+SUIT_MASKS = [0xF, 0xF0, 0xF00, ((1 << 26) - 1) ^ 0xFFF]
+CARD_POINTS = ZoleCard.card_points
+
+# (hands, trick, leader, large_player_id)
+ZolePosition = Tuple[Tuple[int, int, int], Tuple[int, ...], int, int]
+
+
+class ZoleSolver:
+    """ Alpha-beta search over the remaining tricks once hands are known
+
+        Values are the points the large player wins from the current position on. Positions are keyed by the
+        bitmask hands, the cards of the current trick, the leader and the large player, so the transposition table
+        is shared between searches and rounds.
+    """
+
+    def __init__(self, max_table_size: int = 4000000):
+        """ Initialize the solver
+
+        Args:
+            max_table_size (int): The transposition table is cleared when it holds this many positions
+        """
+        self.max_table_size = max_table_size
+        self.table: Dict[tuple, Tuple[int, int, int]] = {}  # position -> (lower bound, upper bound, best card)
+        self.nodes: int = 0
+
+    @staticmethod
+    def position_from_round(round: ZoleRound) -> ZolePosition:
+        """ Return the solver position of a round in the play card phase
+        """
+        if round.large_player_id is None or not round.is_bidding_over():
+            raise Exception('ZoleSolver: the round is not in the play card phase')
+        hands = tuple(to_mask(card.card_id for card in player.hand) for player in round.players)
+        trick_moves = round.get_trick_moves()
+        if len(trick_moves) == 3:  # the completed trick is still reported until the next card is played
+            trick_moves = []
+        trick = tuple(move.card.card_id for move in trick_moves)
+        leader = trick_moves[0].player.player_id if trick_moves else round.current_player_id
+        return hands, trick, leader, round.large_player_id
+
+    def solve_round(self, round: ZoleRound) -> int:
+        """ Return the points of the large player at the end of the round under optimal play of all players,
+            including the points already won and buried
+        """
+        return round.won_trick_points[0] + self.solve(*self.position_from_round(round))
+
+    def solve(self, hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int, large_player_id: int) -> int:
+        """ Return the points the large player wins from this position on under optimal play
+        """
+        return self._search(hands, trick, leader, large_player_id, 0, 121, _remaining_points(hands, trick))
+
+    def solve_moves(self, hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int, large_player_id: int) -> Dict[int, int]:
+        """ Return the exact value of every legal card of the current player, the value includes the current trick
+        """
+        values = {}
+        remaining = _remaining_points(hands, trick)
+        for card_id in legal_cards(hands, trick, leader):
+            values[card_id] = self._play(hands, trick, leader, large_player_id, card_id, 0, 121, remaining)
+        return values
+
+    def best_card(self, round: ZoleRound) -> Tuple[int, int]:
+        """ Return the best card id for the current player of the round and its value in final large player points
+        """
+        hands, trick, leader, large_player_id = self.position_from_round(round)
+        values = self.solve_moves(hands, trick, leader, large_player_id)
+        is_large = (leader + len(trick)) % 3 == large_player_id
+        card_id = (max if is_large else min)(values, key=values.get)
+        return card_id, round.won_trick_points[0] + values[card_id]
+
+    def _search(self, hands, trick, leader, large_player_id, alpha, beta, remaining) -> int:
+        # remaining: points of the cards in the hands and the current trick, an upper bound of the value
+        if remaining <= alpha:
+            return remaining
+        if beta <= 0:
+            return 0
+        if not trick and not hands[leader]:
+            return 0
+        self.nodes += 1
+
+        key = (hands, trick, leader, large_player_id)
+        entry = self.table.get(key)
+        best_card = -1
+        if entry is not None:
+            lower, upper, best_card = entry
+            if lower >= beta or lower == upper:
+                return lower
+            if upper <= alpha:
+                return upper
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+        alpha_start, beta_start = alpha, beta
+
+        is_large = (leader + len(trick)) % 3 == large_player_id
+        cards = _ordered_cards(hands, trick, leader, best_card)
+        best_value = -1 if is_large else 121
+        for card_id in cards:
+            value = self._play(hands, trick, leader, large_player_id, card_id, alpha, beta, remaining)
+            if is_large:
+                if value > best_value:
+                    best_value, best_card = value, card_id
+                    alpha = max(alpha, value)
+            elif value < best_value:
+                best_value, best_card = value, card_id
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if len(self.table) >= self.max_table_size:
+            self.table.clear()
+        lower, upper = (entry[0], entry[1]) if entry is not None else (0, 120)
+        if best_value <= alpha_start:
+            upper = min(upper, best_value)
+        elif best_value >= beta_start:
+            lower = max(lower, best_value)
+        else:
+            lower = upper = best_value
+        self.table[key] = (lower, upper, best_card)
+        return best_value
+
+    def _play(self, hands, trick, leader, large_player_id, card_id, alpha, beta, remaining) -> int:
+        player_id = (leader + len(trick)) % 3
+        next_hands = list(hands)
+        next_hands[player_id] ^= 1 << card_id
+        next_hands = tuple(next_hands)
+        if len(trick) < 2:
+            return self._search(next_hands, trick + (card_id,), leader, large_player_id, alpha, beta, remaining)
+
+        trick_cards = trick + (card_id,)
+        winner_index = trick_winner_index(trick_cards)
+        winner_id = (leader + winner_index) % 3
+        trick_points = CARD_POINTS[trick_cards[0]] + CARD_POINTS[trick_cards[1]] + CARD_POINTS[card_id]
+        remaining -= trick_points
+        if winner_id != large_player_id:
+            return self._search(next_hands, (), winner_id, large_player_id, alpha, beta, remaining)
+        return trick_points + self._search(
+            next_hands, (), winner_id, large_player_id, alpha - trick_points, beta - trick_points, remaining
+        )
+
+
+def to_mask(card_ids) -> int:
+    mask = 0
+    for card_id in card_ids:
+        mask |= 1 << int(card_id)
+    return mask
+
+
+def mask_cards(mask: int) -> list:
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def beats(card_id: int, winning_card_id: int) -> bool:
+    """ Whether card_id takes the trick from winning_card_id, see ZoleRound.play_card
+    """
+    if card_id <= winning_card_id:
+        return False
+    return card_id >= 12 or CARD_SUITS[card_id] == CARD_SUITS[winning_card_id]
+
+
+def trick_winner_index(trick_cards: Tuple[int, ...]) -> int:
+    winner_index = 0
+    for index in range(1, len(trick_cards)):
+        if beats(trick_cards[index], trick_cards[winner_index]):
+            winner_index = index
+    return winner_index
+
+
+def legal_cards(hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int) -> list:
+    """ Cards the current player may play, following suit (or trump) of the led card when possible
+    """
+    hand = hands[(leader + len(trick)) % 3]
+    if trick:
+        following = hand & SUIT_MASKS[CARD_SUITS[trick[0]]]
+        if following:
+            hand = following
+    return mask_cards(hand)
+
+
+def greedy_card(hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int, large_player_id: int) -> int:
+    """ A cheap playout policy: lead the strongest card, win tricks with the lowest winning card, smear points on a
+        winning partner and otherwise throw the cheapest card
+    """
+    player_id = (leader + len(trick)) % 3
+    cards = legal_cards(hands, trick, leader)
+    if not trick:
+        return cards[-1]
+    winner_index = trick_winner_index(trick)
+    winner_id = (leader + winner_index) % 3
+    partner_is_winning = player_id != large_player_id and winner_id != large_player_id
+    if partner_is_winning and len(trick) == 2:
+        return max(cards, key=lambda card: CARD_POINTS[card])
+    winning_cards = [card for card in cards if beats(card, trick[winner_index])]
+    if winning_cards and not partner_is_winning:
+        return winning_cards[0]
+    return min(cards, key=lambda card: CARD_POINTS[card])
+
+
+def greedy_playout(hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int, large_player_id: int, card_id: int or None = None) -> int:
+    """ Finish the round with greedy_card for every player, starting with card_id when given. Returns the points
+        the large player wins from the current trick on.
+    """
+    return greedy_playout_tricks(hands, trick, leader, large_player_id, card_id)[0]
+
+
+def greedy_playout_tricks(hands: Tuple[int, int, int], trick: Tuple[int, ...], leader: int, large_player_id: int,
+                          card_id: int or None = None) -> Tuple[int, int, int]:
+    """ greedy_playout that also counts the tricks won from the current trick on
+
+    Returns:
+        (tuple): points of the large player, tricks won by the large player, tricks won by the small players
+    """
+    hands = list(hands)
+    points = 0
+    tricks = [0, 0]  # large, small
+    if card_id is None:
+        if not trick and not hands[leader]:
+            return 0, 0, 0
+        card_id = greedy_card(hands, trick, leader, large_player_id)
+    while True:
+        player_id = (leader + len(trick)) % 3
+        hands[player_id] ^= 1 << card_id
+        trick += (card_id,)
+        if len(trick) == 3:
+            winner_id = (leader + trick_winner_index(trick)) % 3
+            if winner_id == large_player_id:
+                points += CARD_POINTS[trick[0]] + CARD_POINTS[trick[1]] + CARD_POINTS[trick[2]]
+                tricks[0] += 1
+            else:
+                tricks[1] += 1
+            trick, leader = (), winner_id
+            if not hands[leader]:
+                return points, tricks[0], tricks[1]
+        card_id = greedy_card(hands, trick, leader, large_player_id)
+
+
+def _remaining_points(hands: Tuple[int, int, int], trick: Tuple[int, ...]) -> int:
+    card_ids = mask_cards(hands[0] | hands[1] | hands[2]) + list(trick)
+    return sum(CARD_POINTS[card_id] for card_id in card_ids)
+
+
+def _ordered_cards(hands, trick, leader, first_card) -> list:
+    """ Legal cards without equivalent duplicates, the previous best card first and trick winners before losers
+
+        Two cards of the same suit and points are equivalent when every card ranked between them is in the hand of
+        the current player or already played, then only the lower one is searched.
+    """
+    player_id = (leader + len(trick)) % 3
+    others = (hands[0] | hands[1] | hands[2]) ^ hands[player_id]
+    for card_id in trick:
+        others |= 1 << card_id
+
+    cards = []
+    previous = -1
+    for card_id in legal_cards(hands, trick, leader):
+        if previous >= 0 and CARD_SUITS[previous] == CARD_SUITS[card_id] and CARD_POINTS[previous] == CARD_POINTS[card_id]:
+            between = ((1 << card_id) - 1) ^ ((1 << (previous + 1)) - 1)
+            if not between & others:
+                continue
+        cards.append(card_id)
+        previous = card_id
+
+    if trick:
+        winning_card_id = trick[trick_winner_index(trick)]
+        winners = [card_id for card_id in cards if beats(card_id, winning_card_id)]
+        losers = [card_id for card_id in cards if not beats(card_id, winning_card_id)]
+        cards = winners[::-1] + losers
+    else:
+        cards.reverse()
+    if first_card in cards:
+        cards.remove(first_card)
+        cards.insert(0, first_card)
+    return cards
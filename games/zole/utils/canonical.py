@@ -0,0 +1,156 @@
+"""
+    File name: zole/utils/canonical.py
+
+    Hearts, spades and clubs (card ids 0-11) are interchangeable in Zole. A hand, trick or observation is
+    canonicalized by permuting the plain suits so that the suit holding the most valuable cards comes first.
+    Isomorphic states then share one canonical form, and the returned permutation maps canonical actions back.
+"""
+
+from itertools import permutations
+from typing import List, Tuple
+
+import numpy as np
+
+from games.zole.utils.action_event import ActionEvent
+
+
+# permutation[suit] is the suit a plain suit is mapped to
+PLAIN_SUIT_PERMUTATIONS: List[Tuple[int, int, int]] = list(permutations(range(3)))
+IDENTITY_PERMUTATION = (0, 1, 2)
+
+# card planes of DefaultZoleStateExtractor: 3 hands, 3 trick and the hidden cards, each of 26 card ids
+NUM_CARD_PLANES = 7
+_PLAIN_CARD_COLUMNS = np.array([plane * 26 + card_id for plane in range(NUM_CARD_PLANES) for card_id in range(12)])
+_PLANE_WEIGHTS = np.array([1 << (4 * (NUM_CARD_PLANES - 1 - plane)) for plane in range(NUM_CARD_PLANES)], dtype=np.int64)
+_RANK_WEIGHTS = np.array([1, 2, 4, 8], dtype=np.int64)
+
+
+def permute_card(card_id: int, permutation: Tuple[int, int, int]) -> int:
+    if card_id >= 12:
+        return card_id
+    return permutation[card_id // 4] * 4 + card_id % 4
+
+
+def permute_action(action_id: int, permutation: Tuple[int, int, int]) -> int:
+    """ Map a bury or play card action id through a suit permutation, bidding actions are unchanged
+    """
+    if action_id >= ActionEvent.first_play_card_action_id:
+        first_action_id = ActionEvent.first_play_card_action_id
+    elif action_id >= ActionEvent.first_bury_card_action_id:
+        first_action_id = ActionEvent.first_bury_card_action_id
+    else:
+        return action_id
+    return first_action_id + permute_card(action_id - first_action_id, permutation)
+
+
+def invert_permutation(permutation: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    inverse = [0, 0, 0]
+    for suit, target in enumerate(permutation):
+        inverse[target] = suit
+    return tuple(inverse)
+
+
+def permute_suit_mask(suit_mask: int, permutation: Tuple[int, int, int]) -> int:
+    """ Map a mask of suit indices (bit 3 for trumps) through a suit permutation
+    """
+    permuted = suit_mask & 0b1000
+    for suit in range(3):
+        if suit_mask & (1 << suit):
+            permuted |= 1 << permutation[suit]
+    return permuted
+
+
+def canonical_permutation(*card_groups) -> Tuple[int, int, int]:
+    """ Return the permutation that orders the plain suits by their 4-bit rank masks in the card groups, the first
+        group deciding first, highest first. Suits with equal masks in every group are interchangeable, so their
+        order does not change the canonical cards.
+    """
+    suit_keys = [[0] * len(card_groups) for _ in range(3)]
+    for index, card_ids in enumerate(card_groups):
+        for card_id in card_ids:
+            if card_id < 12:
+                suit_keys[card_id // 4][index] |= 1 << (card_id % 4)
+    order = sorted(range(3), key=lambda suit: suit_keys[suit], reverse=True)
+    return invert_permutation(tuple(order))
+
+
+def canonical_hand(card_ids) -> Tuple[List[int], Tuple[int, int, int]]:
+    """ Return the sorted canonical card ids of a hand and the permutation that maps the hand onto them
+    """
+    permutation = canonical_permutation(card_ids)
+    return sorted(permute_card(card_id, permutation) for card_id in card_ids), permutation
+
+
+def canonical_trick(hand, trick) -> Tuple[List[int], List[int], Tuple[int, int, int]]:
+    """ Return the sorted canonical hand, the canonical trick in play order and the permutation mapping onto them
+    """
+    permutation = canonical_permutation(hand, *([card_id] for card_id in trick))
+    canonical_cards = sorted(permute_card(card_id, permutation) for card_id in hand)
+    return canonical_cards, [permute_card(card_id, permutation) for card_id in trick], permutation
+
+
+# lookup tables indexed by the position of a permutation in PLAIN_SUIT_PERMUTATIONS
+CARD_PERMUTATIONS = np.array([
+    [permute_card(card_id, permutation) for card_id in range(26)]
+    for permutation in PLAIN_SUIT_PERMUTATIONS
+])
+ACTION_PERMUTATIONS = np.array([
+    [permute_action(action_id, permutation) for action_id in range(ActionEvent.get_num_actions())]
+    for permutation in PLAIN_SUIT_PERMUTATIONS
+])
+_PERMUTATION_INDEX = np.zeros((3, 3, 3), dtype=np.int64)
+for _index, _permutation in enumerate(PLAIN_SUIT_PERMUTATIONS):
+    _PERMUTATION_INDEX[_permutation] = _index
+
+
+def permutation_indices(permutations: np.ndarray) -> np.ndarray:
+    """ Return the positions in PLAIN_SUIT_PERMUTATIONS of a (N, 3) batch of permutations
+    """
+    return _PERMUTATION_INDEX[permutations[:, 0], permutations[:, 1], permutations[:, 2]]
+
+
+def invert_permutations(permutations: np.ndarray) -> np.ndarray:
+    return np.argsort(permutations, axis=1)
+
+
+def permute_actions(action_ids: np.ndarray, permutations: np.ndarray) -> np.ndarray:
+    """ Map a (N,) batch of action ids through a (N, 3) batch of permutations
+    """
+    return ACTION_PERMUTATIONS[permutation_indices(permutations), action_ids]
+
+
+def permute_observations(obs: np.ndarray, permutations: np.ndarray) -> np.ndarray:
+    """ Return a copy of a (N, 192) batch of DefaultZoleStateExtractor observations with the plain suits of every
+        card plane mapped through a (N, 3) batch of permutations
+    """
+    num_obs = obs.shape[0]
+    plain_cards = obs[:, _PLAIN_CARD_COLUMNS].reshape(num_obs, NUM_CARD_PLANES, 3, 4)
+    source_suits = invert_permutations(permutations)
+    permuted_cards = np.take_along_axis(plain_cards, source_suits[:, None, :, None], axis=2)
+    permuted = obs.copy()
+    permuted[:, _PLAIN_CARD_COLUMNS] = permuted_cards.reshape(num_obs, -1)
+    return permuted
+
+
+def canonical_permutations(obs: np.ndarray) -> np.ndarray:
+    """ Return the (N, 3) canonical permutations of a (N, 192) batch of observations, the suits are ordered by
+        their rank masks in the hand planes first, then the trick planes and the hidden cards
+    """
+    num_obs = obs.shape[0]
+    plain_cards = obs[:, _PLAIN_CARD_COLUMNS].reshape(num_obs, NUM_CARD_PLANES, 3, 4).astype(np.int64)
+    suit_masks = plain_cards @ _RANK_WEIGHTS  # (N, planes, suits)
+    suit_keys = np.einsum('nps,p->ns', suit_masks, _PLANE_WEIGHTS)
+    order = np.argsort(-suit_keys, axis=1, kind='stable')
+    return invert_permutations(order)
+
+
+def canonical_observations(obs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Canonicalize a (N, 192) batch of observations
+
+    Returns:
+        (numpy.array): The canonical observations
+        (numpy.array): The (N, 3) permutations, map canonical actions back with permute_actions and
+            invert_permutations
+    """
+    permutations = canonical_permutations(obs)
+    return permute_observations(obs, permutations), permutations
@@ -0,0 +1,164 @@
+""" File-backed job queue of evaluation jobs in an SQLite database
+
+    A coordinator adds jobs, any number of workers on hosts sharing the database file claim them, run them and
+    record their results. A claimed job is 'running' until its worker completes or fails it, and the worker renews
+    its heartbeat while running it. Running jobs whose heartbeat is older than stale_after seconds belong to crashed
+    workers and are requeued by the next claim, up to max_attempts claims per job.
+
+    Every job is identified by the key of its spec, so adding the same jobs again is a no-op. Only the worker holding
+    a running job records its result, a worker whose job was requeued gets False from heartbeat and complete and
+    drops the job, so a requeued job has the result of its last claim. Every change is a single
+    transaction, claims are BEGIN IMMEDIATE so two workers never claim the same job. SQLite relies on the locking of
+    the file system, which network file systems may not provide.
+"""
+import json
+import sqlite3
+import time
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_schema = '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        key TEXT UNIQUE NOT NULL,
+        spec TEXT NOT NULL,
+        status TEXT NOT NULL,
+        worker TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        heartbeat_at REAL,
+        result TEXT,
+        error TEXT
+    )
+'''
+
+
+def job_key(spec: dict) -> str:
+    return json.dumps(spec, sort_keys=True)
+
+
+class JobQueue(object):
+    def __init__(self, path: str, stale_after: float = 300.0, max_attempts: int = 3):
+        """ Open the queue, creating the database when it does not exist
+
+        Args:
+            path (str): the SQLite database file
+            stale_after (float): seconds without heartbeat after which a running job is requeued
+            max_attempts (int): claims of a job before a stale or failing job is marked failed
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        # autocommit mode, transactions are explicit
+        self.connection = sqlite3.connect(path, timeout=60.0, isolation_level=None)
+        self.connection.execute(_schema)
+
+    def close(self):
+        self.connection.close()
+
+    def add_jobs(self, specs: list) -> int:
+        """ Add the jobs of specs that are not in the queue yet, return the number added
+        """
+        with self._transaction():
+            before = self._count()
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO jobs (key, spec, status) VALUES (?, ?, ?)',
+                [(job_key(spec), json.dumps(spec), PENDING) for spec in specs],
+            )
+            return self._count() - before
+
+    def claim(self, worker: str) -> tuple or None:
+        """ Requeue stale jobs and claim a pending job for worker
+
+        Returns:
+            (tuple): (job id, spec) of the claimed job, None when no job is pending
+        """
+        with self._transaction():
+            now = time.time()
+            stale = now - self.stale_after
+            self.connection.execute(
+                'UPDATE jobs SET status = ?, error = ? WHERE status = ? AND heartbeat_at < ? AND attempts >= ?',
+                (FAILED, 'stale', RUNNING, stale, self.max_attempts),
+            )
+            self.connection.execute(
+                'UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?',
+                (PENDING, RUNNING, stale),
+            )
+            row = self.connection.execute(
+                'SELECT id, spec FROM jobs WHERE status = ? ORDER BY id LIMIT 1', (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                'UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, heartbeat_at = ? WHERE id = ?',
+                (RUNNING, worker, now, row[0]),
+            )
+            return row[0], json.loads(row[1])
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """ Renew the heartbeat of a running job, False when the job was requeued or finished in the meantime
+        """
+        cursor = self.connection.execute(
+            'UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND worker = ?',
+            (time.time(), job_id, RUNNING, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: dict) -> bool:
+        """ Record the result of a job running for worker, False when the job was requeued or finished in the meantime
+        """
+        cursor = self.connection.execute(
+            'UPDATE jobs SET status = ?, result = ?, error = NULL WHERE id = ? AND status = ? AND worker = ?',
+            (DONE, json.dumps(result), job_id, RUNNING, worker),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str):
+        """ Requeue a job that raised, or mark it failed after max_attempts claims
+        """
+        with self._transaction():
+            self.connection.execute(
+                'UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, error = ? '
+                'WHERE id = ? AND status = ? AND worker = ?',
+                (self.max_attempts, FAILED, PENDING, error, job_id, RUNNING, worker),
+            )
+
+    def counts(self) -> dict:
+        """ Number of jobs by status
+        """
+        counts = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+        for status, count in self.connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'):
+            counts[status] = count
+        return counts
+
+    def results(self):
+        """ Yield the (spec, result) of every done job in the order the jobs were added
+        """
+        for spec, result in self.connection.execute('SELECT spec, result FROM jobs WHERE status = ? ORDER BY id', (DONE,)):
+            yield json.loads(spec), json.loads(result)
+
+    def failures(self) -> list:
+        """ (spec, error) of every failed job
+        """
+        rows = self.connection.execute('SELECT spec, error FROM jobs WHERE status = ? ORDER BY id', (FAILED,))
+        return [(json.loads(spec), error) for spec, error in rows]
+
+    def _count(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+
+class _Transaction(object):
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, type, value, traceback):
+        self.connection.execute('COMMIT' if type is None else 'ROLLBACK')
@@ -0,0 +1,175 @@
+""" League evaluation of a pool of Zole agents with Glicko ratings
+
+    Every agent has an Elo-scale rating and a rating deviation, the uncertainty of the rating. A match seats three
+    agents for a block of games, rotating their seats so that each plays every seat equally often, and ranks them by
+    their mean payoff. Each pair of the three counts as a game won, lost or drawn in a Glicko-1 update, so ratings are
+    updated after every match.
+
+    Matches are scheduled where the ratings are most uncertain: the agent with the largest deviation is seated with
+    the two opponents whose results are the least predictable, the closest in rating with the largest deviations.
+    The league state is a JSON file written after every match, so a run can be stopped and resumed, and agents can be
+    added to an existing league.
+"""
+import json
+import math
+import os
+
+import numpy as np
+
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+MIN_DEVIATION = 30.0
+_q = math.log(10) / 400
+
+
+def _g(deviation):
+    return 1 / np.sqrt(1 + 3 * _q ** 2 * np.square(deviation) / math.pi ** 2)
+
+
+def expected_score(rating: float, opponent_rating, opponent_deviation):
+    """ Expected score of an agent against opponents, from their ratings and deviations
+    """
+    return 1 / (1 + 10 ** (-_g(opponent_deviation) * (rating - np.asarray(opponent_rating)) / 400))
+
+
+def glicko_update(rating: float, deviation: float, opponent_ratings, opponent_deviations, scores) -> tuple:
+    """ Glicko-1 update of a rating and deviation after games with scores 1 (won), 0.5 (drawn) or 0 (lost)
+    """
+    g = _g(opponent_deviations)
+    expected = expected_score(rating, opponent_ratings, opponent_deviations)
+    d_inverse = _q ** 2 * np.sum(np.square(g) * expected * (1 - expected))
+    variance = 1 / (1 / deviation ** 2 + d_inverse)
+    rating += _q * variance * np.sum(g * (np.asarray(scores) - expected))
+    return float(rating), max(float(math.sqrt(variance)), MIN_DEVIATION)
+
+
+def match_scores(payoffs) -> np.ndarray:
+    """ Pairwise scores of the seated agents from their mean payoffs, scores[i, j] is 1 when i did better than j
+    """
+    payoffs = np.asarray(payoffs, dtype=np.float64)
+    return 0.5 * (1 + np.sign(payoffs[:, None] - payoffs[None, :]))
+
+
+class League(object):
+
+    def __init__(self, path: str):
+        """ Open the league state file, an empty league when it does not exist
+
+        Args:
+            path (str): The JSON state file
+        """
+        self.path = path
+        self.agents: dict = {}
+        self.num_matches = 0
+        self.num_games = 0
+        self.history: list = []
+        if os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+            self.agents = state['agents']
+            self.num_matches = state['num_matches']
+            self.num_games = state['num_games']
+            self.history = state['history']
+
+    def add_agent(self, name: str, spec: str):
+        """ Add an agent to the league, agents already in it keep their ratings
+        """
+        if name not in self.agents:
+            self.agents[name] = {
+                'spec': spec,
+                'rating': INITIAL_RATING,
+                'deviation': INITIAL_DEVIATION,
+                'matches': 0,
+                'games': 0,
+                'payoff': 0.0,
+            }
+
+    def save(self):
+        state = {
+            'agents': self.agents,
+            'num_matches': self.num_matches,
+            'num_games': self.num_games,
+            'history': self.history,
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump(state, file, indent=1)
+        os.replace(self.path + '.tmp', self.path)
+
+    def max_deviation(self) -> float:
+        return max(agent['deviation'] for agent in self.agents.values())
+
+    def schedule(self, np_random: np.random.RandomState) -> list:
+        """ Return the names of the three agents of the next match
+        """
+        if len(self.agents) < 3:
+            raise Exception(f'League: at least 3 agents are needed, got {len(self.agents)}')
+        names = list(self.agents)
+        ratings = np.array([self.agents[name]['rating'] for name in names])
+        deviations = np.array([self.agents[name]['deviation'] for name in names])
+        matches = np.array([self.agents[name]['matches'] for name in names])
+
+        # the most uncertain agent, the least played one on ties, random among equals
+        order = np.lexsort((np_random.random_sample(len(names)), matches, -deviations))
+        focus = order[0]
+
+        # the information of a game grows with the outcome uncertainty and the deviations of the opponents
+        expected = expected_score(ratings[focus], ratings, deviations)
+        information = expected * (1 - expected) * np.square(deviations * _g(deviations))
+        information += np_random.random_sample(len(names)) * 1e-9
+        information[focus] = -np.inf
+        opponents = np.argsort(-information)[:2]
+        return [names[focus]] + [names[index] for index in opponents]
+
+    def record_match(self, names: list, payoffs: list, num_games: int):
+        """ Update the ratings of the seated agents with their mean payoffs over a match of num_games games
+        """
+        scores = match_scores(payoffs)
+        previous = {name: (self.agents[name]['rating'], self.agents[name]['deviation']) for name in names}
+        for index, name in enumerate(names):
+            opponents = [other for other in range(len(names)) if other != index]
+            agent = self.agents[name]
+            agent['rating'], agent['deviation'] = glicko_update(
+                *previous[name],
+                [previous[names[other]][0] for other in opponents],
+                [previous[names[other]][1] for other in opponents],
+                scores[index, opponents],
+            )
+            agent['matches'] += 1
+            agent['games'] += num_games
+            agent['payoff'] += float(payoffs[index]) * num_games
+
+        self.num_matches += 1
+        self.num_games += num_games
+        self.history.append({'agents': names, 'payoffs': [float(payoff) for payoff in payoffs], 'games': num_games})
+
+    def standings(self) -> list:
+        """ Agents sorted by their conservative rating, the rating minus two deviations
+        """
+        return sorted(
+            self.agents.items(),
+            key=lambda item: item[1]['rating'] - 2 * item[1]['deviation'],
+            reverse=True,
+        )
+
+
+def play_match(env, agents: list, num_games: int) -> tuple:
+    """ Play num_games games rounded up to a multiple of 3, rotating the seats of the agents every game
+
+    Returns:
+        payoffs (list): The mean payoff of every agent
+        num_games (int): The number of games played
+    """
+    num_agents = len(agents)
+    rotations = math.ceil(num_games / num_agents)
+    total = np.zeros(num_agents)
+    for _ in range(rotations):
+        for shift in range(num_agents):
+            seats = [(seat + shift) % num_agents for seat in range(num_agents)]
+            env.set_agents([agents[index] for index in seats])
+            _, payoffs = env.run(is_training=False)
+            for seat, index in enumerate(seats):
+                total[index] += payoffs[seat]
+    games = rotations * num_agents
+    return list(total / games), games
@@ -34,16 +34,30 @@ class Logger(object):
             'score_0',
             'score_1',
             'score_2',
+            'score_se_0',
+            'score_se_1',
+            'score_se_2',
+            'score_ci_low_0',
+            'score_ci_low_1',
+            'score_ci_low_2',
+            'score_ci_high_0',
+            'score_ci_high_1',
+            'score_ci_high_2',
+            'games',
+            'decision',
         ]
         self.writer = csv.DictWriter(self.csv_file, fieldnames=fieldnames)
         self.writer.writeheader()
 
         return self
 
-    def log_performance(self, large_win: list[str], small_win: list[str], as_large: list[str], score: list[float]):
-        """ Log a point in the curve
+    def log_performance(self, large_win: list[str], small_win: list[str], as_large: list[str], score: list[float],
+                        score_se: list[float] or None = None, score_ci: list or None = None, games: int or None = None,
+                        decision: str or None = None):
+        """ Log a point in the curve, with the standard errors and (low, high) confidence intervals of the scores,
+            the number of games and the decision of a sequential comparison when given
         """
-        self.writer.writerow({
+        row = {
             'large_win_0': float(large_win[0]),
             'large_win_1': float(large_win[1]),
             'large_win_2': float(large_win[2]),
@@ -56,7 +70,16 @@ class Logger(object):
             'score_0': float(score[0]),
             'score_1': float(score[1]),
             'score_2': float(score[2]),
-        })
+            'games': games,
+            'decision': decision,
+        }
+        for index in range(3):
+            if score_se is not None:
+                row[f'score_se_{index}'] = float(score_se[index])
+            if score_ci is not None:
+                row[f'score_ci_low_{index}'] = float(score_ci[index][0])
+                row[f'score_ci_high_{index}'] = float(score_ci[index][1])
+        self.writer.writerow(row)
 
     def __exit__(self, type, value, traceback):
         if self.csv_path is not None:
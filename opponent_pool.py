@@ -0,0 +1,169 @@
+""" Opponent pool of frozen policies for DQN/NFSP training, see rl_training.py --opponent_pool
+
+    Opponent seats sample from random and heuristic agents, exported .npz artifacts and snapshots of the learning
+    agents, exported at every checkpoint. Frozen networks are ZoleNumpyAgents with read-only weights, loaded once
+    into a size-capped cache and shared by every seat and game that samples them. A policy evicted from the cache is
+    loaded again from its file the next time it is sampled.
+
+    Games are played in lockstep with run_games: at every step the games whose current player is the same frozen
+    network are predicted with one forward pass.
+"""
+from collections import OrderedDict
+
+from defined_agents import get_heuristic_agent, get_path_agent, get_random_agent
+
+import os
+import re
+
+import numpy as np
+
+
+_snapshot_file_pattern = re.compile(r'(\d+)_(\d+)\.npz$')
+
+
+class FrozenPolicyCache(object):
+    def __init__(self, env, max_policies: int = 8):
+        """ Initialize the cache
+
+        Args:
+            env (ZoleEnv): the environment the policies play in
+            max_policies (int): the number of policies kept loaded, the least recently used is evicted
+        """
+        self.env = env
+        self.max_policies = max_policies
+        self.policies: OrderedDict = OrderedDict()  # spec: agent, least recently used first
+        self.num_loads: int = 0
+
+    def get(self, spec: str):
+        """ Return the policy of spec: 'random', 'heuristic' or an agent file
+        """
+        if spec in self.policies:
+            self.policies.move_to_end(spec)
+            return self.policies[spec]
+        policy = self._load(spec)
+        self.num_loads += 1
+        self.policies[spec] = policy
+        while len(self.policies) > self.max_policies:
+            self.policies.popitem(last=False)
+        return policy
+
+    def _load(self, spec: str):
+        if spec == 'random':
+            return get_random_agent(self.env)
+        if spec == 'heuristic':
+            return get_heuristic_agent(self.env)
+        policy = get_path_agent(spec)
+        return policy.freeze() if hasattr(policy, 'freeze') else policy
+
+
+class OpponentPool(object):
+    def __init__(self, specs: list, cache: FrozenPolicyCache, snapshot_dir: str, max_snapshots: int = 8, seed: int or None = None):
+        """ Initialize the opponent pool
+
+        Args:
+            specs (list): 'random', 'heuristic', agent files or directories of .npz/.pth agent files
+            cache (FrozenPolicyCache): the loaded policies
+            snapshot_dir (str): the directory the snapshots of the learning agents are exported to
+            max_snapshots (int): the number of most recent snapshots in the pool
+            seed (int): seed of the opponent sampling
+        """
+        self.specs = []
+        for spec in specs:
+            if os.path.isdir(spec):
+                files = sorted(file for file in os.listdir(spec) if file.endswith(('.pth', '.npz')))
+                self.specs.extend(os.path.join(spec, file) for file in files)
+            else:
+                self.specs.append(spec)
+        self.cache = cache
+        self.snapshot_dir = snapshot_dir
+        self.max_snapshots = max_snapshots
+        self.np_random = np.random.RandomState(seed)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        # a resumed training continues with the snapshots of the earlier run
+        files = [file for file in os.listdir(snapshot_dir) if _snapshot_file_pattern.match(file)]
+        files.sort(key=lambda file: int(_snapshot_file_pattern.match(file).group(2)))
+        self.snapshots: list = [os.path.join(snapshot_dir, file) for file in files]
+        self._drop_snapshots()
+
+    def add_snapshots(self, agents: list, episode: int):
+        """ Export the learning agents to the snapshot dir and add them to the pool, dropping the oldest snapshots
+        """
+        from zole_export import export_agent
+
+        for agent_id, agent in enumerate(agents):
+            path = os.path.join(self.snapshot_dir, f'{agent_id}_{episode}.npz')
+            export_agent(agent).save_npz(path)
+            self.snapshots.append(path)
+        self._drop_snapshots()
+
+    def _drop_snapshots(self):
+        # dropped snapshots are deleted, a cached copy stays loaded until it is evicted
+        while len(self.snapshots) > self.max_snapshots:
+            os.remove(self.snapshots.pop(0))
+
+    def sample(self):
+        """ Return a random policy of the pool
+        """
+        specs = self.specs + self.snapshots
+        if not specs:
+            raise Exception('OpponentPool: no opponents')
+        return self.cache.get(specs[self.np_random.randint(len(specs))])
+
+    def seat_agents(self, agents: list, learning_seat: int, pool_ratio: float) -> list:
+        """ Seat the learning agents, every seat but learning_seat is taken by a pool opponent with probability
+            pool_ratio
+        """
+        return [
+            self.sample() if seat != learning_seat and self.np_random.random_sample() < pool_ratio else agent
+            for seat, agent in enumerate(agents)
+        ]
+
+
+def run_games(envs: list, seat_agents: list, is_training: bool = False) -> list:
+    """ Run a game in every environment in lockstep, the same as env.run for every game. At every step the games
+        waiting for the same agent with eval_steps are predicted in one batch.
+
+    Args:
+        envs (list): the environments
+        seat_agents (list): the agents of every seat of every game
+        is_training (bool): learning agents explore with step, agents with eval_steps act greedily as in their step
+
+    Returns:
+        (list): the (trajectories, payoffs) of every game
+    """
+    trajectories = [[[] for _ in range(env.num_players)] for env in envs]
+    states, player_ids = [], []
+    for index, env in enumerate(envs):
+        state, player_id = env.reset()
+        trajectories[index][player_id].append(state)
+        states.append(state)
+        player_ids.append(player_id)
+
+    active = [index for index, env in enumerate(envs) if not env.is_over()]
+    while active:
+        groups = {}
+        for index in active:
+            agent = seat_agents[index][player_ids[index]]
+            groups.setdefault(id(agent), (agent, []))[1].append(index)
+        for agent, indices in groups.values():
+            if hasattr(agent, 'eval_steps'):
+                actions = agent.eval_steps([states[index] for index in indices])
+            elif is_training:
+                actions = [agent.step(states[index]) for index in indices]
+            else:
+                actions = [agent.eval_step(states[index])[0] for index in indices]
+            for index, action in zip(indices, actions):
+                env = envs[index]
+                next_state, next_player_id = env.step(action, agent.use_raw)
+                trajectories[index][player_ids[index]].append(action)
+                states[index], player_ids[index] = next_state, next_player_id
+                if not env.game.is_over():
+                    trajectories[index][next_player_id].append(next_state)
+        active = [index for index in active if not envs[index].is_over()]
+
+    results = []
+    for index, env in enumerate(envs):
+        for player_id in range(env.num_players):
+            trajectories[index][player_id].append(env.get_state(player_id))
+        results.append((trajectories[index], env.get_payoffs()))
+    return results
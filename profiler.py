@@ -0,0 +1,192 @@
+""" Opt-in stage profiler for the Zole environment and training scripts
+
+    Timings are bucketed into fixed log-spaced histograms, so memory stays constant no matter how many steps
+    are recorded. When profiling is disabled the environment holds a NullProfiler and no method is wrapped,
+    which keeps the hot path identical to the uninstrumented code.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+import numpy as np
+
+
+# Histogram bucket upper edges in nanoseconds: 100ns .. 10s, four buckets per decade
+HISTOGRAM_EDGES_NS = np.logspace(2, 10, num=33).tolist()
+
+
+class StageStats(object):
+    """ Count, total, min, max and a log-spaced histogram of the durations of one stage
+    """
+
+    def __init__(self):
+        self.count: int = 0
+        self.total_ns: int = 0
+        self.min_ns: int or None = None
+        self.max_ns: int = 0
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_NS) + 1)
+
+    def add(self, elapsed_ns: int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if self.min_ns is None or elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[bisect_left(HISTOGRAM_EDGES_NS, elapsed_ns)] += 1
+
+    def percentile_ns(self, q: float) -> float:
+        """ Approximate percentile, returns the upper edge of the bucket that holds the q-th duration
+        """
+        if self.count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.histogram), q / 100 * self.count))
+        if index >= len(HISTOGRAM_EDGES_NS):
+            return float(self.max_ns)
+        return float(min(HISTOGRAM_EDGES_NS[index], self.max_ns))
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_us': self.total_ns / self.count / 1e3 if self.count else 0.0,
+            'min_us': (self.min_ns or 0) / 1e3,
+            'p50_us': self.percentile_ns(50) / 1e3,
+            'p95_us': self.percentile_ns(95) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+
+
+class StageProfiler(object):
+    """ Records per-stage timings and counts
+
+        Stages may nest (e.g. `extract_state` contains `get_legal_actions`), reported times are inclusive.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages: dict[str, StageStats] = {}
+
+    def record(self, stage: str, elapsed_ns: int):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.add(elapsed_ns)
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter_ns() - start)
+
+    def instrument(self, obj, method_name: str, stage: str or None = None):
+        """ Replace obj.method_name on the instance with a timed wrapper
+
+        Args:
+            obj: The object whose bound method is timed
+            method_name (str): The name of the method
+            stage (str): The stage name, defaults to method_name
+        """
+        setattr(obj, method_name, _TimedMethod(self, stage or method_name, getattr(obj, method_name)))
+
+    def summary(self) -> dict:
+        return {stage: stats.to_dict() for stage, stats in sorted(self.stages.items())}
+
+    def histograms(self) -> dict:
+        return {
+            'edges_us': [edge / 1e3 for edge in HISTOGRAM_EDGES_NS],
+            'stages': {stage: list(stats.histogram) for stage, stats in sorted(self.stages.items())},
+        }
+
+    def export(self, path: str):
+        """ Write the summary and histograms as json
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'summary': self.summary(), 'histograms': self.histograms()}, file, indent=2)
+
+    def display(self):
+        print(f'{"stage":<24}{"count":>10}{"total ms":>12}{"mean us":>10}{"p50 us":>10}{"p95 us":>10}{"max us":>10}')
+        for stage, row in self.summary().items():
+            print(
+                f'{stage:<24}{row["count"]:>10}{row["total_ms"]:>12.1f}{row["mean_us"]:>10.1f}'
+                f'{row["p50_us"]:>10.1f}{row["p95_us"]:>10.1f}{row["max_us"]:>10.1f}'
+            )
+
+
+class NullProfiler(object):
+    """ Profiler used when profiling is disabled, callers check `enabled` before timing anything
+    """
+    enabled = False
+
+    def record(self, stage: str, elapsed_ns: int):
+        pass
+
+    def stage(self, stage: str):
+        return _NULL_STAGE
+
+    def instrument(self, obj, method_name: str, stage: str or None = None):
+        pass
+
+
+class ProfiledAgent(object):
+    """ Wraps an agent so that step and eval_step are timed as `agent_<index>_step` / `agent_<index>_eval_step`
+
+        The wrapped agent itself is left untouched so that it can still be pickled by the training scripts.
+    """
+
+    def __init__(self, agent, profiler: StageProfiler, index: int):
+        self.agent = agent
+        self.profiler = profiler
+        self.use_raw = agent.use_raw
+        self._step_stage = f'agent_{index}_step'
+        self._eval_step_stage = f'agent_{index}_eval_step'
+
+    def step(self, state):
+        start = perf_counter_ns()
+        action = self.agent.step(state)
+        self.profiler.record(self._step_stage, perf_counter_ns() - start)
+        return action
+
+    def eval_step(self, state):
+        start = perf_counter_ns()
+        result = self.agent.eval_step(state)
+        self.profiler.record(self._eval_step_stage, perf_counter_ns() - start)
+        return result
+
+    def __getattr__(self, name):
+        if name == 'agent':
+            raise AttributeError(name)
+        return getattr(self.agent, name)
+
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _TimedMethod(object):
+    # A class rather than a closure so that instrumented objects stay picklable
+    def __init__(self, profiler: StageProfiler, stage: str, method):
+        self.profiler = profiler
+        self.stage = stage
+        self.method = method
+
+    def __call__(self, *args, **kwargs):
+        start = perf_counter_ns()
+        result = self.method(*args, **kwargs)
+        self.profiler.record(self.stage, perf_counter_ns() - start)
+        return result
@@ -0,0 +1,59 @@
+""" Faster inference paths of DMC/DQN/NFSP agents for evaluation
+
+    'numpy' runs the network exported by zole_export.py with ZoleNumpyAgent, 'int8' quantizes the linear layers with
+    torch dynamic quantization, activations stay float. Both are only meant for evaluation, `evaluation_agent`
+    refuses a copy whose actions drift from the fp32 agent beyond a threshold.
+"""
+import copy
+
+import torch
+from torch import nn
+from torch.ao.quantization import quantize_dynamic
+
+from zole_export import action_agreement, export_agent
+
+
+INFERENCE_MODES = ('fp32', 'numpy', 'int8')
+
+
+def quantize_agent(agent):
+    """ Return an evaluation copy of a DMCAgent, ZoleDMCAgent, DQNAgent or NFSPAgent with int8 linear layers
+    """
+    quantized = copy.copy(agent)
+    agent_type = type(agent).__name__
+    if agent_type in ('DMCAgent', 'ZoleDMCAgent'):
+        quantized.net = _quantize_module(agent.net)
+    elif agent_type == 'DQNAgent':
+        quantized.q_estimator = copy.copy(agent.q_estimator)
+        quantized.q_estimator.qnet = _quantize_module(agent.q_estimator.qnet)
+    elif agent_type == 'NFSPAgent':
+        quantized.policy_network = _quantize_module(agent.policy_network)
+        quantized._rl_agent = quantize_agent(agent._rl_agent)
+    else:
+        raise Exception(f'quantization: unsupported agent type {agent_type}')
+    return quantized
+
+
+def evaluation_agent(agent, mode: str, env, num_games: int, min_agreement: float):
+    """ Return the agent running with the inference mode and its action agreement with the fp32 agent on num_games
+        games, raising when the agreement is below min_agreement
+    """
+    if mode == 'fp32':
+        return agent, 1.0
+    if mode == 'numpy':
+        candidate = export_agent(agent)
+    elif mode == 'int8':
+        candidate = quantize_agent(agent)
+    else:
+        raise Exception(f'quantization: unknown inference mode {mode}, expected one of {INFERENCE_MODES}')
+
+    agreement = action_agreement(agent, candidate, env, num_games)
+    if agreement < min_agreement:
+        raise Exception(f'quantization: {mode} action agreement {agreement:.4f} is below {min_agreement}')
+    return candidate, agreement
+
+
+def _quantize_module(module: nn.Module) -> nn.Module:
+    module = copy.deepcopy(module).to('cpu').eval()
+    with torch.no_grad():
+        return quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
@@ -1,30 +1,30 @@
 """ An example of training a reinforcement learning agent on the environments in RLCard
 """
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from envs.zole import ZoleEnv
 
 import os
 import argparse
 import timeit
-from time import sleep
-from datetime import datetime
 
-from rlcard.agents import NFSPAgent, DQNAgent
+if TYPE_CHECKING:
+    from rlcard.agents import NFSPAgent, DQNAgent
 from rlcard.utils import (
     get_device,
     set_seed,
     reorganize,
 )
 
-import torch
+import numpy as np
 
+from augmentation import augment_transitions
+from opponent_pool import FrozenPolicyCache, OpponentPool, run_games
+from profiler import NullProfiler, StageProfiler
 
-def get_dqn_agents(env: ZoleEnv, device, log_dir) -> list[DQNAgent]:
-    # TODO: load agents from path
-    # if args.load_model_path != "":
-    #     agent = torch.load(args.load_model_path)
-    # else:
+
+def get_dqn_agents(env: ZoleEnv, device) -> list['DQNAgent']:
+    from rlcard.agents import DQNAgent
 
     agents = []
     for i in range(3):
@@ -34,19 +34,14 @@ def get_dqn_agents(env: ZoleEnv, device, log_dir) -> list[DQNAgent]:
                 state_shape=env.state_shape[0],
                 mlp_layers=[64, 64],
                 device=device,
-                save_path=log_dir,
-                save_every=args.save_every
             )
         )
 
     return agents
 
 
-def get_nfsp_agents(env: ZoleEnv, device, log_dir) -> list[NFSPAgent]:
-    # TODO: load agents from path
-    # if args.load_model_path != "":
-    #     agent = torch.load(args.load_model_path)
-    # else:
+def get_nfsp_agents(env: ZoleEnv, device) -> list['NFSPAgent']:
+    from rlcard.agents import NFSPAgent
 
     agents = []
     for i in range(3):
@@ -57,15 +52,13 @@ def get_nfsp_agents(env: ZoleEnv, device, log_dir) -> list[NFSPAgent]:
                 hidden_layers_sizes=[64, 64],
                 q_mlp_layers=[64, 64],
                 device=device,
-                save_path=log_dir,
-                save_every=args.save_every
             )
         )
 
     return agents
 
 
-def get_configured_environment(args, log_dir) -> tuple[ZoleEnv, list[Any]]:
+def get_configured_environment(args, profiler) -> tuple[ZoleEnv, list[Any]]:
     # Seed numpy, torch, random
     set_seed(args.seed)
     # Check whether gpu is available
@@ -76,28 +69,79 @@ def get_configured_environment(args, log_dir) -> tuple[ZoleEnv, list[Any]]:
         'seed': args.seed,
         'large_win_incentive': args.large_win_incentive,
         'allow_step_back': False,
+        'trajectory_views': True,
+        'profiler': profiler,
     })
 
     # Initialize the agent and use random agents as opponents
     if args.algorithm == 'dqn':
-        agents = get_dqn_agents(env, device, log_dir)
+        agents = get_dqn_agents(env, device)
     else:  # args.algorithm == 'nfsp'
-        agents = get_nfsp_agents(env, device, log_dir)
+        agents = get_nfsp_agents(env, device)
 
     env.set_agents(agents)
 
     return env, agents
 
 
+def get_pool_envs(args, env: ZoleEnv) -> list[ZoleEnv]:
+    """ The environments of the games played in lockstep with an opponent pool, env and num_envs - 1 more
+    """
+    envs = [env]
+    for index in range(1, args.num_envs):
+        envs.append(ZoleEnv(config={
+            'seed': args.seed + index,
+            'large_win_incentive': args.large_win_incentive,
+            'allow_step_back': False,
+            'trajectory_views': True,
+            'display_performance_interval': 10 ** 9,
+        }))
+    return envs
+
+
 def train(args):
+    # before the first import of torch, by checkpoint_manager and rlcard.agents
+    os.environ["CUDA_VISIBLE_DEVICES"] = args.cuda
+    from checkpoint_manager import CheckpointManager, feed, find_checkpoint
+
+    if args.save_every is not None:
+        print('--save_every is no longer used, checkpoints are saved every --save_interval minutes')
     log_dir = os.path.join(args.log_dir, args.algorithm + '_result', args.env)
     os.makedirs(log_dir, exist_ok=True)
 
-    env, agents = get_configured_environment(args, log_dir)
+    profiler = StageProfiler() if args.profile else NullProfiler()
+    env, agents = get_configured_environment(args, profiler)
 
+    start_episode = 0
+    if args.load_model_path:
+        checkpoint_path = find_checkpoint(args.load_model_path)
+        checkpoint = CheckpointManager.load(checkpoint_path)
+        CheckpointManager.restore(agents, checkpoint)
+        start_episode = checkpoint['episode'] + 1
+        print('Resuming from', checkpoint_path, 'at episode', start_episode)
+    checkpoints = CheckpointManager(
+        os.path.join(log_dir, 'checkpoints'),
+        keep_last=args.keep_last,
+        keep_every=args.keep_every,
+    )
+
+    pool = None
+    if args.opponent_pool:
+        # opponent seats sample frozen policies, learning agents are only fed the seats they played
+        pool = OpponentPool(
+            args.opponent_pool,
+            FrozenPolicyCache(env, max_policies=args.pool_cache_size),
+            os.path.join(log_dir, 'pool'),
+            max_snapshots=args.pool_snapshots,
+            seed=args.seed,
+        )
+        envs = get_pool_envs(args, env)
+
+    augment_random = np.random.RandomState(args.seed)
     timer = timeit.default_timer
     last_checkpoint_time = timer() - args.save_interval * 60
-    for episode in range(args.num_episodes):
+    episode = start_episode
+    while episode < args.num_episodes:
 
         if args.algorithm == 'nfsp':
             agents[0].sample_episode_policy()
@@ -105,27 +149,49 @@ def train(args):
             agents[2].sample_episode_policy()
 
         # Generate data from the environment
-        trajectories, payoffs = env.run(is_training=True)
+        with profiler.stage('env_run'):
+            if pool:
+                seat_agents = [
+                    pool.seat_agents(agents, (episode + index) % 3, args.pool_ratio) for index in range(len(envs))
+                ]
+                results = run_games(envs, seat_agents, is_training=True)
+            else:
+                seat_agents = [agents]
+                results = [env.run(is_training=True)]
 
-        # Reorganaize the data to be state, action, reward, next_state, done
-        trajectories = reorganize(trajectories, payoffs)
+        for seats, (trajectories, payoffs) in zip(seat_agents, results):
+            # Reorganaize the data to be state, action, reward, next_state, done
+            with profiler.stage('reorganize'):
+                trajectories = reorganize(trajectories, payoffs)
 
-        for agent_id in range(3):
-            for ts in trajectories[agent_id]:
-                agents[agent_id].feed(ts)
+            learning_ids = [agent_id for agent_id in range(3) if seats[agent_id] is agents[agent_id]]
+            if args.augment:
+                with profiler.stage('augment'):
+                    for agent_id in learning_ids:
+                        trajectories[agent_id] += augment_transitions(trajectories[agent_id], augment_random, args.augment)
+
+            for agent_id in learning_ids:
+                for ts in trajectories[agent_id]:
+                    with profiler.stage(f'agent_{agent_id}_feed'):
+                        feed(agents[agent_id], ts)
+        episode += len(results)
 
         if timer() - last_checkpoint_time > args.save_interval * 60:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-            for agent_id in range(3):
-                save_path = os.path.join(log_dir, f'{agent_id}', f'model_{timestamp}.pth')
-                torch.save(agents[agent_id], save_path)
-            print('\nModels saved in', log_dir)
+            with profiler.stage('checkpoint'):
+                checkpoints.save(agents, episode - 1)
+                if pool:
+                    pool.add_snapshots(agents, episode - 1)
+            print('\nCheckpoint saved in', checkpoints.directory)
+            if profiler.enabled:
+                profiler.display()
+                profiler.export(os.path.join(log_dir, 'profile.json'))
             last_checkpoint_time = timer()
-            sleep(1)
 
+    checkpoints.save(agents, args.num_episodes - 1)
+    checkpoints.close()
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser("DQN/NFSP example in RLCard")
+
+def add_arguments(parser: argparse.ArgumentParser):
     parser.add_argument(
         '--env',
         type=str,
@@ -167,24 +233,86 @@ if __name__ == '__main__':
         "--load_model_path",
         type=str,
         default="",
+        help='Checkpoint file, or checkpoint directory to resume from its latest checkpoint',
     )
     parser.add_argument(
         "--save_every",
         type=int,
-        default=100000
+        default=None,
+        help=argparse.SUPPRESS,  # the step interval of the rlcard agents' own checkpoints, accepted and ignored
     )
     parser.add_argument(
         "--save_interval",
         type=int,
-        default=15
+        default=15,
+        help='Minutes between checkpoints',
+    )
+    parser.add_argument(
+        '--keep_last',
+        type=int,
+        default=3,
+        help='Number of most recent checkpoints kept',
+    )
+    parser.add_argument(
+        '--keep_every',
+        type=int,
+        default=10,
+        help='Every keep_every-th checkpoint is kept as well, 0 keeps only the most recent ones',
     )
     parser.add_argument(
         '--large_win_incentive',
         type=int,
         default=0,
     )
+    parser.add_argument(
+        '--augment',
+        type=int,
+        default=0,
+        help='Feed this many suit-permuted and seat-rotated copies of every transition, at most 17',
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Record per-stage timings, exported to profile.json in the log dir at every checkpoint',
+    )
+    parser.add_argument(
+        '--opponent_pool',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Train against a pool of random, heuristic, agent files or directories of .npz/.pth agent files, '
+             'with snapshots of the learning agents added at every checkpoint. Without it the agents only play '
+             'each other',
+    )
+    parser.add_argument(
+        '--pool_ratio',
+        type=float,
+        default=0.5,
+        help='Probability that an opponent seat is taken by a pool policy, one seat per game always learns',
+    )
+    parser.add_argument(
+        '--pool_snapshots',
+        type=int,
+        default=8,
+        help='Number of most recent snapshots of the learning agents in the pool',
+    )
+    parser.add_argument(
+        '--pool_cache_size',
+        type=int,
+        default=8,
+        help='Number of frozen policies kept loaded',
+    )
+    parser.add_argument(
+        '--num_envs',
+        type=int,
+        default=16,
+        help='Games played in lockstep with an opponent pool, pool policies predict them in batches',
+    )
+
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("DQN/NFSP example in RLCard")
+    add_arguments(parser)
     args = parser.parse_args()
 
-    os.environ["CUDA_VISIBLE_DEVICES"] = args.cuda
     train(args)
@@ -0,0 +1,20 @@
+""" Seeding without rlcard's set_seed, which runs pip freeze and imports torch to find out whether torch is installed
+"""
+import random
+import sys
+
+import numpy as np
+
+
+def set_seed(seed: int or None):
+    """ Seed random and NumPy, and torch when it is already imported. Torch imported afterwards is not seeded, which
+        only matters for training, evaluated agents act greedily or sample with NumPy.
+    """
+    if seed is None:
+        return
+    np.random.seed(seed)
+    random.seed(seed)
+    if 'torch' in sys.modules:
+        torch = sys.modules['torch']
+        torch.backends.cudnn.deterministic = True
+        torch.manual_seed(seed)
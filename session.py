@@ -0,0 +1,99 @@
+""" Sessions of consecutive Zole rounds, the match format of the game
+
+    The three agents keep their seats and the dealer rotates with the board id: round k of a session is played on
+    board first_board_id + k, whose Tray deals from seat (board_id - 1) % 3, so every seat deals every third round.
+    Scores accumulate per seat.
+
+    With the 'pule' settlement a round in which all players pass adds a common pule to the pot. The next large player
+    who wins collects one pule, pule_value from each small player, and a large player who loses pays pule_value to
+    each small player, the pule staying in the pot. With 'none' passed rounds score nothing, as in ZoleEnv.
+
+    Rounds are yielded one by one and only the running totals are kept, so a session of any length uses constant
+    memory.
+"""
+import numpy as np
+
+
+SETTLEMENTS = ('none', 'pule')
+
+
+class Session(object):
+    def __init__(self, env, agents: list, settlement: str = 'pule', pule_value: int = 1, first_board_id: int = 1):
+        """ Initialize a session of the agents in their seat order
+
+        Args:
+            env (ZoleEnv): the environment the rounds are played in
+            agents (list): the agent of every seat
+            settlement (str): 'pule' or 'none', how rounds in which all players pass are settled
+            pule_value (int): points paid by each small player for a pule
+            first_board_id (int): board of the first round
+        """
+        if settlement not in SETTLEMENTS:
+            raise Exception(f'Session: invalid settlement={settlement}')
+        self.env = env
+        self.agents = agents
+        self.settlement = settlement
+        self.pule_value = pule_value
+        self.first_board_id = first_board_id
+        self.num_rounds: int = 0
+        self.num_passed_rounds: int = 0
+        self.pules: int = 0  # common pules in the pot
+        self.scores = np.zeros(len(agents))
+        self.large_counts = np.zeros(len(agents), dtype=int)
+
+    def play_round(self) -> dict:
+        """ Play the next round of the session
+
+        Returns:
+            (dict): the round number, board, dealer, large player, round and pule payoffs of every seat, the pules in
+                the pot and the session scores after the round
+        """
+        game = self.env.game
+        board_id = self.first_board_id + self.num_rounds
+        game.board_id = board_id
+        self.env.set_agents(self.agents)
+        try:
+            _, payoffs = self.env.run(is_training=False)
+        finally:
+            game.board_id = None
+        large_player_id = game.round.large_player_id
+        pule_payoffs = self._settle(large_player_id, payoffs)
+
+        self.num_rounds += 1
+        self.scores += payoffs
+        self.scores += pule_payoffs
+        if large_player_id is None:
+            self.num_passed_rounds += 1
+        else:
+            self.large_counts[large_player_id] += 1
+        return {
+            'round': self.num_rounds,
+            'board_id': int(board_id),
+            'dealer_id': game.round.dealer_id,
+            'large_player_id': large_player_id,
+            'payoffs': [float(payoff) for payoff in payoffs],
+            'pule_payoffs': pule_payoffs.tolist(),
+            'pules': self.pules,
+            'scores': self.scores.tolist(),
+        }
+
+    def play(self, num_rounds: int):
+        """ Yield the results of the next num_rounds rounds
+        """
+        for _ in range(num_rounds):
+            yield self.play_round()
+
+    def _settle(self, large_player_id: int or None, payoffs) -> np.ndarray:
+        pule_payoffs = np.zeros(len(self.agents))
+        if self.settlement != 'pule':
+            return pule_payoffs
+        if large_player_id is None:
+            self.pules += 1
+        elif self.pules:
+            # the large player collects a pule when it wins and pays it to the small players when it loses
+            sign = 1 if payoffs[large_player_id] > 0 else -1
+            pule_payoffs -= sign * self.pule_value
+            pule_payoffs[large_player_id] = sign * self.pule_value * (len(self.agents) - 1)
+            if sign > 0:
+                self.pules -= 1
+        return pule_payoffs
@@ -0,0 +1,47 @@
+import pytest
+import torch
+from rlcard.agents import DQNAgent
+
+from checkpoint_manager import CheckpointManager, find_checkpoint
+
+
+def _agents() -> list:
+    return [DQNAgent(num_actions=4, state_shape=[8], mlp_layers=[8], device='cpu')]
+
+
+def test_background_write_error_is_raised(tmp_path):
+    checkpoints = CheckpointManager(str(tmp_path))
+    agents = _agents()
+    checkpoints.save(agents, episode=0, unpicklable=lambda: None)
+    checkpoints.wait()
+    with pytest.raises(Exception, match='writing a checkpoint'):
+        checkpoints.save(agents, episode=1)
+    # the error is raised once
+    checkpoints.save(agents, episode=2)
+    checkpoints.save(agents, episode=3, unpicklable=lambda: None)
+    with pytest.raises(Exception, match='writing a checkpoint'):
+        checkpoints.close()
+    assert sorted(path.name for path in tmp_path.glob('*.pt')) == ['checkpoint_000001.pt']
+
+
+def test_retention_keeps_last_and_every_kth(tmp_path):
+    checkpoints = CheckpointManager(str(tmp_path), keep_last=2, keep_every=4, background=False)
+    agents = _agents()
+    for episode in range(11):
+        checkpoints.save(agents, episode=episode)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'checkpoint_000000.pt', 'checkpoint_000004.pt', 'checkpoint_000008.pt',
+        'checkpoint_000009.pt', 'checkpoint_000010.pt',
+    ]
+
+    # a new manager continues the numbering, the restored agents hold the state of the last checkpoint
+    checkpoints = CheckpointManager(str(tmp_path), keep_last=1, keep_every=0)
+    checkpoints.save(agents, episode=11)
+    checkpoints.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['checkpoint_000011.pt']
+    checkpoint = CheckpointManager.load(find_checkpoint(str(tmp_path)))
+    assert checkpoint['episode'] == 11
+    restored = _agents()
+    CheckpointManager.restore(restored, checkpoint)
+    for key, value in agents[0].q_estimator.qnet.state_dict().items():
+        assert torch.equal(restored[0].q_estimator.qnet.state_dict()[key], value)
@@ -0,0 +1,44 @@
+from job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+def _expire_heartbeats(queue: JobQueue):
+    queue.connection.execute('UPDATE jobs SET heartbeat_at = heartbeat_at - ?', (2 * queue.stale_after,))
+
+
+def test_stale_job_is_requeued_then_failed(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), stale_after=60.0, max_attempts=2)
+    assert queue.add_jobs([{'seed': 0}]) == 1
+    job_id, spec = queue.claim('worker-0')
+    assert spec == {'seed': 0}
+    assert queue.heartbeat(job_id, 'worker-0')
+
+    # the heartbeat of worker-0 stops, the next claim requeues the job and hands it to worker-1
+    _expire_heartbeats(queue)
+    assert queue.claim('worker-1') == (job_id, spec)
+    assert queue.counts()[RUNNING] == 1
+    assert not queue.heartbeat(job_id, 'worker-0')
+    assert not queue.complete(job_id, 'worker-0', {'mean': 0})
+
+    # the second stale claim reaches max_attempts, the job is failed instead of requeued
+    _expire_heartbeats(queue)
+    assert queue.claim('worker-2') is None
+    assert queue.counts() == {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 1}
+    assert queue.failures() == [(spec, 'stale')]
+    assert not queue.complete(job_id, 'worker-1', {'mean': 1})
+    queue.close()
+
+
+def test_complete_records_result_of_running_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), stale_after=60.0, max_attempts=3)
+    queue.add_jobs([{'seed': 0}, {'seed': 1}])
+    job_id, _ = queue.claim('worker-0')
+    assert not queue.complete(job_id, 'worker-1', {'mean': 1})
+    assert queue.complete(job_id, 'worker-0', {'mean': 0})
+    assert not queue.complete(job_id, 'worker-0', {'mean': 2})
+    assert not queue.heartbeat(job_id, 'worker-0')
+    assert list(queue.results()) == [({'seed': 0}, {'mean': 0})]
+
+    job_id, _ = queue.claim('worker-0')
+    queue.fail(job_id, 'worker-0', 'error')
+    assert queue.counts()[PENDING] == 1
+    queue.close()
@@ -0,0 +1,26 @@
+import pytest
+
+from league import League, glicko_update, match_scores
+
+
+def test_glicko_update_matches_worked_example():
+    # the example of Glickman's "The Glicko system": a player of 1500 +- 200 beats a 1400 +- 30 player and loses to
+    # players of 1550 +- 100 and 1700 +- 300, the new rating is 1464 +- 151.4
+    rating, deviation = glicko_update(1500, 200, [1400, 1550, 1700], [30, 100, 300], [1, 0, 0])
+    assert rating == pytest.approx(1464.1, abs=0.1)
+    assert deviation == pytest.approx(151.4, abs=0.1)
+
+
+def test_record_match_scores_every_pair(tmp_path):
+    league = League(str(tmp_path / 'league.json'))
+    for name in ('a', 'b', 'c'):
+        league.add_agent(name, 'random')
+    assert match_scores([1.0, -0.5, -0.5]).tolist() == [[0.5, 1, 1], [0, 0.5, 0.5], [0, 0.5, 0.5]]
+
+    league.record_match(['a', 'b', 'c'], [1.0, -0.5, -0.5], num_games=30)
+    a, b, c = (league.agents[name] for name in ('a', 'b', 'c'))
+    assert a['rating'] > 1500 > b['rating']
+    assert b['rating'] == pytest.approx(c['rating'])
+    assert a['rating'] - 1500 == pytest.approx(2 * (1500 - b['rating']))
+    assert all(agent['deviation'] < 350 for agent in (a, b, c))
+    assert a['payoff'] == 30.0 and a['games'] == 30 and a['matches'] == 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import rlcard
+from rlcard.agents import RandomAgent
+
+import envs
+from session import Session
+
+
+def _session(settlement: str, pule_value: int = 1) -> Session:
+    env = rlcard.make('zole', {'seed': 0})
+    agents = [RandomAgent(num_actions=env.num_actions) for _ in range(env.num_players)]
+    return Session(env, agents, settlement=settlement, pule_value=pule_value)
+
+
+def test_pule_settlement():
+    session = _session('pule', pule_value=2)
+    assert session._settle(None, [0, 0, 0]).tolist() == [0, 0, 0]
+    assert session._settle(None, [0, 0, 0]).tolist() == [0, 0, 0]
+    assert session.pules == 2
+    # a losing large player pays every small player and the pule stays in the pot
+    assert session._settle(1, [1, -2, 1]).tolist() == [2, -4, 2]
+    assert session.pules == 2
+    # a winning large player collects one pule
+    assert session._settle(0, [4, -2, -2]).tolist() == [4, -2, -2]
+    assert session.pules == 1
+    assert session._settle(2, [-1, -1, 2]).tolist() == [-2, -2, 4]
+    assert session.pules == 0
+    assert session._settle(2, [-1, -1, 2]).tolist() == [0, 0, 0]
+
+
+def test_session_scores_add_up():
+    for settlement in ('pule', 'none'):
+        session = _session(settlement)
+        payoff_totals = np.zeros(3)
+        pule_totals = np.zeros(3)
+        pules = 0
+        for index, result in enumerate(session.play(60)):
+            assert result['board_id'] == index + 1
+            assert result['dealer_id'] == index % 3
+            assert sum(result['pule_payoffs']) == 0
+            if result['large_player_id'] is None:
+                pules += settlement == 'pule'
+            elif pules and result['payoffs'][result['large_player_id']] > 0:
+                pules -= 1
+            assert result['pules'] == pules
+            payoff_totals += result['payoffs']
+            pule_totals += result['pule_payoffs']
+            assert result['scores'] == pytest.approx((payoff_totals + pule_totals).tolist())
+        assert session.num_rounds == 60
+        assert session.num_passed_rounds + session.large_counts.sum() == 60
+        assert pule_totals.any() == (settlement == 'pule')
+
+
+def test_invalid_settlement():
+    with pytest.raises(Exception):
+        _session('doubled')
@@ -0,0 +1,28 @@
+import math
+
+import numpy as np
+import pytest
+
+from tournament_stats import confidence_sequence_radius
+
+
+def test_confidence_sequence_radius_value():
+    # at rho games the radius is std * sqrt(2 * log(2 / alpha ** 2) / rho)
+    assert confidence_sequence_radius(250, 2.0, alpha=0.05, rho=250.0) == pytest.approx(
+        2.0 * math.sqrt(2 * math.log(2 / 0.05 ** 2) / 250))
+    # wider than the fixed-sample normal interval at every number of games, and shrinking with more games
+    radii = [confidence_sequence_radius(num_games, 1.0) for num_games in range(10, 100000, 997)]
+    assert all(radius > 1.96 / math.sqrt(num_games) for radius, num_games in zip(radii, range(10, 100000, 997)))
+    assert all(np.diff(radii) < 0)
+    assert confidence_sequence_radius(100, 1.0, alpha=0.01) > confidence_sequence_radius(100, 1.0, alpha=0.05)
+
+
+def test_confidence_sequence_covers_mean_at_all_times():
+    # of 1000 sequences of 2000 standard normal payoffs, at most about alpha ever exclude the true mean 0, where the
+    # fixed-sample 95% interval does in about half of them
+    np_random = np.random.RandomState(0)
+    num_games = np.arange(1, 2001)
+    radii = np.array([confidence_sequence_radius(n, 1.0) for n in num_games])
+    means = np.cumsum(np_random.standard_normal((1000, len(num_games))), axis=1) / num_games
+    miss_rate = np.mean(np.any(np.abs(means) > radii, axis=1))
+    assert miss_rate < 0.05
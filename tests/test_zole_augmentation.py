@@ -0,0 +1,67 @@
+import numpy as np
+from rlcard.agents import RandomAgent
+from rlcard.utils import reorganize
+
+from augmentation import NUM_TRANSFORMS, augment_transitions, transform_actions, transform_observations
+from envs.zole import DefaultZoleStateExtractor as Layout
+from envs.zole import ZoleEnv
+from games.zole.solver import legal_cards, to_mask
+from games.zole.utils.action_event import ActionEvent
+
+
+def _legal_actions_from_obs(obs: np.ndarray) -> list:
+    """ Legal action ids of an observation, derived from the hand and trick planes of its current player
+    """
+    player_id = Layout.player_index(obs, Layout.current_player_rep_offset)
+    hands_rep = obs[Layout.hands_rep_offset:Layout.trick_rep_offset].reshape(3, 26)
+    trick_rep = obs[Layout.trick_rep_offset:Layout.hidden_cards_rep_offset].reshape(3, 26)
+    hand = np.flatnonzero(hands_rep[player_id]).tolist()
+    if len(hand) > 8:
+        return [ActionEvent.first_bury_card_action_id + card_id for card_id in hand]
+    # the cards of a finished trick stay in the trick planes until the winner leads
+    trick_players = [(player_id - offset) % 3 for offset in (2, 1) if trick_rep[(player_id - offset) % 3].any()]
+    if trick_rep[player_id].any():
+        trick_players = []
+    if Layout.player_index(obs, Layout.large_player_rep_offset) is None:
+        return [ActionEvent.pass_table_action_id, ActionEvent.take_table_action_id]
+    leader = trick_players[0] if trick_players else player_id
+    trick = tuple(int(np.flatnonzero(trick_rep[player])[0]) for player in trick_players)
+    hands = tuple(to_mask(hand) if player == player_id else 0 for player in range(3))
+    return [ActionEvent.first_play_card_action_id + card_id for card_id in legal_cards(hands, trick, leader)]
+
+
+def _transitions(num_games: int) -> list:
+    env = ZoleEnv(config={'seed': 0, 'allow_step_back': False, 'trajectory_views': True})
+    env.set_agents([RandomAgent(num_actions=env.num_actions) for _ in range(3)])
+    transitions = []
+    for _ in range(num_games):
+        trajectories, payoffs = env.run(is_training=True)
+        for player_transitions in reorganize(trajectories, payoffs):
+            transitions += player_transitions
+    return transitions
+
+
+def test_augmented_actions_stay_legal():
+    transitions = _transitions(num_games=30)
+    for state, action_id, _, _, _ in transitions:
+        assert sorted(_legal_actions_from_obs(state['obs'])) == sorted(state['legal_actions'])
+    np_random = np.random.RandomState(0)
+    augmented = augment_transitions(transitions, np_random, NUM_TRANSFORMS - 1)
+    assert len(augmented) == len(transitions) * (NUM_TRANSFORMS - 1)
+    for state, action_id, _, _, _ in augmented:
+        legal_actions = _legal_actions_from_obs(state['obs'])
+        assert sorted(state['legal_actions']) == sorted(legal_actions)
+        assert action_id in legal_actions
+
+
+def test_transforms_are_permutations():
+    np_random = np.random.RandomState(1)
+    obs = np_random.randint(2, size=(NUM_TRANSFORMS, Layout().get_state_shape_size()))
+    transform_indices = np.arange(NUM_TRANSFORMS)
+    transformed = transform_observations(obs, transform_indices)
+    assert np.array_equal(transformed[0], obs[0])
+    assert np.array_equal(np.sort(transformed, axis=1), np.sort(obs, axis=1))
+    num_actions = ActionEvent.get_num_actions()
+    for transform_index in transform_indices:
+        action_ids = transform_actions(np.arange(num_actions), np.full(num_actions, transform_index))
+        assert sorted(action_ids) == list(range(num_actions))
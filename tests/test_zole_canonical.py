@@ -0,0 +1,40 @@
+import numpy as np
+
+from envs.zole import DefaultZoleStateExtractor as Layout
+from games.zole.utils.canonical import (ACTION_PERMUTATIONS, IDENTITY_PERMUTATION, PLAIN_SUIT_PERMUTATIONS,
+                                        canonical_hand, canonical_observations, invert_permutation, invert_permutations,
+                                        permute_action, permute_card, permute_observations)
+
+
+def test_canonical_hand_is_invariant_under_plain_suit_permutations():
+    np_random = np.random.RandomState(0)
+    for _ in range(200):
+        hand = np_random.permutation(26)[:np_random.randint(1, 11)].tolist()
+        canonical_cards, permutation = canonical_hand(hand)
+        assert canonical_cards == sorted(permute_card(card_id, permutation) for card_id in hand)
+        for suit_permutation in PLAIN_SUIT_PERMUTATIONS:
+            permuted_hand = [permute_card(card_id, suit_permutation) for card_id in hand]
+            assert canonical_hand(permuted_hand)[0] == canonical_cards, (hand, suit_permutation)
+
+
+def test_invert_permutation_round_trips():
+    for permutation in PLAIN_SUIT_PERMUTATIONS:
+        inverse = invert_permutation(permutation)
+        assert invert_permutation(inverse) == permutation
+        assert tuple(permutation[suit] for suit in inverse) == IDENTITY_PERMUTATION
+        for card_id in range(26):
+            assert permute_card(permute_card(card_id, permutation), inverse) == card_id
+        for action_id in range(ACTION_PERMUTATIONS.shape[1]):
+            assert permute_action(permute_action(action_id, permutation), inverse) == action_id
+
+
+def test_canonical_observations_map_back():
+    np_random = np.random.RandomState(1)
+    obs = (np_random.rand(100, Layout().get_state_shape_size()) < 0.2).astype(np.int8)
+    canonical, permutations = canonical_observations(obs)
+    inverses = invert_permutations(permutations)
+    assert np.array_equal(permute_observations(canonical, inverses), obs)
+    # every suit permutation of an observation has the same canonical form
+    for permutation in PLAIN_SUIT_PERMUTATIONS:
+        permuted = permute_observations(obs, np.tile(permutation, (len(obs), 1)))
+        assert np.array_equal(canonical_observations(permuted)[0], canonical)
@@ -0,0 +1,99 @@
+""" Plays seeded and scripted games through the current engine and FrozenZoleEngine, the self-contained copy of the
+    rules in zole_fuzz.py, with the zole_fuzz.py harness
+
+    Besides random games there are scripted games in which the large player wins no trick with points buried, wins
+    all tricks, and wins all points while a small player wins a trick of 0-point cards.
+"""
+from games.zole.utils.zole_card import ZoleCard
+from zole_fuzz import FrozenZoleEngine, ReferenceZoleEngine, ZoleDeal, compare_game, make_choices, make_deal
+
+
+def _scripted_game(hands: list, table: list, buried: list, preferences: list) -> tuple:
+    """ The deal of board 1 with the given hands and table, and the choices of the game in which player 1 passes,
+        player 2 takes and buries, and every player plays the first legal card of its preferences
+    """
+    hand_ids = [[ZoleCard.cards.index(card) for card in cards] for cards in hands]
+    dealing_order = [card_id for player_id in (1, 2, 0) for card_id in hand_ids[player_id][:4]]
+    dealing_order += [ZoleCard.cards.index(card) for card in table]
+    dealing_order += [card_id for player_id in (1, 2, 0) for card_id in hand_ids[player_id][4:]]
+    deal = ZoleDeal(board_id=1, deck=dealing_order[::-1])
+    actions = [1, 2] + [3 + ZoleCard.cards.index(card) for card in buried]
+    engine = FrozenZoleEngine()
+    engine.reset(deal)
+    choices = []
+    while not engine.is_over():
+        legal_actions = engine.legal_actions()
+        if len(choices) < len(actions):
+            action_id = actions[len(choices)]
+        else:
+            action_ids = [29 + ZoleCard.cards.index(card) for card in preferences[engine.current_player()]]
+            action_id = next(action_id for action_id in action_ids if action_id in legal_actions)
+        choices.append(legal_actions.index(action_id))
+        engine.step(action_id)
+    return deal, choices
+
+
+def _scripted_games() -> list:
+    zero_tricks = _scripted_game(
+        hands=[
+            ['TH', 'TS', 'TC', 'AC', '9D', 'KD', 'TD', 'AD'],
+            ['QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH', 'JD'],
+            ['9H', '9S', '9C', 'KH', 'KS', 'KC', '7D', '8D'],
+        ],
+        table=['AH', 'AS'],
+        buried=['AH', 'AS'],
+        preferences=[
+            ['AD', 'TD', 'KD', '9D', 'AC', 'TC', 'TS', 'TH'],
+            ['QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH', 'JD'],
+            ['9H', '9S', '9C', 'KH', 'KS', 'KC', '7D', '8D'],
+        ],
+    )
+    all_tricks = _scripted_game(
+        hands=[
+            ['9H', 'KH', 'TH', 'AH', '9S', 'KS', 'TS', 'AS'],
+            ['9C', 'KC', 'TC', 'AC', '7D', '8D', '9D', 'KD'],
+            ['QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH', 'JD'],
+        ],
+        table=['AD', 'TD'],
+        buried=['AD', 'TD'],
+        preferences=[
+            ['9H', 'KH', 'TH', 'AH', '9S', 'KS', 'TS', 'AS'],
+            ['AC', 'TC', 'KC', '9C', '7D', '8D', '9D', 'KD'],
+            ['QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH', 'JD'],
+        ],
+    )
+    all_points = _scripted_game(
+        hands=[
+            ['9C', 'KC', 'TC', 'AC', 'KH', 'TH', 'AH', 'TD'],
+            ['9S', 'KS', 'TS', 'AS', '7D', '8D', '9D', 'KD'],
+            ['QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH', '9H'],
+        ],
+        table=['JD', 'AD'],
+        buried=['JD', 'AD'],
+        preferences=[
+            ['9C', 'TD', 'KC', 'TC', 'AC', 'KH', 'TH', 'AH'],
+            ['9S', '7D', '8D', '9D', 'KD', 'KS', 'TS', 'AS'],
+            ['9H', 'QC', 'QS', 'QH', 'QD', 'JC', 'JS', 'JH'],
+        ],
+    )
+    return [zero_tricks, all_tricks, all_points]
+
+
+def test_engine_matches_frozen_engine():
+    reference = ReferenceZoleEngine()
+    frozen = FrozenZoleEngine()
+    games = [(make_deal(seed), make_choices(seed)) for seed in range(300)] + _scripted_games()
+    scoring_cases = set()
+    for deal, choices in games:
+        divergence = compare_game(reference, frozen, deal, choices)
+        assert divergence is None, f'{deal}: {divergence}'
+        round = reference.game.round
+        if round.large_player_id is not None:
+            large_tricks, small_tricks = round.won_trick_counts
+            if large_tricks == 0 and round.won_trick_points[0] > 0:
+                scoring_cases.add('zero tricks with buried points')
+            if small_tricks == 0:
+                scoring_cases.add('all tricks')
+            if small_tricks > 0 and round.won_trick_points[0] == 120:
+                scoring_cases.add('all points without all tricks')
+    assert scoring_cases == {'zero tricks with buried points', 'all tricks', 'all points without all tricks'}
@@ -0,0 +1,70 @@
+import numpy as np
+import rlcard
+import torch
+from rlcard.agents import DQNAgent, NFSPAgent
+from rlcard.agents.dmc_agent.model import DMCAgent
+
+import envs
+from agents.zole_dmc_agent import ZoleDMCAgent
+from agents.zole_numpy_agent import ZoleNumpyAgent
+from checkpoint_manager import CheckpointManager
+from zole_export import action_agreement, export_agent, export_path
+
+
+def _env():
+    return rlcard.make('zole', {'seed': 0, 'display_performance_interval': 10 ** 9})
+
+
+def _randomize_batch_norm(module: torch.nn.Module):
+    # untrained running statistics are the identity, which would not check the folding into the first layer
+    generator = torch.Generator().manual_seed(0)
+    for layer in module.modules():
+        if isinstance(layer, torch.nn.BatchNorm1d):
+            layer.running_mean.copy_(torch.randn(layer.num_features, generator=generator))
+            layer.running_var.copy_(torch.rand(layer.num_features, generator=generator) + 0.5)
+            layer.weight.data.copy_(torch.randn(layer.num_features, generator=generator))
+            layer.bias.data.copy_(torch.randn(layer.num_features, generator=generator))
+
+
+def test_dqn_export_agrees_with_torch_agent(tmp_path):
+    torch.manual_seed(0)
+    env = _env()
+    agent = DQNAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], mlp_layers=[64, 64], device='cpu')
+    _randomize_batch_norm(agent.q_estimator.qnet)
+    exported = export_agent(agent)
+    exported.save_npz(str(tmp_path / 'dqn.npz'))
+    assert action_agreement(agent, ZoleNumpyAgent.from_npz(str(tmp_path / 'dqn.npz')), env, num_games=20) == 1.0
+
+    # the rl_training.py checkpoint of the agent exports the same network
+    checkpoints = CheckpointManager(str(tmp_path / 'checkpoints'), background=False)
+    checkpoints.save([agent, agent, agent], episode=0)
+    from_checkpoint = export_path(checkpoints.checkpoint_path(0), index=1)
+    for weight, checkpoint_weight in zip(exported.weights, from_checkpoint.weights):
+        assert np.array_equal(weight, checkpoint_weight)
+
+
+def test_nfsp_export_agrees_with_torch_agent():
+    torch.manual_seed(1)
+    env = _env()
+    agent = NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[0], hidden_layers_sizes=[64, 64],
+                      q_mlp_layers=[64, 64], device='cpu')
+    _randomize_batch_norm(agent.policy_network)
+    assert action_agreement(agent, export_agent(agent), env, num_games=20) == 1.0
+
+
+def test_dmc_export_agrees_with_torch_agent(tmp_path):
+    torch.manual_seed(2)
+    env = _env()
+    agent = DMCAgent(state_shape=env.state_shape[0], action_shape=[env.num_actions], mlp_layers=[64, 64], device='cpu')
+    assert action_agreement(agent, export_agent(agent), env, num_games=20) == 1.0
+
+    # the position 2 agent of a DMC trainer checkpoint
+    torch.save({'model_state_dict': [{}, {}, agent.net.state_dict()]}, str(tmp_path / 'model.tar'))
+    assert action_agreement(agent, export_path(str(tmp_path / 'model.tar'), index=2), env, num_games=5) == 1.0
+
+
+def test_batched_dmc_export_agrees_with_torch_agent(tmp_path):
+    torch.manual_seed(3)
+    env = _env()
+    agent = ZoleDMCAgent(state_shape=env.state_shape[0], action_shape=[env.num_actions], mlp_layers=[64, 64], device='cpu')
+    assert action_agreement(agent, export_agent(agent), env, num_games=20) == 1.0
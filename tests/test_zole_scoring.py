@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from envs.zole import DefaultZolePayoffDelegate, points_to_score
+
+
+def _game(large_player_id, won_trick_points, won_trick_counts):
+    return SimpleNamespace(round=SimpleNamespace(
+        large_player_id=large_player_id,
+        won_trick_points=won_trick_points,
+        won_trick_counts=won_trick_counts,
+    ))
+
+
+def test_all_tricks_scored_by_trick_counts():
+    assert points_to_score(120, 0, 0, large_tricks=8, small_tricks=0) == [6, -3]
+    assert points_to_score(120, 0, 1, large_tricks=8, small_tricks=0) == [8, -4]
+
+
+def test_zero_point_trick_won_by_small_player():
+    # the small side won a trick of 0-point cards, the large player has all points but not all tricks
+    assert points_to_score(120, 0, 0, large_tricks=7, small_tricks=1) == [4, -2]
+    payoffs = DefaultZolePayoffDelegate().get_payoffs(_game(1, [120, 0], [7, 1]), large_win_incentive=0)
+    assert payoffs.tolist() == [-2, 4, -2]
+
+
+def test_zero_tricks_with_buried_points():
+    assert points_to_score(14, 106, 0, large_tricks=0, small_tricks=8) == [-8, 4]
+    payoffs = DefaultZolePayoffDelegate().get_payoffs(_game(0, [14, 106], [0, 8]), large_win_incentive=0)
+    assert payoffs.tolist() == [-8, 4, 4]
+
+
+def test_points_fallback_without_trick_counts():
+    assert points_to_score(120, 0, 0) == [6, -3]
+    assert points_to_score(0, 120, 0) == [-8, 4]
+    assert points_to_score(61, 59, 0) == [2, -1]
@@ -0,0 +1,132 @@
+from functools import lru_cache
+
+import numpy as np
+
+from games.zole.game import ZoleGame
+from games.zole.solver import (CARD_POINTS, ZoleSolver, greedy_playout, greedy_playout_tricks, legal_cards, to_mask,
+                               trick_winner_index)
+from games.zole.utils.action_event import PlayCardAction
+
+
+@lru_cache(maxsize=None)
+def _minimax(hands, trick, leader, large_player_id) -> int:
+    """ Points the large player wins from the position on, by plain minimax over legal_cards, memoized so that
+        endgames of 6 cards stay cheap
+    """
+    player_id = (leader + len(trick)) % 3
+    if not trick and not hands[leader]:
+        return 0
+    values = [_play(hands, trick, leader, large_player_id, card_id) for card_id in legal_cards(hands, trick, leader)]
+    return max(values) if player_id == large_player_id else min(values)
+
+
+def _play(hands, trick, leader, large_player_id, card_id) -> int:
+    player_id = (leader + len(trick)) % 3
+    hands = tuple(hand ^ (1 << card_id) if player == player_id else hand for player, hand in enumerate(hands))
+    trick = trick + (card_id,)
+    if len(trick) < 3:
+        return _minimax(hands, trick, leader, large_player_id)
+    winner_id = (leader + trick_winner_index(trick)) % 3
+    points = sum(CARD_POINTS[card] for card in trick) if winner_id == large_player_id else 0
+    return points + _minimax(hands, (), winner_id, large_player_id)
+
+
+def _random_endgame(np_random: np.random.RandomState, num_cards: int) -> tuple:
+    """ Hands of num_cards random cards, advanced by 0 to 2 random legal cards into the first trick
+    """
+    cards = np_random.permutation(26)[:3 * num_cards]
+    hands = tuple(to_mask(cards[player::3]) for player in range(3))
+    leader = int(np_random.randint(3))
+    large_player_id = int(np_random.randint(3))
+    trick = ()
+    for _ in range(np_random.randint(3)):
+        player_id = (leader + len(trick)) % 3
+        card_id = int(np_random.choice(legal_cards(hands, trick, leader)))
+        hands = tuple(hand ^ (1 << card_id) if player == player_id else hand for player, hand in enumerate(hands))
+        trick += (card_id,)
+    return hands, trick, leader, large_player_id
+
+
+def test_solver_matches_minimax():
+    np_random = np.random.RandomState(0)
+    solver = ZoleSolver()
+    for index in range(120):
+        position = _random_endgame(np_random, num_cards=2 + index % 3)
+        assert solver.solve(*position) == _minimax(*position), position
+
+
+def test_solve_moves_match_minimax():
+    np_random = np.random.RandomState(1)
+    solver = ZoleSolver()
+    for index in range(60):
+        position = _random_endgame(np_random, num_cards=2 + index % 3)
+        expected = {card_id: _play(*position, card_id) for card_id in legal_cards(*position[:3])}
+        assert solver.solve_moves(*position) == expected, position
+
+
+def test_solver_along_played_lines_matches_minimax():
+    # later positions of a line reuse the bounds stored by the searches of earlier positions
+    np_random = np.random.RandomState(5)
+    for index in range(30):
+        solver = ZoleSolver()
+        hands, trick, leader, large_player_id = _random_endgame(np_random, num_cards=4 + index % 3)
+        while trick or hands[leader]:
+            position = (hands, trick, leader, large_player_id)
+            values = solver.solve_moves(*position)
+            assert values == {card_id: _play(*position, card_id) for card_id in legal_cards(hands, trick, leader)}, position
+            assert solver.solve(*position) == _minimax(*position), position
+            card_id = int(np_random.choice(list(values)))
+            player_id = (leader + len(trick)) % 3
+            hands = tuple(hand ^ (1 << card_id) if player == player_id else hand for player, hand in enumerate(hands))
+            trick += (card_id,)
+            if len(trick) == 3:
+                trick, leader = (), (leader + trick_winner_index(trick)) % 3
+
+
+def test_solver_with_cleared_table_matches_minimax():
+    # a table cleared during the search must not change the values
+    np_random = np.random.RandomState(2)
+    solver = ZoleSolver(max_table_size=16)
+    for _ in range(40):
+        position = _random_endgame(np_random, num_cards=4)
+        assert solver.solve(*position) == _minimax(*position), position
+
+
+def test_greedy_playout_tricks():
+    np_random = np.random.RandomState(3)
+    for index in range(50):
+        hands, trick, leader, large_player_id = _random_endgame(np_random, num_cards=2 + index % 4)
+        points, large_tricks, small_tricks = greedy_playout_tricks(hands, trick, leader, large_player_id)
+        assert points == greedy_playout(hands, trick, leader, large_player_id)
+        assert large_tricks + small_tricks == bin(hands[leader]).count('1') + (1 if trick else 0)
+        assert (points == 0) or large_tricks > 0
+
+
+def test_legal_cards_and_trick_winner_match_engine():
+    game = ZoleGame()
+    game.np_random = np.random.RandomState(4)
+    num_tricks = 0
+    for _ in range(200):
+        game.init_game()
+        while not game.is_over():
+            legal_actions = game.judger.get_legal_actions()
+            action = legal_actions[game.np_random.randint(len(legal_actions))]
+            if not isinstance(action, PlayCardAction):
+                game.step(action)
+                continue
+            round = game.round
+            hands, trick, leader, large_player_id = ZoleSolver.position_from_round(round)
+            assert legal_cards(hands, trick, leader) == sorted(action.card.card_id for action in legal_actions)
+            if len(trick) < 2:
+                game.step(action)
+                continue
+            winner_id = (leader + trick_winner_index(trick + (action.card.card_id,))) % 3
+            side = 0 if winner_id == large_player_id else 1
+            won_trick_counts = list(round.won_trick_counts)
+            game.step(action)
+            won_trick_counts[side] += 1
+            assert round.won_trick_counts == won_trick_counts
+            if not game.is_over():
+                assert round.current_player_id == winner_id
+            num_tricks += 1
+    assert num_tricks > 0
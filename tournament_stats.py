@@ -0,0 +1,190 @@
+""" Tournament statistics from per-game payoffs
+
+    A tournament records the payoff of every seat and the large player of every game, -1 when all players passed.
+    Means, standard errors, percentile bootstrap confidence intervals and the breakdown of every seat's payoff by
+    role (large, small, passed) are computed from these arrays with NumPy. The bootstrap draws resample counts from a
+    multinomial, so every resample is one row of a (num_bootstrap, num_games) @ (num_games, 3) product, computed in
+    chunks of rows to bound the memory of the counts.
+
+    run_tournament plays batches of games and stops early once the confidence intervals of all seats are narrower
+    than a target width. The checks after every batch use the normal interval of the standard error, which costs a
+    pass over the payoffs where a bootstrap costs num_bootstrap passes, and the final summary is bootstrapped.
+
+    run_sequential_comparison decides whether the agent of one seat beats the others with an anytime-valid
+    confidence sequence, which holds at every number of games simultaneously, so it can be checked after every batch
+    and the comparison stopped as soon as it is decided, unlike a fixed-size interval checked repeatedly.
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+ROLES = ('large', 'small', 'passed')
+BOOTSTRAP_CHUNK_SIZE = 1 << 20  # resample counts drawn at a time
+
+
+class TournamentResults(object):
+    def __init__(self, max_games: int, num_players: int = 3):
+        """ Initialize preallocated per-game arrays
+
+        Args:
+            max_games (int): the number of games the arrays hold
+            num_players (int): the number of seats
+        """
+        self.payoffs = np.zeros((max_games, num_players))
+        self.large_players = np.full(max_games, -1, dtype=np.int8)
+        self.num_games: int = 0
+
+    def add_game(self, payoffs, large_player_id: int or None):
+        self.payoffs[self.num_games] = payoffs
+        self.large_players[self.num_games] = -1 if large_player_id is None else large_player_id
+        self.num_games += 1
+
+    def game_payoffs(self) -> np.ndarray:
+        """ (num_games, num_players) payoffs of the games played
+        """
+        return self.payoffs[:self.num_games]
+
+    def means(self) -> np.ndarray:
+        return self.game_payoffs().mean(axis=0)
+
+    def standard_errors(self) -> np.ndarray:
+        if self.num_games < 2:
+            return np.full(self.payoffs.shape[1], np.inf)
+        return self.game_payoffs().std(axis=0, ddof=1) / np.sqrt(self.num_games)
+
+    def normal_intervals(self, confidence: float = 0.95) -> np.ndarray:
+        """ (num_players, 2) normal confidence interval of the mean payoff of every seat
+        """
+        half_width = NormalDist().inv_cdf((1 + confidence) / 2) * self.standard_errors()
+        means = self.means()
+        return np.stack([means - half_width, means + half_width], axis=1)
+
+    def bootstrap_intervals(self, np_random: np.random.RandomState, num_bootstrap: int = 1000, confidence: float = 0.95) -> np.ndarray:
+        """ (num_players, 2) percentile bootstrap confidence interval of the mean payoff of every seat
+        """
+        num_games = self.num_games
+        payoffs = self.game_payoffs()
+        probabilities = np.full(num_games, 1 / num_games)
+        chunk_rows = max(1, BOOTSTRAP_CHUNK_SIZE // num_games)
+        resampled_means = np.empty((num_bootstrap, payoffs.shape[1]))
+        for start in range(0, num_bootstrap, chunk_rows):
+            stop = min(start + chunk_rows, num_bootstrap)
+            counts = np_random.multinomial(num_games, probabilities, size=stop - start)
+            resampled_means[start:stop] = counts @ payoffs / num_games
+        alpha = (1 - confidence) / 2
+        return np.quantile(resampled_means, [alpha, 1 - alpha], axis=0).T
+
+    def role_breakdown(self) -> dict:
+        """ For every role, the share of games and the mean payoff in them of every seat, nan when a seat never had
+            the role
+        """
+        payoffs = self.game_payoffs()
+        large_players = self.large_players[:self.num_games, None]
+        seats = np.arange(payoffs.shape[1])
+        masks = {
+            'large': large_players == seats,
+            'small': (large_players >= 0) & (large_players != seats),
+            'passed': np.broadcast_to(large_players < 0, payoffs.shape),
+        }
+        breakdown = {}
+        for role, mask in masks.items():
+            counts = mask.sum(axis=0)
+            totals = np.where(mask, payoffs, 0).sum(axis=0)
+            breakdown[role] = {
+                'share': counts / max(self.num_games, 1),
+                'mean': np.divide(totals, counts, out=np.full(len(seats), np.nan), where=counts > 0),
+            }
+        return breakdown
+
+    def summary(self, np_random: np.random.RandomState, num_bootstrap: int = 1000, confidence: float = 0.95) -> dict:
+        return {
+            'num_games': self.num_games,
+            'mean': self.means(),
+            'se': self.standard_errors(),
+            'ci': self.bootstrap_intervals(np_random, num_bootstrap, confidence),
+            'roles': self.role_breakdown(),
+        }
+
+
+def run_tournament(env, max_games: int, batch_size: int = 100, target_ci_width: float or None = None,
+                   min_games: int = 200, num_bootstrap: int = 1000, confidence: float = 0.95, seed: int or None = None,
+                   should_stop=None) -> tuple:
+    """ Play up to max_games games with the agents of env, in batches of batch_size. With target_ci_width, stop after
+        the first batch past min_games at which the confidence intervals of all seats are narrower than it. With
+        should_stop, stop after the first batch at which should_stop() is true.
+
+    Returns:
+        results (TournamentResults): the per-game payoffs and large players
+        summary (dict): TournamentResults.summary of the games played
+    """
+    np_random = np.random.RandomState(seed)
+    results = TournamentResults(max_games, env.num_players)
+    while results.num_games < max_games:
+        for _ in range(min(batch_size, max_games - results.num_games)):
+            _, payoffs = env.run(is_training=False)
+            results.add_game(payoffs, env.game.round.large_player_id)
+        if should_stop is not None and should_stop():
+            break
+        if target_ci_width and results.num_games >= min_games:
+            intervals = results.normal_intervals(confidence)
+            if np.all(intervals[:, 1] - intervals[:, 0] < target_ci_width):
+                break
+    return results, results.summary(np_random, num_bootstrap, confidence)
+
+
+def format_summary(summary: dict, names: list) -> str:
+    lines = [f'{summary["num_games"]} games']
+    for seat, name in enumerate(names):
+        low, high = summary['ci'][seat]
+        roles = '  '.join(
+            f'{role} {summary["roles"][role]["share"][seat]:.3f} {summary["roles"][role]["mean"][seat]:+.3f}'
+            for role in ROLES
+        )
+        lines.append(f'{seat} {summary["mean"][seat]:+.3f} ±{summary["se"][seat]:.3f} [{low:+.3f}, {high:+.3f}]  {roles}  {name}')
+    return '\n'.join(lines)
+
+
+def confidence_sequence_radius(num_games: int, std: float, alpha: float = 0.05, rho: float = 250.0) -> float:
+    """ Radius of the asymptotic confidence sequence of a mean from Robbins' normal mixture boundary, with the sample
+        standard deviation in place of the true one. The sequence covers the mean at all numbers of games with
+        probability 1 - alpha, rho is the number of games around which it is the narrowest.
+    """
+    variance_time = num_games + rho
+    return std * math.sqrt(variance_time * math.log(variance_time / (rho * alpha ** 2))) / num_games
+
+
+def run_sequential_comparison(env, seat: int, max_games: int, batch_size: int = 100, alpha: float = 0.05,
+                              tie_margin: float = 0.1, min_games: int = 100, rho: float = 250.0) -> tuple:
+    """ Play batches of games until the confidence sequence of the mean payoff of seat excludes 0 or lies within
+        +-tie_margin, or max_games are played. The payoffs of a game sum to 0, so a positive mean payoff means the
+        agent of seat beats the other seats.
+
+    Returns:
+        results (TournamentResults): the per-game payoffs and large players
+        decision (str): 'better', 'worse', 'tie' or 'undecided'
+        interval (tuple): the (low, high) confidence sequence of the mean payoff of seat when stopped
+    """
+    results = TournamentResults(max_games, env.num_players)
+    decision, interval = 'undecided', (-math.inf, math.inf)
+    while results.num_games < max_games:
+        for _ in range(min(batch_size, max_games - results.num_games)):
+            _, payoffs = env.run(is_training=False)
+            results.add_game(payoffs, env.game.round.large_player_id)
+        if results.num_games < min_games:
+            continue
+        seat_payoffs = results.game_payoffs()[:, seat]
+        mean = seat_payoffs.mean()
+        radius = confidence_sequence_radius(results.num_games, seat_payoffs.std(ddof=1), alpha, rho)
+        interval = (mean - radius, mean + radius)
+        if interval[0] > 0:
+            decision = 'better'
+        elif interval[1] < 0:
+            decision = 'worse'
+        elif -tie_margin < interval[0] and interval[1] < tie_margin:
+            decision = 'tie'
+        else:
+            continue
+        break
+    return results, decision, interval
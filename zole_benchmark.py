@@ -0,0 +1,294 @@
+""" Benchmarks for the Zole engine and environment throughput
+
+    Results are stored as json keyed by commit, a run fails when a benchmark regresses beyond the threshold
+    against a saved baseline. Metrics ending in `_per_sec` are higher-is-better, metrics ending in `_us` are
+    lower-is-better.
+"""
+import envs
+from defined_agents import get_dmc_checkpoint_agent, get_random_agent
+from games.zole.game import ZoleGame
+from games.zole.utils.action_event import PlayCardAction
+from seeding import set_seed
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+import numpy as np
+import rlcard
+from rlcard.utils import tournament
+
+
+def get_env(seed_id: int):
+    set_seed(seed_id)
+
+    return rlcard.make(
+        'zole',
+        {'seed': seed_id}
+    )
+
+
+def play_random_game(game: ZoleGame):
+    game.init_game()
+    while not game.is_over():
+        legal_actions = game.judger.get_legal_actions()
+        game.step(legal_actions[game.np_random.randint(len(legal_actions))])
+
+
+def collect_positions(seed_id: int, num_games: int) -> list[ZoleGame]:
+    """ Snapshot every decision point of random games, snapshots are reused by the per-call benchmarks
+    """
+    game = ZoleGame()
+    game.np_random = np.random.RandomState(seed_id)
+    positions = []
+    for _ in range(num_games):
+        game.init_game()
+        while not game.is_over():
+            positions.append(copy.deepcopy(game))
+            legal_actions = game.judger.get_legal_actions()
+            game.step(legal_actions[game.np_random.randint(len(legal_actions))])
+    return positions
+
+
+def best_of(repeat: int, func) -> float:
+    """ Return the smallest duration in seconds of `repeat` runs of func
+    """
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        durations.append(perf_counter() - start)
+    return min(durations)
+
+
+def bench_game_random_selfplay(args) -> float:
+    game = ZoleGame()
+
+    def run():
+        game.np_random = np.random.RandomState(args.seed_id)
+        for _ in range(args.num_games):
+            play_random_game(game)
+
+    return args.num_games / best_of(args.repeat, run)
+
+
+def bench_env_run(args) -> float:
+    env = get_env(args.seed_id)
+    env.set_agents([get_random_agent(env) for _ in range(3)])
+
+    def run():
+        # every repeat plays the same games, the env and the random agents are reseeded rather than rebuilt
+        set_seed(args.seed_id)
+        env.seed(args.seed_id)
+        for _ in range(args.num_games):
+            env.run(is_training=False)
+
+    return args.num_games / best_of(args.repeat, run)
+
+
+def get_torch_dmc_agent(env, path: str):
+    """ The torch DMC agent of a DMC checkpoint (model.tar), the agent of position 2, or of a pickled agent (.pth)
+    """
+    if path.endswith('.tar'):
+        return get_dmc_checkpoint_agent(env, path, index=2)
+    import torch
+    return torch.load(path, weights_only=False)
+
+
+def bench_tournament_dmc(args) -> float:
+    env = get_env(args.seed_id)
+    env.set_agents([
+        get_random_agent(env),
+        get_random_agent(env),
+        get_torch_dmc_agent(env, args.dmc_model_path),
+    ])
+
+    def run():
+        set_seed(args.seed_id)
+        env.seed(args.seed_id)
+        tournament(env, args.num_games)
+
+    return args.num_games / best_of(args.repeat, run)
+
+
+def bench_per_call(positions: list[ZoleGame], repeat: int, func) -> float:
+    """ Mean cost in microseconds of func(game) over all positions
+    """
+    return best_of(repeat, lambda: [func(game) for game in positions]) / len(positions) * 1e6
+
+
+def bench_play_card(positions: list[ZoleGame], repeat: int) -> float:
+    """ Mean cost in microseconds of ZoleRound.play_card, the copies that play_card mutates are made outside the timer
+    """
+    trick_positions = [
+        (game, game.judger.get_legal_actions()[0])
+        for game in positions
+        if isinstance(game.judger.get_legal_actions()[0], PlayCardAction)
+    ]
+    durations = []
+    for _ in range(repeat):
+        rounds = [(copy.deepcopy(game.round), action) for game, action in trick_positions]
+        start = perf_counter()
+        for round, action in rounds:
+            round.play_card(action=action)
+        durations.append(perf_counter() - start)
+    return min(durations) / len(trick_positions) * 1e6
+
+
+def run_benchmarks(args) -> dict:
+    env = get_env(args.seed_id)
+    extractor = env.zoleStateExtractor
+    positions = collect_positions(args.seed_id, args.num_position_games)
+
+    results = {
+        'game_random_selfplay_games_per_sec': bench_game_random_selfplay(args),
+        'env_run_games_per_sec': bench_env_run(args),
+        'get_legal_actions_us': bench_per_call(positions, args.repeat, lambda game: game.judger.get_legal_actions()),
+        'extract_state_us': bench_per_call(positions, args.repeat, lambda game: extractor.extract_state(game=game)),
+        'is_bidding_over_us': bench_per_call(positions, args.repeat, lambda game: game.round.is_bidding_over()),
+        'play_card_us': bench_play_card(positions, args.repeat),
+    }
+    if args.dmc_model_path:
+        results['tournament_dmc_games_per_sec'] = bench_tournament_dmc(args)
+    return results
+
+
+def get_commit() -> str:
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """ Compare results against baseline, threshold is the allowed relative slowdown (0.1 = 10%)
+    """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        if name.endswith('_per_sec'):
+            change = (baseline[name] - value) / baseline[name]
+        else:
+            change = (value - baseline[name]) / baseline[name]
+        if change > threshold:
+            regressions.append(f'{name}: {baseline[name]:.2f} -> {value:.2f} ({change:+.1%} slower)')
+    return regressions
+
+
+def load_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_json(path: str, data: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def start(args):
+    results = run_benchmarks(args)
+    for name, value in results.items():
+        print(f'{name:<40}{value:>12.2f}')
+
+    commit = get_commit()
+    history = load_json(args.results_path)
+    history[commit] = results
+    save_json(args.results_path, history)
+    print(f'\nResults for {commit} saved in {args.results_path}')
+
+    if args.save_baseline:
+        save_json(args.baseline_path, results)
+        print(f'Baseline saved in {args.baseline_path}')
+        return
+
+    baseline = load_json(args.baseline_path)
+    if not baseline:
+        print(f'No baseline found at {args.baseline_path}, run with --save_baseline to create one')
+        return
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print('\nRegressions against baseline:')
+        print('\n'.join(regressions))
+        sys.exit(1)
+    print('\nNo regressions against baseline')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--num_position_games',
+        type=int,
+        default=100,
+        help='Number of random games whose decision points are used for the per-call benchmarks',
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Each benchmark is repeated and the fastest run is reported',
+    )
+
+    parser.add_argument(
+        '--dmc_model_path',
+        type=str,
+        default='',
+        help='Pickled DMC agent (.pth) or DMC checkpoint (model.tar) played with torch in the tournament benchmark, '
+             'skipped when empty',
+    )
+
+    parser.add_argument(
+        '--results_path',
+        type=str,
+        default='performance/benchmarks/results.json',
+    )
+
+    parser.add_argument(
+        '--baseline_path',
+        type=str,
+        default='performance/benchmarks/baseline.json',
+    )
+
+    parser.add_argument(
+        '--save_baseline',
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Allowed relative slowdown against the baseline before failing',
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Benchmark the Zole engine and environment')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
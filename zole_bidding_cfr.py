@@ -0,0 +1,115 @@
+""" Solve the Zole take/pass decisions with CFR+ over sampled deals, see bidding_cfr.py
+"""
+from bidding_cfr import BiddingCFR, sample_deal_values
+
+import argparse
+import os
+from multiprocessing import Pool
+from time import perf_counter
+
+import numpy as np
+
+
+def sample_chunk(task) -> tuple:
+    seed, first_deal, num_deals, playout = task
+    # every chunk has its own stream, keyed on the index of its first deal among all deals of the output dir
+    bit_generator = np.random.MT19937(np.random.SeedSequence([seed, first_deal]))
+    return sample_deal_values(np.random.RandomState(bit_generator), num_deals, playout)
+
+
+def start(args):
+    buckets, take_values = BiddingCFR.load_deals(args.output_dir, args.playout)
+    if args.num_deals > 0:
+        # deal indices continue after the cached deals, so repeated runs add new deals whatever their chunk sizes
+        tasks = [
+            (args.seed, first_deal, min(args.chunk_size, len(buckets) + args.num_deals - first_deal), args.playout)
+            for first_deal in range(len(buckets), len(buckets) + args.num_deals, args.chunk_size)
+        ]
+        start_time = perf_counter()
+        with Pool(processes=args.num_workers) as pool:
+            chunks = pool.map(sample_chunk, tasks)
+        buckets = np.concatenate([buckets] + [chunk[0] for chunk in chunks])
+        take_values = np.concatenate([take_values] + [chunk[1] for chunk in chunks])
+        BiddingCFR.save_deals(args.output_dir, buckets, take_values, args.playout)
+        print(f'Sampled {args.num_deals} deals in {perf_counter() - start_time:.1f}s, {len(buckets)} cached')
+    if len(buckets) == 0:
+        raise Exception(f'zole_bidding_cfr: no deals in {args.output_dir}')
+
+    cfr = BiddingCFR(buckets, take_values)
+    if cfr.restore(args.output_dir):
+        print(f'Resumed after {cfr.iterations} iterations')
+
+    start_time = perf_counter()
+    for done in range(0, args.num_iterations, args.save_interval):
+        cfr.iterate(min(args.save_interval, args.num_iterations - done))
+        cfr.save(args.output_dir)
+        take_probs, _, values = cfr.seat_values(np.nan_to_num(cfr.average_strategy(), nan=0.5))
+        reach = np.cumprod(np.hstack([np.ones((len(buckets), 1)), 1 - take_probs[:, :2]]), axis=1)
+        print(
+            f'Iteration {cfr.iterations} ({perf_counter() - start_time:.1f}s): '
+            f'seat payoffs {np.round(values.mean(axis=0), 3).tolist()}, '
+            f'take rates {np.round((reach * take_probs).mean(axis=0), 3).tolist()}'
+        )
+    print(f'Strategy saved in {os.path.join(args.output_dir, BiddingCFR.strategy_file)}')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--output_dir',
+        type=str,
+        default='experiments/bidding_cfr',
+    )
+
+    parser.add_argument(
+        '--num_deals',
+        type=int,
+        default=100000,
+        help='New deals to sample and value, runs merge into the cached deals of the output dir',
+    )
+
+    parser.add_argument(
+        '--playout',
+        type=str,
+        default='heuristic',
+        choices=['heuristic', 'greedy'],
+        help='Trick play valuing a taken table, heuristic is how ZoleCFRBiddingAgent plays. An output dir keeps '
+             'deals of one playout',
+    )
+
+    parser.add_argument(
+        '--chunk_size',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--num_iterations',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--save_interval',
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Solve the Zole bidding with CFR')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
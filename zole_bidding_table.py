@@ -0,0 +1,126 @@
+""" Offline job that fills the bidding table with simulated pass/take values and bury pairs
+"""
+from bidding_table import BiddingTable, best_bury_pair, simulate_bidding, TAKE_HAND_SIZE
+from games.zole.utils.canonical import canonical_hand
+
+import argparse
+import os
+from multiprocessing import Pool
+from time import perf_counter
+
+import numpy as np
+
+
+def evaluate_hand(task) -> tuple:
+    """ Simulate the three bidding seats of a canonical hand and the bury pair of one 10-card hand built from it
+    """
+    canonical_cards, seed_sequence, num_samples, bury_samples, take_threshold = task
+    np_random = np.random.RandomState(np.random.MT19937(seed_sequence))
+    values = [simulate_bidding(canonical_cards, seat, np_random, num_samples, take_threshold) for seat in range(3)]
+
+    bury_cards, bury_pair = None, None
+    if bury_samples > 0:
+        unseen = [card_id for card_id in range(26) if card_id not in canonical_cards]
+        table_cards = np_random.choice(unseen, size=2, replace=False).tolist()
+        bury_cards, _ = canonical_hand(canonical_cards + table_cards)
+        bury_pair = best_bury_pair(bury_cards, np_random, bury_samples)
+    return canonical_cards, values, bury_cards, bury_pair
+
+
+def sample_canonical_hands(np_random: np.random.RandomState, num_hands: int) -> list:
+    """ Distinct canonical hands drawn from random deals, so common hand shapes are covered first
+    """
+    hands = {}
+    while len(hands) < num_hands:
+        card_ids = np_random.choice(26, size=TAKE_HAND_SIZE, replace=False).tolist()
+        canonical_cards, _ = canonical_hand(card_ids)
+        hands[tuple(canonical_cards)] = None
+    return [list(hand) for hand in hands]
+
+
+def start(args):
+    table = BiddingTable.create(args.output_dir)
+    # the samples already in the table are part of the seed, so a run into an existing table simulates new deals
+    num_table_samples = int(table.counts.sum(dtype=np.int64))
+    hands_sequence, tasks_sequence = np.random.SeedSequence([args.seed, num_table_samples]).spawn(2)
+    hands = sample_canonical_hands(np.random.RandomState(np.random.MT19937(hands_sequence)), args.num_hands)
+    tasks = [
+        (hand, seed_sequence, args.num_samples, args.bury_samples, args.take_threshold)
+        for hand, seed_sequence in zip(hands, tasks_sequence.spawn(len(hands)))
+    ]
+
+    start_time = perf_counter()
+    with Pool(processes=args.num_workers) as pool:
+        for count, (canonical_cards, values, bury_cards, bury_pair) in enumerate(pool.imap_unordered(evaluate_hand, tasks, chunksize=16), start=1):
+            for seat, (pass_value, take_value, num_samples) in enumerate(values):
+                if num_samples > 0:
+                    table.add_values(canonical_cards, seat, pass_value, take_value, num_samples)
+            if bury_pair is not None:
+                table.set_bury_pair(bury_cards, bury_pair)
+            if count % args.flush_interval == 0:
+                table.flush()
+                print(f'Hands evaluated #{count} ({count / (perf_counter() - start_time):.1f} hands/sec)')
+    table.flush()
+    print(f'Table with {len(hands)} hands saved in {args.output_dir}')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--output_dir',
+        type=str,
+        default='experiments/bidding_table',
+    )
+
+    parser.add_argument(
+        '--num_hands',
+        type=int,
+        default=10000,
+        help='Number of distinct canonical 8-card hands to simulate, runs merge into an existing table',
+    )
+
+    parser.add_argument(
+        '--num_samples',
+        type=int,
+        default=200,
+        help='Simulated deals per hand and bidding seat',
+    )
+
+    parser.add_argument(
+        '--bury_samples',
+        type=int,
+        default=20,
+        help='Simulated deals per bury pair candidate, 0 skips the bury table',
+    )
+
+    parser.add_argument(
+        '--take_threshold',
+        type=float,
+        default=6.0,
+        help='Hand value threshold of the simulated opponents, see ZoleHeuristicAgent.hand_value',
+    )
+
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        '--flush_interval',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Precompute the Zole bidding table')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
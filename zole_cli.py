@@ -0,0 +1,116 @@
+""" Single entry point of the Zole scripts
+
+    python zole_cli.py [--import_profile] <command> [command arguments]
+
+    Only the module of the command is imported, torch and rlcard.agents are imported by the commands and agents that
+    need them, so short jobs with NumPy, heuristic or random agents start without them. --import_profile reports the
+    time spent importing every top-level package, the time of a module excludes the packages it imports.
+"""
+import argparse
+import builtins
+import importlib
+import sys
+from time import perf_counter
+
+
+# command: (module, entry function, description), the module defines add_arguments(parser) when it has arguments
+commands = {
+    'tournament': ('zole_tournament', 'start', 'Run tournament with an agent against random agents'),
+    'human': ('zole_human', 'start_game_loop', 'Play as human against a random and a trained agent'),
+    'session': ('zole_session', 'start', 'Play a session of rounds with dealer rotation and pule settlement'),
+    'league': ('zole_league', 'start', 'Rank a pool of agents with adaptively scheduled matches'),
+    'evaluate': ('agent_evaluate_multiple', 'start', 'Evaluate trained checkpoints against baseline agents'),
+    'eval_queue': ('zole_eval_queue', 'start', 'Evaluate agents with workers over a shared job queue'),
+    'export': ('zole_export', 'start', 'Export an agent to a NumPy inference artifact'),
+    'profile': ('zole_profile', 'start', 'Profile Zole episodes'),
+    'benchmark': ('zole_benchmark', 'start', 'Benchmark the Zole engine and environment'),
+    'fuzz': ('zole_fuzz', 'start', 'Fuzz an alternative Zole engine against the reference engine'),
+    'bidding_table': ('zole_bidding_table', 'start', 'Precompute the Zole bidding table'),
+    'bidding_cfr': ('zole_bidding_cfr', 'start', 'Solve the Zole take/pass decisions with CFR'),
+    'train_dmc': ('dmc_training', 'train', 'Train DMC agents'),
+    'train_rl': ('rl_training', 'train', 'Train DQN/NFSP agents'),
+}
+
+
+class ImportProfiler(object):
+    """ Times the first import of every module through builtins.__import__, nested imports are subtracted from the
+        time of the importing module and the times are summed per top-level package
+    """
+
+    def __init__(self):
+        self.self_times: dict = {}
+        self._import = builtins.__import__
+        self._children: list = []
+
+    def start(self):
+        self._start = perf_counter()
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        builtins.__import__ = self._import
+        self.elapsed = perf_counter() - self._start
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        start = perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = perf_counter() - start
+            nested = self._children.pop()
+            package = name.partition('.')[0]
+            self.self_times[package] = self.self_times.get(package, 0.0) + elapsed - nested
+            if self._children:
+                self._children[-1] += elapsed
+
+    def display(self, limit: int = 15):
+        total = sum(self.self_times.values())
+        print(f'Imports took {total:.3f}s of {self.elapsed:.3f}s', file=sys.stderr)
+        for package, seconds in sorted(self.self_times.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            print(f'{seconds:8.3f}s  {package}', file=sys.stderr)
+
+
+def main(argv: list):
+    parser = argparse.ArgumentParser(
+        'zole_cli.py',
+        description='\n'.join(f'  {command:14s} {description}' for command, (_, _, description) in commands.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--import_profile',
+        action='store_true',
+        help='Report the import time of every top-level package when the command ends',
+    )
+
+    parser.add_argument(
+        'command',
+        choices=list(commands),
+    )
+
+    parser.add_argument(
+        'arguments',
+        nargs=argparse.REMAINDER,
+    )
+
+    args = parser.parse_args(argv)
+
+    profiler = ImportProfiler()
+    if args.import_profile:
+        profiler.start()
+    try:
+        module_name, function_name, description = commands[args.command]
+        module = importlib.import_module(module_name)
+        command_parser = argparse.ArgumentParser(f'zole_cli.py {args.command}', description=description)
+        if hasattr(module, 'add_arguments'):
+            module.add_arguments(command_parser)
+        getattr(module, function_name)(command_parser.parse_args(args.arguments))
+    finally:
+        if args.import_profile:
+            profiler.stop()
+            profiler.display()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,308 @@
+""" Distributed evaluation over a job queue, see job_queue.py
+
+    python zole_eval_queue.py submit --agents experiments/trained/dqn --baselines heuristic,heuristic --seeds 14 15
+    python zole_eval_queue.py worker --num_workers 8     (on every host sharing the queue file)
+    python zole_eval_queue.py status
+    python zole_eval_queue.py export --output_path performance/queue.csv
+
+    A job plays its two baseline agents in seats 0 and 1 against the evaluated agent in seat 2 with run_tournament.
+"""
+import envs
+from job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+from opponent_pool import FrozenPolicyCache
+from seeding import set_seed
+from tournament_stats import ROLES, run_tournament
+from zole_league import expand_specs
+
+import argparse
+import csv
+import itertools
+import os
+import socket
+import threading
+import time
+from multiprocessing import Process
+
+import numpy as np
+import rlcard
+
+
+def job_specs(args) -> list:
+    """ Every evaluated agent against every baseline pair with every seed
+    """
+    baselines = [baseline.split(',') for baseline in args.baselines]
+    for baseline in baselines:
+        if len(baseline) != 2:
+            raise Exception(f'zole_eval_queue: a baseline is two comma-separated agents, got {",".join(baseline)}')
+    return [
+        {
+            'agents': [baseline[0], baseline[1], agent],
+            'seed': seed,
+            'num_games': args.num_games,
+            'target_ci_width': args.target_ci_width,
+        }
+        for agent, baseline, seed in itertools.product(expand_specs(args.agents), baselines, args.seeds)
+    ]
+
+
+def run_job(spec: dict, cache: FrozenPolicyCache, should_stop=None) -> dict:
+    set_seed(spec['seed'])
+    env = rlcard.make(
+        'zole',
+        {
+            'seed': spec['seed'],
+            'display_performance_interval': 10 ** 9,
+        }
+    )
+    agents = [cache.get(agent) for agent in spec['agents']]
+    # cached agents keep their samplers between jobs, a job reseeds them so its result only depends on its spec
+    for seat, agent in enumerate(agents):
+        if hasattr(agent, 'np_random') and agent not in agents[:seat]:
+            agent.np_random = np.random.RandomState(np.random.MT19937(np.random.SeedSequence([spec['seed'], seat])))
+    env.set_agents(agents)
+    _, summary = run_tournament(
+        env,
+        spec['num_games'],
+        target_ci_width=spec['target_ci_width'],
+        seed=spec['seed'],
+        should_stop=should_stop,
+    )
+    return {
+        'num_games': summary['num_games'],
+        'mean': summary['mean'].tolist(),
+        'se': summary['se'].tolist(),
+        'ci': summary['ci'].tolist(),
+        'roles': {role: {key: values.tolist() for key, values in summary['roles'][role].items()} for role in ROLES},
+    }
+
+
+class Heartbeat(threading.Thread):
+    """ Renews the heartbeat of a running job on its own connection, until stopped or until the job is lost to a
+        requeue, which sets `lost`
+    """
+
+    def __init__(self, queue_path: str, job_id: int, worker: str, interval: float):
+        super().__init__(name='heartbeat', daemon=True)
+        self.queue_path = queue_path
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        queue = JobQueue(self.queue_path)
+        try:
+            while not self.stopped.wait(self.interval):
+                if not queue.heartbeat(self.job_id, self.worker):
+                    self.lost.set()
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def work(args, worker: str):
+    """ Claim and run jobs until the queue has no pending or running jobs left, or forever with --wait
+    """
+    queue = JobQueue(args.queue_path, stale_after=args.stale_after, max_attempts=args.max_attempts)
+    cache = None
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            counts = queue.counts()
+            if not args.wait and counts[PENDING] == 0 and counts[RUNNING] == 0:
+                break
+            # running jobs of other workers are requeued here if their workers crash
+            time.sleep(args.poll_interval)
+            continue
+        if cache is None:
+            cache = FrozenPolicyCache(rlcard.make('zole'), max_policies=args.cache_size)
+        job_id, spec = claimed
+        heartbeat = Heartbeat(args.queue_path, job_id, worker, args.heartbeat_interval)
+        heartbeat.start()
+        start_time = time.perf_counter()
+        try:
+            # a job requeued while it runs belongs to another worker, it is stopped after the current batch of games
+            result = run_job(spec, cache, should_stop=heartbeat.lost.is_set)
+        except Exception as error:
+            queue.fail(job_id, worker, repr(error))
+            print(f'{worker}: job {job_id} failed: {error!r}')
+        else:
+            if not heartbeat.lost.is_set() and queue.complete(job_id, worker, result):
+                print(f'{worker}: job {job_id} done in {time.perf_counter() - start_time:.1f}s')
+            else:
+                print(f'{worker}: job {job_id} stopped, its heartbeat went stale')
+        finally:
+            heartbeat.stop()
+    queue.close()
+
+
+def export(args):
+    queue = JobQueue(args.queue_path)
+    os.makedirs(os.path.dirname(args.output_path) or '.', exist_ok=True)
+    fieldnames = ['agent', 'baseline_0', 'baseline_1', 'seed', 'games']
+    for seat in range(3):
+        fieldnames += [f'score_{seat}', f'score_se_{seat}', f'score_ci_low_{seat}', f'score_ci_high_{seat}']
+    fieldnames += [f'{role}_share_2' for role in ROLES] + [f'{role}_score_2' for role in ROLES]
+    num_rows = 0
+    with open(args.output_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        for spec, result in queue.results():
+            row = {
+                'agent': spec['agents'][2],
+                'baseline_0': spec['agents'][0],
+                'baseline_1': spec['agents'][1],
+                'seed': spec['seed'],
+                'games': result['num_games'],
+            }
+            for seat in range(3):
+                row[f'score_{seat}'] = result['mean'][seat]
+                row[f'score_se_{seat}'] = result['se'][seat]
+                row[f'score_ci_low_{seat}'], row[f'score_ci_high_{seat}'] = result['ci'][seat]
+            for role in ROLES:
+                row[f'{role}_share_2'] = result['roles'][role]['share'][2]
+                row[f'{role}_score_2'] = result['roles'][role]['mean'][2]
+            writer.writerow(row)
+            num_rows += 1
+    print(f'{num_rows} results saved in {args.output_path}')
+    for spec, error in queue.failures():
+        print(f'Failed {spec["agents"]} seed {spec["seed"]}: {error}')
+    queue.close()
+
+
+def start(args):
+    if args.action == 'submit':
+        queue = JobQueue(args.queue_path)
+        specs = job_specs(args)
+        print(f'Added {queue.add_jobs(specs)} of {len(specs)} jobs to {args.queue_path}')
+        queue.close()
+    elif args.action == 'worker':
+        worker = args.worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        if args.num_workers == 1:
+            work(args, worker)
+        else:
+            processes = [Process(target=work, args=(args, f'{worker}/{index}')) for index in range(args.num_workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+    elif args.action == 'status':
+        queue = JobQueue(args.queue_path)
+        counts = queue.counts()
+        print(', '.join(f'{counts[status]} {status}' for status in (PENDING, RUNNING, DONE, FAILED)))
+        queue.close()
+    else:  # args.action == 'export'
+        export(args)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--queue_path',
+        type=str,
+        default='experiments/eval_queue.sqlite',
+        help='The SQLite queue file, on a file system shared by all hosts',
+    )
+
+    actions = parser.add_subparsers(dest='action', required=True)
+
+    submit = actions.add_parser('submit', help='Add evaluation jobs, jobs already in the queue are skipped')
+    submit.add_argument(
+        '--agents',
+        type=str,
+        nargs='+',
+        required=True,
+        help='Evaluated agents: random, heuristic, agent files or directories of .pth/.npz agent files',
+    )
+    submit.add_argument(
+        '--baselines',
+        type=str,
+        nargs='+',
+        default=['heuristic,heuristic'],
+        help='Baseline pairs as two comma-separated agents',
+    )
+    submit.add_argument(
+        '--seeds',
+        type=int,
+        nargs='+',
+        default=[14],
+    )
+    submit.add_argument(
+        '--num_games',
+        type=int,
+        default=2000,
+    )
+    submit.add_argument(
+        '--target_ci_width',
+        type=float,
+        default=None,
+        help='Stop a job once the confidence intervals of all seats are narrower than it',
+    )
+
+    worker = actions.add_parser('worker', help='Run jobs until the queue is empty')
+    worker.add_argument(
+        '--num_workers',
+        type=int,
+        default=1,
+        help='Worker processes on this host',
+    )
+    worker.add_argument(
+        '--worker_id',
+        type=str,
+        default=None,
+        help='Defaults to host:pid',
+    )
+    worker.add_argument(
+        '--heartbeat_interval',
+        type=float,
+        default=30.0,
+    )
+    worker.add_argument(
+        '--stale_after',
+        type=float,
+        default=300.0,
+        help='Seconds without heartbeat after which a running job is requeued',
+    )
+    worker.add_argument(
+        '--max_attempts',
+        type=int,
+        default=3,
+    )
+    worker.add_argument(
+        '--poll_interval',
+        type=float,
+        default=10.0,
+        help='Seconds between claims while other workers still run jobs',
+    )
+    worker.add_argument(
+        '--wait',
+        action='store_true',
+        help='Keep polling for new jobs when the queue is empty',
+    )
+    worker.add_argument(
+        '--cache_size',
+        type=int,
+        default=8,
+        help='Number of agents kept loaded',
+    )
+
+    actions.add_parser('status', help='Count the jobs by status')
+
+    export_parser = actions.add_parser('export', help='Save the results of the done jobs as CSV')
+    export_parser.add_argument(
+        '--output_path',
+        type=str,
+        default='performance/eval_queue.csv',
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Evaluate agents with workers over a shared job queue')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
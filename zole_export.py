@@ -0,0 +1,184 @@
+""" Export trained DMC/DQN/NFSP agents to NumPy .npz inference artifacts for ZoleNumpyAgent
+"""
+import envs
+from agents.zole_numpy_agent import ZoleNumpyAgent
+from games.zole.utils.action_event import ActionEvent
+
+import argparse
+import os
+import re
+
+import numpy as np
+import rlcard
+import torch
+
+
+def export_state_dict(state_dict: dict, kind: str, prefix: str, num_actions: int) -> ZoleNumpyAgent:
+    """ Build a NumPy agent from the state dict of an nn.Sequential of [Flatten, BatchNorm1d,] Linear/activation
+        layers. The eval-mode BatchNorm is folded into the first linear layer.
+    """
+    layer_pattern = re.compile(re.escape(prefix) + r'(\d+)\.weight$')
+    linears, batch_norm = [], None
+    for key in sorted(state_dict, key=lambda key: _layer_index(layer_pattern, key)):
+        match = layer_pattern.match(key)
+        if not match:
+            continue
+        layer = prefix + match.group(1)
+        weight = state_dict[key].detach().cpu().numpy().astype(np.float64)
+        if weight.ndim == 2:
+            linears.append((weight.T, state_dict[layer + '.bias'].detach().cpu().numpy().astype(np.float64)))
+        elif layer + '.running_mean' in state_dict:
+            if linears:
+                raise Exception(f'zole_export: BatchNorm after a linear layer is not supported ({layer})')
+            batch_norm = {
+                name: state_dict[f'{layer}.{name}'].detach().cpu().numpy().astype(np.float64)
+                for name in ('weight', 'bias', 'running_mean', 'running_var')
+            }
+
+    if batch_norm is not None:
+        scale = batch_norm['weight'] / np.sqrt(batch_norm['running_var'] + 1e-5)
+        shift = batch_norm['bias'] - batch_norm['running_mean'] * scale
+        weight, bias = linears[0]
+        linears[0] = (scale[:, None] * weight, shift @ weight + bias)
+
+    return ZoleNumpyAgent(
+        kind=kind,
+        activation='tanh' if kind == 'dqn' else 'relu',
+        weights=[weight for weight, _ in linears],
+        biases=[bias for _, bias in linears],
+        num_actions=num_actions,
+    )
+
+
+def export_agent(agent, nfsp_policy: str = 'average_policy') -> ZoleNumpyAgent:
+    """ Export a DMCAgent, ZoleDMCAgent, DQNAgent or NFSPAgent object
+    """
+    agent_type = type(agent).__name__
+    if agent_type == 'ZoleDMCAgent':
+        return export_state_dict(agent.net.state_dict(), 'dmc_batched', 'fc_layers.', agent.action_shape[0])
+    if agent_type == 'DMCAgent':
+        return export_state_dict(agent.net.state_dict(), 'dmc', 'fc_layers.', agent.action_shape[0])
+    if agent_type == 'DQNAgent':
+        return export_state_dict(agent.q_estimator.qnet.state_dict(), 'dqn', 'fc_layers.', agent.num_actions)
+    if agent_type == 'NFSPAgent':
+        if nfsp_policy == 'best_response':
+            return export_agent(agent._rl_agent)
+        return export_state_dict(agent.policy_network.state_dict(), 'nfsp', 'mlp.', agent._num_actions)
+    raise Exception(f'zole_export: unsupported agent type {agent_type}')
+
+
+def export_path(path: str, index: int = 0, nfsp_policy: str = 'average_policy') -> ZoleNumpyAgent:
+    """ Export a pickled agent (.pth), a DMC trainer checkpoint (model.tar) or a rl_training.py checkpoint (.pt),
+        index selects the player position of checkpoints holding several agents
+    """
+    num_actions = ActionEvent.get_num_actions()
+    loaded = torch.load(path, map_location='cpu', weights_only=False)
+    if not isinstance(loaded, dict):
+        return export_agent(loaded, nfsp_policy)
+    if 'model_state_dict' in loaded:
+        state_dict = loaded['model_state_dict'][index]
+        last_bias = [key for key in state_dict if key.endswith('.bias')][-1]
+        kind = 'dmc' if state_dict[last_bias].shape[0] == 1 else 'dmc_batched'
+        return export_state_dict(state_dict, kind, 'fc_layers.', num_actions)
+    if 'agents' in loaded:
+        state = loaded['agents'][index]
+        if 'policy_network' in state:
+            if nfsp_policy == 'best_response':
+                return export_state_dict(state['rl_agent']['qnet'], 'dqn', 'fc_layers.', num_actions)
+            return export_state_dict(state['policy_network'], 'nfsp', 'mlp.', num_actions)
+        return export_state_dict(state['qnet'], 'dqn', 'fc_layers.', num_actions)
+    raise Exception(f'zole_export: unknown checkpoint format {path}')
+
+
+def action_agreement(reference, candidate, env, num_games: int) -> float:
+    """ Share of decisions on which candidate takes the same action as reference, over games played by reference
+        in every seat. Agents that sample their actions are compared on their most likely action.
+    """
+    env.set_agents([reference] * env.num_players)
+    agreed = total = 0
+    for _ in range(num_games):
+        trajectories, _ = env.run(is_training=False)
+        for trajectory in trajectories:
+            for state in trajectory[:-1:2]:
+                agreed += _greedy_action(reference, state) == _greedy_action(candidate, state)
+                total += 1
+    return agreed / total if total else 1.0
+
+
+def _greedy_action(agent, state) -> int:
+    action, info = agent.eval_step(state)
+    if 'probs' in info:
+        return max(info['probs'], key=info['probs'].get)
+    return action
+
+
+def _layer_index(layer_pattern, key: str) -> int:
+    match = layer_pattern.match(key)
+    return int(match.group(1)) if match else -1
+
+
+def start(args):
+    agent = export_path(args.model_path, args.index, args.nfsp_policy)
+    output_path = args.output_path or os.path.splitext(args.model_path)[0] + '.npz'
+    agent.save_npz(output_path)
+    print(f'Exported {agent.kind} network with {len(agent.weights)} layers to {output_path}')
+
+    if args.verify_games > 0:
+        reference = torch.load(args.model_path, map_location='cpu', weights_only=False)
+        if isinstance(reference, dict):
+            print('Verification needs a pickled agent, skipped')
+            return
+        env = rlcard.make('zole', {'seed': args.seed_id})
+        agreement = action_agreement(reference, ZoleNumpyAgent.from_npz(output_path), env, args.verify_games)
+        print(f'Action agreement with the torch agent {agreement:.4f}')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--model_path',
+        type=str,
+        default='samples/dmc/2_137897600.pth',
+        help='Pickled agent (.pth), DMC checkpoint (model.tar) or rl_training.py checkpoint (.pt)',
+    )
+
+    parser.add_argument(
+        '--output_path',
+        type=str,
+        default='',
+        help='Defaults to the model path with the .npz extension',
+    )
+
+    parser.add_argument(
+        '--index',
+        type=int,
+        default=0,
+        help='Player position of checkpoints holding several agents',
+    )
+
+    parser.add_argument(
+        '--nfsp_policy',
+        type=str,
+        default='average_policy',
+        choices=['average_policy', 'best_response'],
+    )
+
+    parser.add_argument(
+        '--verify_games',
+        type=int,
+        default=100,
+        help='Games on which the exported agent is compared with a pickled torch agent, 0 skips the check',
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Export an agent to a NumPy inference artifact')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
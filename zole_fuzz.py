@@ -0,0 +1,467 @@
+""" Rule-equivalence fuzzer between the reference Zole engine and an alternative engine
+
+    Seeded random games are played through the reference ZoleGame (the oracle) and a candidate engine side by
+    side. Current player, legal actions, observations and payoffs are compared after every step. A divergence is
+    shrunk to a minimal game log: the action choices are truncated at the first divergent step and every choice
+    is then lowered towards the first legal action for as long as the engines still disagree.
+
+    A candidate engine is any class implementing ZoleEngine, given as `module:ClassName` with --engine.
+    FrozenZoleEngine is a self-contained copy of the rules, `--engine zole_fuzz:FrozenZoleEngine` checks the
+    current engine against it.
+"""
+from envs.zole import DefaultZolePayoffDelegate, DefaultZoleStateExtractor
+from games.zole.game import ZoleGame
+from games.zole.utils.action_event import ActionEvent
+from games.zole.utils.zole_card import ZoleCard
+
+import argparse
+import importlib
+import json
+import os
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+
+ZoleDeal = namedtuple('ZoleDeal', ['board_id', 'deck'])  # deck: card ids in shuffled order, dealt from the end
+
+
+class ZoleEngine(object):  # interface
+    def reset(self, deal: ZoleDeal):
+        """ Start a new round with the given deal
+        """
+        raise NotImplementedError
+
+    def current_player(self) -> int:
+        raise NotImplementedError
+
+    def legal_actions(self) -> list[int]:
+        """ Return the sorted action ids legal for the current player
+        """
+        raise NotImplementedError
+
+    def observation(self) -> np.ndarray:
+        """ Return the observation of the current player in the DefaultZoleStateExtractor layout
+        """
+        raise NotImplementedError
+
+    def step(self, action_id: int):
+        raise NotImplementedError
+
+    def is_over(self) -> bool:
+        raise NotImplementedError
+
+    def payoffs(self) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ReferenceZoleEngine(ZoleEngine):
+    """ The oracle: ZoleGame, ZoleRound and ZoleJudger as used by ZoleEnv
+    """
+
+    def __init__(self):
+        self.game = ZoleGame()
+        self.state_extractor = DefaultZoleStateExtractor()
+        self.payoff_delegate = DefaultZolePayoffDelegate()
+
+    def reset(self, deal: ZoleDeal):
+        self.game.init_game(board_id=deal.board_id, deck=[ZoleCard.card(card_id=card_id) for card_id in deal.deck])
+
+    def current_player(self) -> int:
+        return self.game.round.current_player_id
+
+    def legal_actions(self) -> list[int]:
+        return sorted(action.action_id for action in self.game.judger.get_legal_actions())
+
+    def observation(self) -> np.ndarray:
+        return self.state_extractor.extract_state(game=self.game)['obs']
+
+    def step(self, action_id: int):
+        self.game.step(ActionEvent.from_action_id(action_id=action_id))
+
+    def is_over(self) -> bool:
+        return self.game.is_over()
+
+    def payoffs(self) -> np.ndarray:
+        return self.payoff_delegate.get_payoffs(game=self.game, large_win_incentive=0)
+
+
+class FrozenZoleEngine(ZoleEngine):
+    """ A self-contained copy of the rules, kept independent of games/zole and envs/zole.py so that changes to the
+        engine are checked against fixed behaviour. Cards and actions are plain ids, the observation is written in
+        the DefaultZoleStateExtractor layout with its quirks: the finished trick stays in the trick planes until the
+        next card is played and the table cards stay hidden cards of the large player until the burying is over.
+    """
+    # card ids 0-11 are the plain suits hearts, spades and clubs, 12-25 the trumps from 7D up to QC
+    card_points = [0, 4, 10, 11] * 3 + [0, 0, 0, 4, 10, 11, 2, 2, 2, 2, 3, 3, 3, 3]
+    pass_action_id = 1
+    take_action_id = 2
+    first_bury_action_id = 3
+    first_play_action_id = 29
+
+    def __init__(self):
+        self.dealer_id: int = 0
+        self.hands: list[list[int]] = []
+        self.table: list[int] = []
+        self.buried: list[int] = []
+        self.trick: list[tuple[int, int]] = []  # (player, card id) of the current or the last finished trick
+        self.current_id: int = 0
+        self.large_id: int or None = None
+        self.pass_count: int = 0
+        self.play_count: int = 0
+        self.points: list[int] = [0, 0]  # by side, the large player first
+        self.trick_counts: list[int] = [0, 0]
+
+    @staticmethod
+    def suit(card_id: int) -> int:
+        return 3 if card_id >= 12 else card_id // 4
+
+    def reset(self, deal: ZoleDeal):
+        self.dealer_id = (deal.board_id - 1) % 3
+        stock = list(deal.deck)
+        self.hands = [[], [], []]
+        self.table = []
+        for part in range(2):
+            for offset in (1, 2, 0):
+                for _ in range(4):
+                    self.hands[(self.dealer_id + offset) % 3].append(stock.pop())
+            if part == 0:
+                self.table = [stock.pop(), stock.pop()]
+        self.buried = []
+        self.trick = []
+        self.current_id = (self.dealer_id + 1) % 3
+        self.large_id = None
+        self.pass_count = 0
+        self.play_count = 0
+        self.points = [0, 0]
+        self.trick_counts = [0, 0]
+
+    def is_bidding_over(self) -> bool:
+        return self.pass_count == 3 or len(self.buried) == 2
+
+    def current_player(self) -> int:
+        return self.current_id
+
+    def legal_actions(self) -> list[int]:
+        if self.is_over():
+            return []
+        hand = self.hands[self.current_id]
+        if not self.is_bidding_over():
+            if len(hand) > 8:
+                return sorted(self.first_bury_action_id + card_id for card_id in hand)
+            return [self.pass_action_id, self.take_action_id]
+        cards = hand
+        if len(self.trick) in (1, 2):
+            led_suit = self.suit(self.trick[0][1])
+            cards = [card_id for card_id in hand if self.suit(card_id) == led_suit] or hand
+        return sorted(self.first_play_action_id + card_id for card_id in cards)
+
+    def observation(self) -> np.ndarray:
+        obs = np.zeros(192, dtype=int)
+        if not self.is_over():
+            for card_id in self.hands[self.current_id]:
+                obs[self.current_id * 26 + card_id] = 1
+            for player_id, card_id in self.trick:
+                obs[78 + player_id * 26 + card_id] = 1
+            opponent_ids = [player_id for player_id in range(3) if player_id != self.current_id]
+            hidden_cards = [card_id for player_id in opponent_ids for card_id in self.hands[player_id]]
+            if not self.is_bidding_over():
+                hidden_cards += self.table
+            elif self.current_id != self.large_id:
+                hidden_cards += self.buried
+            for card_id in hidden_cards:
+                obs[156 + card_id] = 1
+        obs[182 + self.dealer_id] = 1
+        if self.large_id is not None:
+            obs[185 + self.large_id] = 1
+        obs[188 + self.current_id] = 1
+        obs[191] = 1 if self.is_bidding_over() else 0
+        return obs
+
+    def step(self, action_id: int):
+        hand = self.hands[self.current_id]
+        if action_id == self.pass_action_id:
+            self.pass_count += 1
+        elif action_id == self.take_action_id:
+            self.large_id = self.current_id
+            hand += self.table
+            return
+        elif action_id < self.first_play_action_id:
+            card_id = action_id - self.first_bury_action_id
+            hand.remove(card_id)
+            self.buried.append(card_id)
+            self.points[0] += self.card_points[card_id]
+            if len(hand) > 8:
+                return
+        else:
+            self.play_card(action_id - self.first_play_action_id)
+            return
+        if not self.is_bidding_over():
+            self.current_id = (self.current_id + 1) % 3
+        elif not self.is_over():
+            self.current_id = (self.dealer_id + 1) % 3
+
+    def play_card(self, card_id: int):
+        self.hands[self.current_id].remove(card_id)
+        self.play_count += 1
+        if len(self.trick) == 3:
+            self.trick = []
+        self.trick.append((self.current_id, card_id))
+        if len(self.trick) < 3:
+            self.current_id = (self.current_id + 1) % 3
+            return
+        winner_id, winning_card_id = self.trick[0]
+        for player_id, card_id in self.trick[1:]:
+            same_suit = self.suit(card_id) == self.suit(winning_card_id) or self.suit(card_id) == 3
+            if same_suit and card_id > winning_card_id:
+                winner_id, winning_card_id = player_id, card_id
+        side = 0 if winner_id == self.large_id else 1
+        self.trick_counts[side] += 1
+        self.points[side] += sum(self.card_points[card_id] for _, card_id in self.trick)
+        self.current_id = winner_id
+
+    def is_over(self) -> bool:
+        if not self.is_bidding_over():
+            return False
+        return self.large_id is None or self.play_count == 24
+
+    def payoffs(self) -> np.ndarray:
+        if self.large_id is None:
+            return np.zeros(3, dtype=int)
+        large_points = self.points[0]
+        if self.trick_counts[0] == 0:
+            scores = [-8, 4]
+        elif self.trick_counts[1] == 0:
+            scores = [6, -3]
+        elif large_points >= 91:
+            scores = [4, -2]
+        elif large_points >= 61:
+            scores = [2, -1]
+        elif large_points > 31:
+            scores = [-4, 2]
+        else:
+            scores = [-6, 3]
+        return np.array([scores[0] if player_id == self.large_id else scores[1] for player_id in range(3)])
+
+
+def make_deal(seed: int) -> ZoleDeal:
+    np_random = np.random.RandomState(seed)
+    board_id = int(np_random.choice([1, 2, 3]))
+    deck = [int(card_id) for card_id in np_random.permutation(len(ZoleCard.cards))]
+    return ZoleDeal(board_id=board_id, deck=deck)
+
+
+def make_choices(seed: int, length: int = 64) -> list[int]:
+    """ Random choices, the i-th choice picks legal_actions[choice % len(legal_actions)] at step i, steps past the
+        end of the choices pick the first legal action
+    """
+    return np.random.RandomState(seed + 1).randint(0, 1 << 16, size=length).tolist()
+
+
+def compare_game(reference: ZoleEngine, candidate: ZoleEngine, deal: ZoleDeal, choices: list[int]) -> dict or None:
+    """ Play one game through both engines and return the first divergence, None when the engines agree
+
+    Returns:
+        (dict): step, field, reference and candidate values, the action ids played before the divergence and the
+            choices that picked them reduced to indices into the legal actions
+    """
+    reference.reset(deal)
+    candidate.reset(deal)
+    actions = []
+    played_choices = []
+
+    def divergence(field, reference_value, candidate_value):
+        return {
+            'step': len(actions),
+            'field': field,
+            'reference': reference_value,
+            'candidate': candidate_value,
+            'actions': list(actions),
+            'choices': list(played_choices),
+        }
+
+    while True:
+        reference_is_over = reference.is_over()
+        if reference_is_over != candidate.is_over():
+            return divergence('is_over', reference_is_over, not reference_is_over)
+        if reference_is_over:
+            break
+
+        fields = [
+            ('current_player', reference.current_player(), candidate.current_player()),
+            ('legal_actions', reference.legal_actions(), candidate.legal_actions()),
+        ]
+        for field, reference_value, candidate_value in fields:
+            if reference_value != candidate_value:
+                return divergence(field, reference_value, candidate_value)
+
+        reference_obs = reference.observation()
+        candidate_obs = candidate.observation()
+        if not np.array_equal(reference_obs, candidate_obs):
+            return divergence('observation', np.flatnonzero(reference_obs).tolist(), np.flatnonzero(candidate_obs).tolist())
+
+        legal_actions = fields[1][1]
+        choice = choices[len(actions)] % len(legal_actions) if len(actions) < len(choices) else 0
+        action_id = legal_actions[choice]
+        reference.step(action_id)
+        candidate.step(action_id)
+        actions.append(action_id)
+        played_choices.append(choice)
+
+    reference_payoffs = np.asarray(reference.payoffs()).tolist()
+    candidate_payoffs = np.asarray(candidate.payoffs()).tolist()
+    if reference_payoffs != candidate_payoffs:
+        return divergence('payoffs', reference_payoffs, candidate_payoffs)
+    return None
+
+
+def shrink(reference: ZoleEngine, candidate: ZoleEngine, deal: ZoleDeal, divergence: dict) -> dict:
+    """ Shrink the choices of a diverging game while the engines keep diverging
+    """
+    choices = divergence['choices']
+    improved = True
+    while improved:
+        improved = False
+        for index in range(len(choices)):
+            for smaller in range(choices[index]):
+                attempt = choices[:index] + [smaller] + choices[index + 1:]
+                attempt_divergence = compare_game(reference, candidate, deal, attempt)
+                if attempt_divergence is not None:
+                    choices = attempt_divergence['choices']
+                    divergence = attempt_divergence
+                    improved = True
+                    break
+            if improved:
+                break
+    return divergence
+
+
+def to_game_log(seed: int, deal: ZoleDeal, divergence: dict) -> dict:
+    return {
+        'seed': seed,
+        'board_id': deal.board_id,
+        'deck': [str(ZoleCard.card(card_id=card_id)) for card_id in deal.deck],
+        'choices': divergence['choices'],
+        'actions': [str(ActionEvent.from_action_id(action_id=action_id)) for action_id in divergence['actions']],
+        'divergence': divergence,
+    }
+
+
+def load_engine(spec: str) -> ZoleEngine:
+    """ Instantiate an engine from a `module:ClassName` spec
+    """
+    module_name, class_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def fuzz_seeds(engine_spec: str, seeds: range, shrink_divergence: bool = True) -> tuple[int, dict or None]:
+    """ Compare the games of the given seeds, stops at the first divergence
+
+    Returns:
+        (tuple): number of games played and the shrunk game log of the divergence if any
+    """
+    reference = ReferenceZoleEngine()
+    candidate = load_engine(engine_spec)
+    for count, seed in enumerate(seeds, start=1):
+        deal = make_deal(seed)
+        divergence = compare_game(reference, candidate, deal, make_choices(seed))
+        if divergence is not None:
+            if shrink_divergence:
+                divergence = shrink(reference, candidate, deal, divergence)
+            return count, to_game_log(seed, deal, divergence)
+    return len(seeds), None
+
+
+def _fuzz_chunk(task):
+    return fuzz_seeds(*task)
+
+
+def start(args):
+    chunks = [
+        (args.engine, range(start_seed, min(start_seed + args.chunk_size, args.seed_id + args.num_games)), not args.no_shrink)
+        for start_seed in range(args.seed_id, args.seed_id + args.num_games, args.chunk_size)
+    ]
+    games_played = 0
+    game_logs = []
+    with Pool(processes=args.num_workers) as pool:
+        for count, game_log in pool.imap_unordered(_fuzz_chunk, chunks):
+            games_played += count
+            if game_log is not None:
+                game_logs.append(game_log)
+                if not args.keep_going:
+                    pool.terminate()
+                    break
+
+    print(f'Games compared #{games_played}')
+    if not game_logs:
+        print(f'No divergence between reference and {args.engine}')
+        return
+
+    game_logs.sort(key=lambda game_log: len(game_log['actions']))
+    os.makedirs(os.path.dirname(args.output_path) or '.', exist_ok=True)
+    with open(args.output_path, 'w') as file:
+        json.dump(game_logs, file, indent=2)
+    print(f'Divergences #{len(game_logs)}, shortest:')
+    print(json.dumps(game_logs[0], indent=2))
+    print(f'Game logs saved in {args.output_path}')
+    raise SystemExit(1)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--engine',
+        type=str,
+        default='zole_fuzz:ReferenceZoleEngine',
+        help='Candidate engine as module:ClassName, defaults to the reference engine itself as a self-check',
+    )
+
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=100000,
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=0,
+        help='First seed, games use seeds seed_id .. seed_id + num_games - 1',
+    )
+
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        '--chunk_size',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--keep_going',
+        action='store_true',
+        help='Continue after the first divergence and collect a game log per chunk',
+    )
+
+    parser.add_argument(
+        '--no_shrink',
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--output_path',
+        type=str,
+        default='performance/fuzz/divergences.json',
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Fuzz an alternative Zole engine against the reference engine')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
@@ -1,15 +1,14 @@
 """ A toy example of self playing for Zole
 """
 import envs
-from defined_agents import get_random_agent, get_human_agent
+from defined_agents import get_path_agent, get_random_agent, get_human_agent
 from games.zole.utils.action_event import PlayCardAction
+from seeding import set_seed
 
 import argparse
-import torch
 
 import rlcard
 from rlcard.utils.utils import print_card
-from rlcard.utils import set_seed
 
 
 def get_env():
@@ -29,7 +28,7 @@ def start_game_loop(args):
     env.set_agents([
         get_human_agent(env),
         get_random_agent(env),
-        torch.load(args.agent_path)
+        get_path_agent(args.agent_path)
     ])
 
     while True:
@@ -60,14 +59,17 @@ def start_game_loop(args):
         input('Press any key to continue...')
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser('Game loop as human with random and trained agent')
+def add_arguments(parser: argparse.ArgumentParser):
     parser.add_argument(
         '--agent_path',
         type=str,
         default='samples/dmc/2_137897600.pth',
     )
 
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Game loop as human with random and trained agent')
+    add_arguments(parser)
     args = parser.parse_args()
 
     start_game_loop(args)
@@ -0,0 +1,136 @@
+import envs
+from defined_agents import close_agents, get_heuristic_agent, get_path_agent, get_pimc_agent, get_random_agent
+from league import League, play_match
+
+import argparse
+import os
+
+import numpy as np
+import rlcard
+
+
+builtin_agents = {
+    'random': get_random_agent,
+    'heuristic': get_heuristic_agent,
+    'pimc': get_pimc_agent,
+}
+
+
+def expand_specs(specs: list) -> list:
+    """ Agent specs are builtin agent names, agent files or directories of .pth/.npz agent files
+    """
+    expanded = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            files = sorted(file for file in os.listdir(spec) if file.endswith(('.pth', '.npz')))
+            expanded.extend(os.path.join(spec, file) for file in files)
+        else:
+            expanded.append(spec)
+    return expanded
+
+
+def load_agent(env, spec: str):
+    if spec in builtin_agents:
+        return builtin_agents[spec](env)
+    return get_path_agent(spec)
+
+
+def print_standings(league: League):
+    print(f'League after {league.num_matches} matches, {league.num_games} games')
+    for rank, (name, agent) in enumerate(league.standings(), start=1):
+        payoff = agent['payoff'] / agent['games'] if agent['games'] else 0.0
+        print(f'{rank:3d} {agent["rating"]:7.1f} ±{agent["deviation"]:5.1f} {payoff:+.3f}/game {agent["games"]:7d} games  {name}')
+
+
+def start(args):
+    env = rlcard.make(
+        'zole',
+        {
+            'seed': args.seed_id,
+            'display_performance_interval': 10 ** 9,
+        }
+    )
+
+    league = League(args.league_path)
+    for spec in expand_specs(args.agents):
+        league.add_agent(spec, spec)
+    # a resumed league continues its schedule instead of replaying the same random draws
+    np_random = np.random.RandomState((args.seed_id + league.num_matches) % 2 ** 32)
+
+    loaded = {}
+    try:
+        for _ in range(args.num_matches):
+            if league.max_deviation() <= args.target_deviation:
+                print(f'All rating deviations are below {args.target_deviation}')
+                break
+            names = league.schedule(np_random)
+            for name in names:
+                if name not in loaded:
+                    loaded[name] = load_agent(env, league.agents[name]['spec'])
+            payoffs, num_games = play_match(env, [loaded[name] for name in names], args.games_per_match)
+            league.record_match(names, payoffs, num_games)
+            league.save()
+            if league.num_matches % args.report_interval == 0:
+                print_standings(league)
+    finally:
+        close_agents(loaded.values())
+
+    if league.num_matches % args.report_interval != 0:
+        print_standings(league)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--agents',
+        type=str,
+        nargs='+',
+        default=['random', 'heuristic', 'samples/dmc'],
+        help='random, heuristic, pimc, agent files or directories of .pth/.npz agent files',
+    )
+
+    parser.add_argument(
+        '--league_path',
+        type=str,
+        default='experiments/league.json',
+        help='League state, resumed when it exists',
+    )
+
+    parser.add_argument(
+        '--num_matches',
+        type=int,
+        default=200,
+    )
+
+    parser.add_argument(
+        '--games_per_match',
+        type=int,
+        default=60,
+        help='Rounded up to a multiple of 3, every agent plays every seat equally often',
+    )
+
+    parser.add_argument(
+        '--target_deviation',
+        type=float,
+        default=50.0,
+        help='Stop when the rating deviations of all agents are below it',
+    )
+
+    parser.add_argument(
+        '--report_interval',
+        type=int,
+        default=20,
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Rank a pool of agents with adaptively scheduled three-player matches')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
@@ -0,0 +1,153 @@
+""" Profile N episodes of Zole and write a cProfile dump or flamegraph-ready collapsed stacks
+"""
+import envs
+from defined_agents import get_path_agent, get_random_agent
+from profiler import StageProfiler
+from seeding import set_seed
+
+import argparse
+import cProfile
+import os
+import signal
+from collections import Counter
+
+import rlcard
+
+
+def get_env(seed_id: int, profiler: StageProfiler):
+    set_seed(seed_id)
+
+    return rlcard.make(
+        'zole',
+        {
+            'seed': seed_id,
+            'profiler': profiler,
+        }
+    )
+
+
+def run_episodes(env, num_episodes: int, is_training: bool):
+    for _ in range(num_episodes):
+        env.run(is_training=is_training)
+
+
+def profile_cprofile(env, args) -> str:
+    """ Run the episodes under cProfile, the dump can be opened with snakeviz or converted with flameprof
+    """
+    path = os.path.join(args.output_dir, 'zole.prof')
+    profile = cProfile.Profile()
+    profile.runcall(run_episodes, env, args.num_episodes, args.is_training)
+    profile.dump_stats(path)
+    return path
+
+
+def profile_sample(env, args) -> str:
+    """ Sample the python stack every `sample_interval` ms of cpu time, output is in the collapsed format
+        read by flamegraph.pl and speedscope
+    """
+    path = os.path.join(args.output_dir, 'zole.folded')
+    stacks = Counter()
+
+    def on_sample(signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        stacks[';'.join(reversed(stack))] += 1
+
+    interval = args.sample_interval / 1000
+    previous_handler = signal.signal(signal.SIGPROF, on_sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        run_episodes(env, args.num_episodes, args.is_training)
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous_handler)
+
+    with open(path, 'w') as file:
+        for stack, count in stacks.most_common():
+            file.write(f'{stack} {count}\n')
+    return path
+
+
+def start(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    profiler = StageProfiler()
+    env = get_env(args.seed_id, profiler)
+    if args.agent_path:
+        agent = get_path_agent(args.agent_path)
+    else:
+        agent = get_random_agent(env)
+    env.set_agents([
+        get_random_agent(env),
+        get_random_agent(env),
+        agent
+    ])
+
+    if args.mode == 'cprofile':
+        path = profile_cprofile(env, args)
+    else:  # args.mode == 'sample'
+        path = profile_sample(env, args)
+
+    profiler.display()
+    profiler.export(os.path.join(args.output_dir, 'stages.json'))
+    print(f'\nProfile of {args.num_episodes} episodes saved in {path}')
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--num_episodes',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--mode',
+        type=str,
+        default='cprofile',
+        choices=[
+            'cprofile',
+            'sample',
+        ],
+    )
+
+    parser.add_argument(
+        '--agent_path',
+        type=str,
+        default='',
+        help='Trained agent for seat 2, random agents are used for all seats when empty',
+    )
+
+    parser.add_argument(
+        '--output_dir',
+        type=str,
+        default='performance/profile',
+    )
+
+    parser.add_argument(
+        '--sample_interval',
+        type=float,
+        default=1.0,
+        help='Sampling interval in milliseconds for --mode=sample',
+    )
+
+    parser.add_argument(
+        '--is_training',
+        action='store_true',
+        help='Use agent step instead of eval_step',
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Profile Zole episodes')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
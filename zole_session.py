@@ -0,0 +1,122 @@
+import envs
+from defined_agents import close_agents
+from session import SETTLEMENTS, Session
+from seeding import set_seed
+from zole_league import load_agent
+
+import argparse
+import json
+import os
+
+import rlcard
+
+
+def print_session(session: Session, names: list):
+    print(f'Session after {session.num_rounds} rounds, {session.num_passed_rounds} passed, {session.pules} pules in the pot')
+    for seat, name in enumerate(names):
+        score = session.scores[seat]
+        print(f'{seat:3d} {score:+8.0f} {score / session.num_rounds:+.3f}/round {session.large_counts[seat]:6d} as large  {name}')
+
+
+def start(args):
+    set_seed(args.seed_id)
+    env = rlcard.make(
+        'zole',
+        {
+            'seed': args.seed_id,
+            'display_performance_interval': 10 ** 9,
+        }
+    )
+    if len(args.agents) != env.num_players:
+        raise Exception(f'zole_session: {env.num_players} agents are needed, got {len(args.agents)}')
+
+    agents = [load_agent(env, spec) for spec in args.agents]
+    session = Session(
+        env,
+        agents,
+        settlement=args.settlement,
+        pule_value=args.pule_value,
+        first_board_id=args.first_board_id,
+    )
+    output = None
+    if args.output_path:
+        os.makedirs(os.path.dirname(args.output_path) or '.', exist_ok=True)
+        output = open(args.output_path, 'w')
+    try:
+        for result in session.play(args.num_rounds):
+            if output:
+                output.write(json.dumps(result) + '\n')
+            if session.num_rounds % args.report_interval == 0:
+                if output:
+                    output.flush()
+                print_session(session, args.agents)
+    finally:
+        if output:
+            output.close()
+        close_agents(agents)
+
+    if session.num_rounds % args.report_interval != 0:
+        print_session(session, args.agents)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--agents',
+        type=str,
+        nargs=3,
+        default=['heuristic', 'heuristic', 'random'],
+        help='The agent of every seat: random, heuristic, pimc or an agent file',
+    )
+
+    parser.add_argument(
+        '--num_rounds',
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        '--settlement',
+        type=str,
+        default='pule',
+        choices=SETTLEMENTS,
+        help='pule: rounds in which all players pass add a common pule, collected or paid by the next large player',
+    )
+
+    parser.add_argument(
+        '--pule_value',
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        '--first_board_id',
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        '--output_path',
+        type=str,
+        default=None,
+        help='JSON lines file the result of every round is streamed to',
+    )
+
+    parser.add_argument(
+        '--report_interval',
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        '--seed_id',
+        type=int,
+        default=14,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Play a session of consecutive Zole rounds with dealer rotation')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start(args)
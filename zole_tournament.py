@@ -1,11 +1,12 @@
 import envs
-from defined_agents import get_random_agent
+from defined_agents import get_heuristic_agent, get_path_agent, get_random_agent
+from seeding import set_seed
+from tournament_stats import format_summary, run_tournament
 
 import argparse
-import torch
 
+import numpy as np
 import rlcard
-from rlcard.utils import set_seed, tournament
 
 
 def get_env(seed_id: int):
@@ -19,28 +20,89 @@ def get_env(seed_id: int):
 
 def start(args):
     env = get_env(args.seed_id)
+    get_opponent = get_heuristic_agent if args.opponent == 'heuristic' else get_random_agent
     env.set_agents([
-        get_random_agent(env),
-        get_random_agent(env),
-        torch.load(args.agent_path)
+        get_opponent(env),
+        get_opponent(env),
+        get_path_agent(args.agent_path, args.agent_index)
     ])
 
-    rewards = tournament(env, args.nr_games)
-    print(f'Points per game {rewards}')
+    results, summary = run_tournament(
+        env,
+        args.nr_games,
+        batch_size=args.batch_size,
+        target_ci_width=args.target_ci_width,
+        min_games=args.min_games,
+        confidence=args.confidence,
+        seed=args.seed_id,
+    )
+    print(f'Points per game {summary["mean"].tolist()}')
+    print(format_summary(summary, [args.opponent, args.opponent, args.agent_path]))
+    if args.payoffs_path:
+        np.savez(args.payoffs_path, payoffs=results.game_payoffs(), large_players=results.large_players[:results.num_games])
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser('Run tournament with agents')
+def add_arguments(parser: argparse.ArgumentParser):
     parser.add_argument(
         '--agent_path',
         type=str,
         default='samples/dmc/2_137897600.pth',
+        help='Exported (.npz) or pickled (.pth) agent, or a rl_training.py (.pt) or DMC (model.tar) checkpoint',
+    )
+
+    parser.add_argument(
+        '--agent_index',
+        type=int,
+        default=0,
+        help='Player position of the agent in checkpoints holding several agents',
+    )
+
+    parser.add_argument(
+        '--opponent',
+        type=str,
+        default='random',
+        choices=['random', 'heuristic'],
     )
 
     parser.add_argument(
         '--nr_games',
         type=int,
         default=2000,
+        help='Maximal number of games',
+    )
+
+    parser.add_argument(
+        '--target_ci_width',
+        type=float,
+        default=None,
+        help='Stop once the confidence intervals of the mean payoffs of all seats are narrower than it',
+    )
+
+    parser.add_argument(
+        '--min_games',
+        type=int,
+        default=200,
+        help='Games played before early stopping is considered',
+    )
+
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=100,
+        help='Games between early stopping checks',
+    )
+
+    parser.add_argument(
+        '--confidence',
+        type=float,
+        default=0.95,
+    )
+
+    parser.add_argument(
+        '--payoffs_path',
+        type=str,
+        default=None,
+        help='.npz file the per-game payoffs and large players are saved to',
     )
 
     parser.add_argument(
@@ -49,6 +111,10 @@ if __name__ == '__main__':
         default=14,
     )
 
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Run tournament with agents')
+    add_arguments(parser)
     args = parser.parse_args()
 
     start(args)
\ No newline at end of file